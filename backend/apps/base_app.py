@@ -1,73 +1,285 @@
 # apps/base_app.py - Базовый класс для всех приложений
 from abc import ABC, abstractmethod
 # apps/base_app.py - убедитесь, что это есть
+import signal
+import threading
+import time
+
 import cv2
+from ..core.frame_grabber import LatestFrameGrabber
+from ..core.detectors import SolutionsHandDetector, create_detector
+from ..core.hands import HandsLoader
+from ..core.inputs import CameraInput
+from ..core.landmarker import ENGINE_SOLUTIONS, create_tasks_detector
+from ..core.metrics import NULL_TIMER, PipelineMetrics
+from ..core.rendering import HandRenderer, StaticOverlay
+from ..core.sources import CameraSource
+from ..core.recording import RecordingInput
 
 class BaseGestureApp(ABC):
     """Абстрактный базовый класс для приложений управления жестами"""
 
-    def __init__(self, hands, mp_hands, mp_drawing):
+    # Сколько рук ищет Hands, который приложение строит само
+    MAX_NUM_HANDS = 1
+
+    def __init__(self, hands=None, mp_hands=None, mp_drawing=None, source=None,
+                 frame_input=None, recorder=None, timer=None, overlay=False,
+                 detector=None, detector_options=None):
+        self.created = time.perf_counter()  # для отчёта о времени запуска
         self.hands = hands
+        # Детекция на полном кадре или уменьшенном с ROI (core/detectors.py)
+        self.detector = detector
+        # Детектор построен самим приложением (HandLandmarker) - и
+        # закрывается им; Hands закрывает hands_loader
+        self.owns_detector = False
+        if detector is None and hands is not None:
+            self.detector = SolutionsHandDetector(hands)
+        # Настройки детектора: engine и task_model - выбор движка
+        # (core/landmarker.py), остальное - для create_detector
+        self.detector_options = dict(detector_options or {})
+        self.engine = self.detector_options.pop('engine', ENGINE_SOLUTIONS)
+        self.task_model = self.detector_options.pop('task_model', None)
+        # Ни Hands, ни детектора не передали - строим свой Hands в фоне,
+        # пока открывается камера. Записи (frame_input) он не нужен.
+        self.hands_loader = None
+        if (self.detector is None and frame_input is None and
+                self.engine == ENGINE_SOLUTIONS):
+            self.hands_loader = HandsLoader(self.MAX_NUM_HANDS)
         self.mp_hands = mp_hands
         self.mp_drawing = mp_drawing
-        self.cap = None
+        # Откуда брать кадры: FrameSource (по умолчанию камера 0) или
+        # готовые landmarks из записи (ReplaySource) в обход MediaPipe
+        self.source = source
+        self.grabber = None
+        self.input = frame_input
+        self.recorder = recorder
+        self.frame_timestamp = None
+        self.camera_input = None
+        # Замеры по стадиям: StageTimer из benchmark.py или метрики для
+        # оверлея (клавиша 'm'). Выключенный оверлей ничего не замеряет.
+        self.metrics = timer or PipelineMetrics()
+        self.overlay = overlay
+        self.timer = self.metrics if (timer or overlay) else NULL_TIMER
+        # Руки рисуются один раз на кадр, неизменный текст - из кэша
+        self.renderer = HandRenderer()
+        self.static_overlay = StaticOverlay(self.draw_static)
+        self.rendering = True
+        self.pixels = None  # landmarks кадра в пикселях, (hands, 21, 2)
+        self.running = False  # False - цикл завершится после текущего кадра
 
     @abstractmethod
-    def process_frame(self, frame, hand_landmarks):
-        """Обработка одного кадра. Возвращает обработанный кадр."""
+    def process_frame(self, frame, landmarks, hand_index):
+        """Обработка одной руки на кадре. landmarks - LandmarkFrame всех
+        рук кадра. Возвращает обработанный кадр."""
         pass
 
+    def no_hands(self, frame):
+        """Кадр без рук (опционально): отпустить то, что держит жест"""
+        pass
+
+    def draw_static(self, canvas):
+        """Неизменный текст кадра. Рисуется один раз на размер кадра
+        (StaticOverlay) и накладывается из кэша."""
+        cv2.putText(canvas, "Press 'q' to quit", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
     def setup(self):
         """Настройка приложения (опционально)"""
-        self.cap = cv2.VideoCapture(0)
+        if self.input is None:
+            if self.source is None:
+                self.source = CameraSource(0)
+            if not self.source.open():
+                print("Не удалось открыть источник кадров")
+                self.source.release()
+                return False
+
+            # Камера читается в отдельном потоке: обработка всегда берёт
+            # свежий кадр. Файлы читаются по порядку.
+            self.grabber = self.source.start()
+            if self.detector is None:
+                self.detector = self.build_detector()
+                self.owns_detector = self.hands_loader is None
+            self.camera_input = CameraInput(self.grabber, self.detector,
+                                            mirror=True, timer=self.timer)
+            self.input = self.camera_input
+
+        # Всё прочитанное пишем в файл для последующего воспроизведения
+        if self.recorder is not None:
+            self.input = RecordingInput(self.input, self.recorder)
         return True
 
+    def build_detector(self):
+        """Детектор на Hands из фонового загрузчика или HandLandmarker"""
+        if self.engine != ENGINE_SOLUTIONS:
+            return create_tasks_detector(
+                self.engine, self.task_model, num_hands=self.MAX_NUM_HANDS,
+                infer_size=self.detector_options.get('infer_size', 0))
+        self.hands = self.hands_loader.get()
+        print(f"MediaPipe Hands готов за {self.hands_loader.elapsed:.2f} с "
+              f"(рук: {self.MAX_NUM_HANDS})")
+        return create_detector(self.hands, max_hands=self.MAX_NUM_HANDS,
+                               **self.detector_options)
+
     def cleanup(self):
         """Очистка ресурсов приложения"""
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
+        if self.input is not None:
+            self.input.close()
+        if self.owns_detector and self.detector is not None:
+            self.detector.close()
+            self.detector = None
+            self.owns_detector = False
+        if self.hands_loader is not None:
+            self.hands_loader.close()
+        if isinstance(self.grabber, LatestFrameGrabber):
+            print(f"Кадров захвачено: {self.grabber.frames_captured}, "
+                  f"пропущено: {self.grabber.frames_dropped}")
+        if self.recorder is not None:
+            print(f"Записано кадров: {self.recorder.frames_written}")
+
+    def toggle_overlay(self):
+        """Включаем/выключаем оверлей с метриками"""
+        self.overlay = not self.overlay
+        self.timer = self.metrics if self.overlay else NULL_TIMER
+        if self.camera_input is not None:
+            self.camera_input.timer = self.timer
 
-    def run(self):
-        """Основной цикл приложения"""
-        if not self.setup():
-            return
+    def draw_metrics(self, frame):
+        """Оверлей: частота инференса, задержки стадий, потерянные кадры"""
+        stages = self.metrics.summary()
+        lines = [f"FPS: {self.metrics.rate('inference'):.1f}"]
+        if 'detection' in self.metrics.rates:
+            # Инференс не на каждом кадре (PredictiveDetector)
+            lines[0] += f", MediaPipe: {self.metrics.rate('detection'):.1f}"
+        latency = stages.get('capture_to_display')
+        if latency:
+            lines.append(f"Latency: {latency['p50_ms']:.0f} ms "
+                         f"(p95 {latency['p95_ms']:.0f})")
+        if isinstance(self.grabber, LatestFrameGrabber):
+            lines.append(f"Dropped: {self.grabber.frames_dropped}")
+        for name in ('flip', 'resize', 'bgr2rgb', 'hands_process', 'gestures', 'draw',
+                     'process_frame', 'frame'):
+            if name in stages:
+                lines.append(f"{name}: {stages[name]['p50_ms']:.1f}/"
+                             f"{stages[name]['p95_ms']:.1f} ms")
 
-        print(f"Запущено приложение: {self.__class__.__name__}")
-        print("Нажмите 'q' для выхода")
+        height = frame.shape[0]
+        top = height - 10 - 18 * len(lines)
+        for i, text in enumerate(lines):
+            cv2.putText(frame, text, (10, top + 18 * i),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
 
-        while self.cap.isOpened():
-            success, frame = self.cap.read()
-            if not success:
-                print("Не удалось получить кадр с камеры")
-                break
+    def stop(self, *args):
+        """Завершить цикл после текущего кадра (из обработчика сигнала
+        или другого потока)"""
+        self.running = False
 
-            # Зеркальное отображение для естественного восприятия
-            frame = cv2.flip(frame, 1)
+    def run_headless(self, preview=None, max_frames=None):
+        """Работа без окна (фоновый сервис): ничего не рисуется, кроме
+        редких кадров превью для зрителей (core/preview.py), остановка -
+        по SIGINT/SIGTERM с нормальной очисткой."""
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+                signum = getattr(signal, name, None)
+                if signum is not None:
+                    handlers[signum] = signal.signal(signum, self.stop)
+        try:
+            self.run(max_frames=max_frames, display=False, preview=preview)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
 
-            # Конвертация цвета для MediaPipe
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(frame_rgb)
+    def run(self, max_frames=None, display=True, render=None, preview=None):
+        """Основной цикл приложения. max_frames и display=False - для
+        замеров без окна (benchmark.py). render=False - ничего не рисуем
+        (по умолчанию рисуем, только если показываем). preview -
+        PreviewServer: кадр рисуется, только когда его ждут зрители."""
+        frames = 0
+        loop_started = time.perf_counter()
+        try:
+            # Очистка и при неудачной настройке: Hands, детектор, источник
+            if not self.setup():
+                return
 
-            # Обработка результатов
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Рисуем landmarks
-                    self.mp_drawing.draw_landmarks(
-                        frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+            print(f"Запущено приложение: {self.__class__.__name__}")
+            if display:
+                print("Нажмите 'q' для выхода, 'm' - метрики")
+            rendering = display if render is None else render
+            self.rendering = rendering
+            self.running = True
+            loop_started = time.perf_counter()
 
-                    # Обрабатываем кадр в дочернем классе
-                    frame = self.process_frame(frame, hand_landmarks)
+            while self.running and self.input.isOpened():
+                if max_frames is not None and frames >= max_frames:
+                    break
+                frames += 1
+                if not self._run_frame(frames, display, rendering, preview):
+                    break
+        finally:
+            self.running = False
+            elapsed = time.perf_counter() - loop_started
+            if frames and not display:
+                print(f"Обработано кадров: {frames} "
+                      f"({frames / elapsed:.1f} кадр/с)")
+            self.cleanup()
+            if display:
+                cv2.destroyAllWindows()
 
-            # Показываем FPS
-            cv2.putText(frame, "Press 'q' to quit", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    def _run_frame(self, frames, display, rendering, preview):
+        """Один кадр цикла run; False - пора выходить"""
+        started = time.perf_counter()
 
-            # Отображаем результат
-            cv2.imshow('Gesture Control', frame)
+        # Кадр уже отражён, руки найдены (или взяты из записи)
+        frame, landmarks, timestamp = self.input.read()
+        if frame is None:
+            print("Кадры закончились")
+            return False
+        self.frame_timestamp = timestamp
+        self.timer.tick('inference')
+        if frames == 1:
+            print(f"Первый кадр через {time.perf_counter() - self.created:.2f} с "
+                  f"после запуска приложения")
 
-            # Выход по нажатию 'q'
-            if cv2.waitKey(5) & 0xFF == ord('q'):
-                break
+        # Без окна кадр рисуется, только если его ждёт превью
+        publish = preview is not None and preview.due()
+        self.rendering = rendering or publish
 
-        self.cleanup()
-        cv2.destroyAllWindows()
\ No newline at end of file
+        # Все руки кадра - одним проходом, пиксели получают приложения
+        if self.rendering:
+            with self.timer.stage('draw'):
+                self.pixels = self.renderer.draw_hands(frame, landmarks)
+
+        # Обработка результатов в дочернем классе (без отрисовки
+        # приложения только двигают курсор и считают жесты)
+        for hand_index in range(landmarks.num_hands):
+            with self.timer.stage('process_frame'):
+                frame = self.process_frame(frame, landmarks, hand_index)
+        if not landmarks.num_hands:
+            self.no_hands(frame)
+
+        if self.rendering:
+            self.static_overlay.apply(frame)
+        self.timer.add('frame', time.perf_counter() - started)
+
+        # Показываем FPS и задержки ('m' - вкл/выкл)
+        if self.overlay and self.rendering:
+            self.draw_metrics(frame)
+
+        if publish:
+            with self.timer.stage('preview'):
+                preview.publish(frame)
+
+        if not display:
+            return True
+
+        # Отображаем результат
+        cv2.imshow('Gesture Control', frame)
+        self.timer.add('capture_to_display', time.time() - timestamp)
+
+        # Выход по нажатию 'q', метрики - 'm'
+        key = cv2.waitKey(5) & 0xFF
+        if key == ord('q'):
+            return False
+        if key == ord('m'):
+            self.toggle_overlay()
+        return True
@@ -1,34 +1,55 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-import pyautogui
-import math
+import os
 import time
-import json
 from .base_app import BaseGestureApp
+from ..core.actuator import CursorActuator, PyAutoGuiBackend
+from ..core.filters import LandmarkFilter, OneEuroFilter, PredictiveDetector
+from ..core.gestures import (GESTURE_PAIRS, GestureEngine, CLICK,
+                             DOUBLE_CLICK, DRAG_START, DRAG_MOVE, DRAG_END,
+                             STATE_CLICK, STATE_DOUBLE_CLICK)
+from ..core.landmarks import INDEX_TIP
+from ..core.settings import DEFAULT_SETTINGS, SettingsStore
 
 
 class CursorMonitoringApp(BaseGestureApp):
     """Улучшенное приложение для управления курсором с настройками"""
 
-    def __init__(self, hands, mp_hands, mp_drawing):
-        super().__init__(hands, mp_hands, mp_drawing)
+    def __init__(self, hands=None, mp_hands=None, mp_drawing=None,
+                 cursor_backend=None, settings_path='cursor_settings.json',
+                 **options):
+        super().__init__(hands, mp_hands, mp_drawing, **options)
 
-        # Инициализируем стили рисования
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        # Курсор двигается в отдельном потоке и не тормозит обработку кадров
+        self.cursor_backend = cursor_backend or PyAutoGuiBackend()
+        self.actuator = CursorActuator(self.cursor_backend)
 
         # Получаем размер экрана
-        self.screen_width, self.screen_height = pyautogui.size()
+        self.screen_width, self.screen_height = self.cursor_backend.size()
         print(f"Размер экрана: {self.screen_width}x{self.screen_height}")
 
-        # Загружаем настройки
-        self.settings = self.load_default_settings()
-        self.load_settings_from_file()
+        # Загружаем настройки: держим в памяти, правки файла (вручную или
+        # через /settings сервера) подхватываются на ходу
+        self.settings_store = SettingsStore(settings_path,
+                                            self.load_default_settings())
+        self.settings = self.settings_store.values
+        self._settings_version = self.settings_store.version
+        if os.path.exists(settings_path):
+            print("Настройки загружены из файла")
+        else:
+            print("Используются настройки по умолчанию")
+
+        # Жесты: события только при смене состояния
+        self.gestures = GestureEngine(self.settings)
+
+        # Фильтр курсора и инференс не на каждом кадре (между детекциями
+        # landmarks предсказываются, курсор обновляется с частотой камеры)
+        self.cursor_filter = OneEuroFilter()
+        self.configure_filters()
 
         # Состояния
         self.prev_x, self.prev_y = 0, 0
         self.is_dragging = False
-        self.drag_start_time = 0
         self.drag_start_pos = (0, 0)
         self.calibration_points = []  # Для калибровки
         self.calibration_mode = False
@@ -37,35 +58,50 @@ class CursorMonitoringApp(BaseGestureApp):
         print(f"Настройки: {self.settings}")
 
     def load_default_settings(self):
-        """Настройки по умолчанию"""
-        return {
-            'click_threshold': 0.045,  # Чувствительность клика
-            'double_click_threshold': 0.035,  # Чувствительность двойного клика
-            'fist_threshold': 0.12,  # Чувствительность кулака
-            'cursor_smoothing': 0.25,  # 0-1, чем больше - плавнее
-            'cursor_speed': 1.0,  # Скорость курсора
-            'deadzone': 0.15,  # Мёртвая зона по краям
-            'drag_delay': 0.3,  # Задержка отпускания перетаскивания
-            'enable_double_click': True,
-            'enable_drag': True,
-            'enable_click': True
-        }
-
-    def load_settings_from_file(self):
-        """Загружаем настройки из файла"""
-        try:
-            with open('cursor_settings.json', 'r') as f:
-                saved = json.load(f)
-                self.settings.update(saved)
-                print("Настройки загружены из файла")
-        except FileNotFoundError:
-            print("Используются настройки по умолчанию")
+        """Настройки по умолчанию (описание ключей - core/settings.py)"""
+        return dict(DEFAULT_SETTINGS)
 
     def save_settings_to_file(self):
-        """Сохраняем настройки в файл"""
-        with open('cursor_settings.json', 'w') as f:
-            json.dump(self.settings, f, indent=4)
-        print("Настройки сохранены")
+        """Сохраняем настройки в файл (только если они изменились)"""
+        if self.settings_store.save():
+            print("Настройки сохранены")
+
+    def apply_settings(self):
+        """Подхватываем изменённые настройки без перезапуска"""
+        self.settings_store.poll()
+        if self.settings_store.version == self._settings_version:
+            return
+        self._settings_version = self.settings_store.version
+        self.gestures.configure(self.settings)
+        self.configure_filters()
+
+    def configure_filters(self):
+        """Применяем настройки фильтров и частоты инференса"""
+        settings = self.settings
+        self.cursor_filter.configure(settings['cursor_min_cutoff'],
+                                     settings['cursor_beta'],
+                                     settings['filter_d_cutoff'],
+                                     settings['predict_max'])
+
+        if self.detector is None:
+            return  # Hands ещё строится - применим в build_detector
+        predictive = (settings['landmark_filter'] or
+                      settings['inference_every'] > 1 or
+                      settings['inference_hz'] > 0)
+        if predictive and not isinstance(self.detector, PredictiveDetector):
+            self.detector = PredictiveDetector(self.detector,
+                                               landmark_filter=LandmarkFilter())
+            # Настройки сменились на ходу - камера уже читает кадры
+            if self.camera_input is not None:
+                self.camera_input.detector = self.detector
+        if isinstance(self.detector, PredictiveDetector):
+            self.detector.apply_settings(settings)
+
+    def build_detector(self):
+        """Детектор на своём Hands, с фильтром landmarks из настроек"""
+        self.detector = super().build_detector()
+        self.configure_filters()
+        return self.detector
 
     def exponential_smoothing(self, current, previous, alpha=None):
         """Экспоненциальное сглаживание"""
@@ -73,40 +109,24 @@ class CursorMonitoringApp(BaseGestureApp):
             alpha = self.settings['cursor_smoothing']
         return alpha * current + (1 - alpha) * previous
 
-    def _distance(self, p1, p2):
-        """Вычисление расстояния между двумя точками"""
-        return math.sqrt((p1.x - p2.x) ** 2 + (p1.y - p2.y) ** 2)
-
     def calibrate_screen(self):
         """Калибровка экрана (показываем 4 угла пальцем)"""
         self.calibration_mode = True
         self.calibration_points = []
         print("Режим калибровки: покажите 4 угла экрана пальцем")
 
-    def process_frame(self, frame, hand_landmarks):
+    def process_frame(self, frame, landmarks, hand_index):
         """Обработка одного кадра с жестами"""
-        height, width, _ = frame.shape
-
-        # Получаем координаты ключевых точек
-        landmarks = hand_landmarks.landmark
-
-        # Координаты пальцев
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        ring_tip = landmarks[16]
-        pinky_tip = landmarks[20]
-        wrist = landmarks[0]
+        self.apply_settings()
 
-        # Преобразуем в пиксели
-        index_x = int(index_tip.x * width)
-        index_y = int(index_tip.y * height)
+        # Координаты указательного пальца
+        index_tip_x, index_tip_y = landmarks.points[hand_index, INDEX_TIP, :2].tolist()
 
         # 1. УПРАВЛЕНИЕ КУРСОРОМ (улучшенное)
         # Учитываем мёртвую зону
         deadzone = self.settings['deadzone']
-        x_normalized = max(deadzone, min(1 - deadzone, index_tip.x))
-        y_normalized = max(deadzone, min(1 - deadzone, index_tip.y))
+        x_normalized = max(deadzone, min(1 - deadzone, index_tip_x))
+        y_normalized = max(deadzone, min(1 - deadzone, index_tip_y))
 
         # Преобразуем с учётом мёртвой зоны
         effective_range = 1 - 2 * deadzone
@@ -121,69 +141,89 @@ class CursorMonitoringApp(BaseGestureApp):
         cursor_x = max(0, min(self.screen_width - 1, cursor_x))
         cursor_y = max(0, min(self.screen_height - 1, cursor_y))
 
-        # Сглаживание
-        smooth_x = self.exponential_smoothing(cursor_x, self.prev_x)
-        smooth_y = self.exponential_smoothing(cursor_y, self.prev_y)
+        # Время кадра, а не текущее: при воспроизведении записи жесты
+        # срабатывают так же, как при съёмке
+        timestamp = self.frame_timestamp or time.time()
 
-        # Двигаем курсор
-        pyautogui.moveTo(smooth_x, smooth_y, duration=0.05)
+        # Сглаживание: One Euro почти не отстаёт на быстрых движениях
+        if self.settings['cursor_filter'] == 'one_euro':
+            smooth_x, smooth_y = self.cursor_filter.filter(
+                (cursor_x, cursor_y), timestamp).tolist()
+        else:
+            smooth_x = self.exponential_smoothing(cursor_x, self.prev_x)
+            smooth_y = self.exponential_smoothing(cursor_y, self.prev_y)
+
+        # Двигаем курсор (неблокирующе, актуатор плавно догоняет цель)
+        self.actuator.move_to(smooth_x, smooth_y)
 
         self.prev_x, self.prev_y = smooth_x, smooth_y
 
         # 2. ОПРЕДЕЛЯЕМ ЖЕСТЫ
-        thumb_index_dist = self._distance(thumb_tip, index_tip)
-        pinky_ring_dist = self._distance(pinky_tip, ring_tip)
-
-        fingers_to_wrist = [
-            self._distance(index_tip, wrist),
-            self._distance(middle_tip, wrist),
-            self._distance(ring_tip, wrist),
-            self._distance(pinky_tip, wrist)
-        ]
+        distances = landmarks.distances(GESTURE_PAIRS)[hand_index].tolist()
+
+        # Автомат жестов выдаёт события только на переходах,
+        # поэтому удерживаемый щипок - это один клик, а не клик на кадр
+        with self.timer.stage('gestures'):
+            events = self.gestures.update_distances(
+                distances, timestamp, (cursor_x, cursor_y))
+        event_text = None
+        for event in events:
+            if event.kind == CLICK:
+                self.actuator.click()
+            elif event.kind == DOUBLE_CLICK:
+                self.actuator.double_click()
+            elif event.kind == DRAG_START:
+                self.actuator.mouse_down()
+                self.is_dragging = True
+                self.drag_start_pos = (cursor_x, cursor_y)
+                event_text = ('DRAG START', (0, 0, 255))
+            elif event.kind == DRAG_MOVE:
+                # Плавное перетаскивание
+                self.actuator.move_to(event.x, event.y)
+                event_text = ('DRAGGING...', (0, 0, 255))
+            elif event.kind == DRAG_END:
+                self.actuator.mouse_up()
+                self.is_dragging = False
+                event_text = ('DRAG END', (255, 255, 0))
+
+        # 3. ВИЗУАЛИЗАЦИЯ (руки уже нарисованы базовым классом)
+        if self.rendering:
+            self._draw_state(frame, self.pixels[hand_index, INDEX_TIP].tolist(),
+                             event_text, smooth_x, smooth_y, distances[0])
+
+        return frame
+
+    def no_hands(self, frame):
+        """Рука пропала: автомат жестов сбрасывается, зажатая при
+        перетаскивании кнопка отпускается"""
+        if not self.gestures.hand_present:
+            return
+        timestamp = self.frame_timestamp or time.time()
+        for event in self.gestures.lost(timestamp):
+            if event.kind == DRAG_END:
+                self.actuator.mouse_up()
+                self.is_dragging = False
+
+    def _draw_state(self, frame, index_point, event_text, smooth_x, smooth_y,
+                    thumb_index_dist):
+        """События жестов, точка указательного пальца и настройки"""
+        if event_text is not None:
+            text, color = event_text
+            cv2.putText(frame, text, (50, 200),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, color, 3)
 
         # Жест клика
-        if (self.settings['enable_click'] and
-                thumb_index_dist < self.settings['click_threshold']):
-            pyautogui.click()
+        if self.gestures.state == STATE_CLICK:
             cv2.putText(frame, 'CLICK!', (50, 100),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 3)
 
         # Жест двойного клика
-        elif (self.settings['enable_double_click'] and
-              pinky_ring_dist < self.settings['double_click_threshold']):
-            pyautogui.doubleClick()
+        elif self.gestures.state == STATE_DOUBLE_CLICK:
             cv2.putText(frame, 'DOUBLE CLICK!', (50, 150),
                         cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 3)
 
-        # Жест перетаскивания (кулак)
-        elif (self.settings['enable_drag'] and
-              all(dist < self.settings['fist_threshold']
-                  for dist in fingers_to_wrist)):
-
-            if not self.is_dragging:
-                pyautogui.mouseDown()
-                self.is_dragging = True
-                self.drag_start_time = time.time()
-                self.drag_start_pos = (cursor_x, cursor_y)
-                cv2.putText(frame, 'DRAG START', (50, 200),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
-            else:
-                # Плавное перетаскивание
-                pyautogui.dragTo(cursor_x, cursor_y, duration=0.05)
-                cv2.putText(frame, 'DRAGGING...', (50, 200),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
-
-        elif self.is_dragging:
-            # Заканчиваем перетаскивание с задержкой
-            if time.time() - self.drag_start_time > self.settings['drag_delay']:
-                pyautogui.mouseUp()
-                self.is_dragging = False
-                cv2.putText(frame, 'DRAG END', (50, 200),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 3)
-
-        # 3. ВИЗУАЛИЗАЦИЯ
         # Рисуем точку на указательном пальце
-        cv2.circle(frame, (index_x, index_y), 15, (0, 0, 255), -1)
+        cv2.circle(frame, (index_point[0], index_point[1]), 15, (0, 0, 255), -1)
 
         # Отображаем координаты и настройки
         info_text = [
@@ -192,22 +232,25 @@ class CursorMonitoringApp(BaseGestureApp):
             f"Drag: {self.is_dragging}",
             f"Smooth: {self.settings['cursor_smoothing']}"
         ]
+        self.renderer.draw_labels(frame, [
+            (text, (10, 30 + i * 25), (255, 255, 255))
+            for i, text in enumerate(info_text)], font_scale=0.5)
 
-        for i, text in enumerate(info_text):
-            cv2.putText(frame, text, (10, 30 + i * 25),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-        # Рисуем landmarks
-        self.mp_drawing.draw_landmarks(
-            frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS,
-            self.mp_drawing_styles.get_default_hand_landmarks_style(),
-            self.mp_drawing_styles.get_default_hand_connections_style())
-
-        return frame
+    def setup(self):
+        """Настройка приложения"""
+        if not super().setup():
+            return False
+        self.actuator.start()
+        return True
 
     def cleanup(self):
         """Очистка ресурсов"""
         if self.is_dragging:
-            pyautogui.mouseUp()
+            self.actuator.mouse_up()
+            self.is_dragging = False
+        self.actuator.stop()
+        print(f"Курсор: целей {self.actuator.targets_received}, "
+              f"объединено {self.actuator.targets_coalesced}, "
+              f"задержка {self.actuator.average_latency * 1000:.1f} мс")
         self.save_settings_to_file()
         super().cleanup()
\ No newline at end of file
@@ -0,0 +1,125 @@
+# backend/config.py - Настройки сервера из переменных окружения
+import os
+
+
+def env_int(name, default):
+    """Целое значение из окружения"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def env_float(name, default):
+    """Дробное значение из окружения"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+def env_str(name, default):
+    """Строковое значение из окружения"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+# Камера по умолчанию
+CAMERA_INDEX = env_int("GESTURE_CAMERA", 0)
+
+# Камеры, которые клиент может выбрать через ?camera=N, например "0,1,2"
+# (не задано - любая)
+CAMERAS = env_str("GESTURE_CAMERAS", None)
+CAMERAS = ([int(index) for index in CAMERAS.split(",") if index.strip()]
+           if CAMERAS else None)
+
+# Источник кадров вместо камеры: "video:path", "images:dir", "synthetic"
+# (см. backend/core/sources.py). По умолчанию - камера GESTURE_CAMERA.
+# Несколько через запятую - по источнику на камеру 0, 1, ...
+SOURCE = env_str("GESTURE_SOURCE", None)
+
+# Тестовый режим (1 - включён): synthetic-источник (если GESTURE_SOURCE
+# не задан) и FakeHandDetector вместо MediaPipe - для нагрузочных тестов
+# без камеры (loadtest.py). GESTURE_TEST_HANDS - рук в кадре,
+# GESTURE_TEST_INFER_MS - имитация времени инференса
+TEST_MODE = env_int("GESTURE_TEST_MODE", 0)
+TEST_HANDS = env_int("GESTURE_TEST_HANDS", 1)
+TEST_INFER_MS = env_float("GESTURE_TEST_INFER_MS", 0)
+
+# Захват и инференс каждой камеры в своём процессе (1 - включено):
+# несколько камер используют несколько ядер. Кадры возвращаются через
+# общую память, GESTURE_FRAME_SLOTS - слотов в кольце на камеру
+CAMERA_PROCESSES = env_int("GESTURE_CAMERA_PROCESSES", 0)
+FRAME_SLOTS = env_int("GESTURE_FRAME_SLOTS", 4)
+
+# Настройки захвата камеры (0 - как решит драйвер). MJPG на меньшем
+# разрешении обычно заметно снижает задержку
+CAPTURE_WIDTH = env_int("GESTURE_CAPTURE_WIDTH", 0)
+CAPTURE_HEIGHT = env_int("GESTURE_CAPTURE_HEIGHT", 0)
+CAPTURE_FPS = env_float("GESTURE_CAPTURE_FPS", 0)
+CAPTURE_FOURCC = env_str("GESTURE_CAPTURE_FOURCC", None)
+CAPTURE_BUFFER = env_int("GESTURE_CAPTURE_BUFFER", 0)
+
+# Движок детекции: solutions (mp.solutions.hands), video или live_stream
+# (MediaPipe Tasks HandLandmarker, live_stream - асинхронно, см.
+# backend/core/landmarker.py). Tasks нужна модель hand_landmarker.task
+ENGINE = env_str("GESTURE_ENGINE", "solutions")
+TASK_MODEL = env_str("GESTURE_TASK_MODEL", "hand_landmarker.task")
+
+# Размер входа MediaPipe по большей стороне (0 - полный кадр) и
+# инференс на области вокруг руки с прошлого кадра (1 - включён)
+INFER_SIZE = env_int("GESTURE_INFER_SIZE", 0)
+ROI_TRACKING = env_int("GESTURE_ROI", 0)
+ROI_PADDING = env_float("GESTURE_ROI_PADDING", 0.5)
+
+# MediaPipe раз в N кадров или с заданной частотой (0 - на каждом кадре);
+# между детекциями landmarks предсказывает фильтр One Euro
+INFER_EVERY = env_int("GESTURE_INFER_EVERY", 1)
+INFER_HZ = env_float("GESTURE_INFER_HZ", 0)
+LANDMARK_FILTER = env_int("GESTURE_LANDMARK_FILTER", 0)
+
+# Потоки для отрисовки и JPEG кодирования (захват и инференс - отдельный поток на камеру)
+PIPELINE_WORKERS = env_int("GESTURE_PIPELINE_WORKERS",
+                           max(1, min(4, (os.cpu_count() or 2) - 1)))
+
+# Длина очереди кадров на одного клиента
+CLIENT_QUEUE_SIZE = env_int("GESTURE_CLIENT_QUEUE", 2)
+
+# Целевая частота кадров камеры (клиент может заказать свою через ?fps=)
+TARGET_FPS = env_float("GESTURE_TARGET_FPS", 30.0)
+
+# Качество JPEG: верхняя и нижняя граница адаптации под медленного клиента
+JPEG_QUALITY = env_int("GESTURE_JPEG_QUALITY", 70)
+JPEG_QUALITY_MIN = env_int("GESTURE_JPEG_QUALITY_MIN", 30)
+
+# Минимальный масштаб кадра при адаптации
+MIN_SCALE = env_float("GESTURE_MIN_SCALE", 0.5)
+
+# Импорт mediapipe в фоне сразу после старта сервера (0 - при первом
+# клиенте): первый кадр приходит быстрее
+PRELOAD = env_int("GESTURE_PRELOAD", 1)
+
+# Файл настроек жестов и сглаживания (тот же, что у приложения курсора).
+# Меняется на лету через /settings, правки файла подхватываются сами
+SETTINGS_PATH = env_str("GESTURE_SETTINGS", "cursor_settings.json")
+
+# Образцы поз руки для распознавания на сервере (backend/core/classifier.py):
+# файл, который пополняется через POST /poses, и порог сходства -
+# среднее отличие координат в размерах руки
+POSES_PATH = env_str("GESTURE_POSES", "gestures.json")
+POSE_DISTANCE = env_float("GESTURE_POSE_DISTANCE", 0.15)
+
+# Метрики конвейера для /metrics и сообщений stats (0 - выключены)
+METRICS = env_int("GESTURE_METRICS", 1)
+
+# Воспроизведение записи landmarks вместо камеры (см. backend/core/recording.py):
+# путь к файлу, видео к нему и скорость (1 - исходная, 0 - максимальная)
+REPLAY_PATH = env_str("GESTURE_REPLAY", None)
+REPLAY_VIDEO = env_str("GESTURE_REPLAY_VIDEO", None)
+REPLAY_SPEED = env_float("GESTURE_REPLAY_SPEED", 1.0)
+
+# Запись landmarks (и видео) с камеры сервера
+RECORD_PATH = env_str("GESTURE_RECORD", None)
+RECORD_VIDEO = env_str("GESTURE_RECORD_VIDEO", None)
@@ -0,0 +1,247 @@
+# core/actuator.py - Неблокирующее управление курсором в отдельном потоке
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class CursorBackend(ABC):
+    """Интерфейс системного курсора"""
+
+    @abstractmethod
+    def size(self):
+        """Размер экрана (width, height)"""
+        pass
+
+    @abstractmethod
+    def position(self):
+        """Текущая позиция курсора (x, y)"""
+        pass
+
+    @abstractmethod
+    def move_to(self, x, y):
+        pass
+
+    @abstractmethod
+    def mouse_down(self):
+        pass
+
+    @abstractmethod
+    def mouse_up(self):
+        pass
+
+    @abstractmethod
+    def click(self):
+        pass
+
+    @abstractmethod
+    def double_click(self):
+        pass
+
+
+class PyAutoGuiBackend(CursorBackend):
+    """Реальный курсор через pyautogui"""
+
+    def __init__(self):
+        import pyautogui
+        self.gui = pyautogui
+
+    def size(self):
+        return tuple(self.gui.size())
+
+    def position(self):
+        return tuple(self.gui.position())
+
+    # _pause=False: без встроенной паузы pyautogui (PAUSE = 0.1 с на вызов)
+    def move_to(self, x, y):
+        self.gui.moveTo(x, y, _pause=False)
+
+    def mouse_down(self):
+        self.gui.mouseDown(_pause=False)
+
+    def mouse_up(self):
+        self.gui.mouseUp(_pause=False)
+
+    def click(self):
+        self.gui.click(_pause=False)
+
+    def double_click(self):
+        self.gui.doubleClick(_pause=False)
+
+
+class RecordingBackend(CursorBackend):
+    """Курсор в памяти: записывает все действия, для тестов без экрана"""
+
+    def __init__(self, width=1920, height=1080):
+        self.width = width
+        self.height = height
+        self.x, self.y = width // 2, height // 2
+        self.button_down = False
+        self.events = []  # (time, action, x, y)
+        self._lock = threading.Lock()
+
+    def _record(self, action):
+        with self._lock:
+            self.events.append((time.perf_counter(), action, self.x, self.y))
+
+    def size(self):
+        return self.width, self.height
+
+    def position(self):
+        return self.x, self.y
+
+    def move_to(self, x, y):
+        self.x, self.y = x, y
+        self._record('move')
+
+    def mouse_down(self):
+        self.button_down = True
+        self._record('down')
+
+    def mouse_up(self):
+        self.button_down = False
+        self._record('up')
+
+    def click(self):
+        self._record('click')
+
+    def double_click(self):
+        self._record('double_click')
+
+    def count(self, action):
+        with self._lock:
+            return sum(1 for event in self.events if event[1] == action)
+
+
+class CursorActuator:
+    """Поток, который двигает курсор, не блокируя цикл обработки кадров.
+
+    Позиция цели не копится в очереди: хранится только последняя
+    (коалесцирование), и курсор плавно подтягивается к ней с частотой
+    rate_hz. Клики и нажатия выполняются по порядку.
+    """
+
+    def __init__(self, backend, rate_hz=120, glide=0.05):
+        self.backend = backend
+        self.period = 1.0 / rate_hz
+        self.glide = glide  # постоянная времени подтягивания, с
+
+        self.x, self.y = backend.position()
+        self._target = None
+        self._target_time = None
+        self._commands = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # Статистика
+        self.targets_received = 0
+        self.targets_coalesced = 0
+        self.moves_sent = 0
+        self.commands_sent = 0
+        self.latency_total = 0.0  # от постановки цели до первого движения к ней
+        self.latency_count = 0
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop,
+                                            name="cursor-actuator",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем поток, выполнив оставшиеся команды"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def move_to(self, x, y):
+        """Новая цель курсора; непрочитанная предыдущая отбрасывается"""
+        with self._cond:
+            if self._target_time is not None:
+                self.targets_coalesced += 1
+            self._target = (float(x), float(y))
+            self._target_time = time.perf_counter()
+            self.targets_received += 1
+            self._cond.notify()
+
+    def click(self):
+        self._command('click')
+
+    def double_click(self):
+        self._command('double_click')
+
+    def mouse_down(self):
+        self._command('mouse_down')
+
+    def mouse_up(self):
+        self._command('mouse_up')
+
+    def _command(self, name):
+        with self._cond:
+            self._commands.append(name)
+            self._cond.notify()
+
+    @property
+    def average_latency(self):
+        if not self.latency_count:
+            return 0.0
+        return self.latency_total / self.latency_count
+
+    def _idle(self):
+        return (not self._commands and
+                (self._target is None or
+                 (self._target_time is None and
+                  self._target == (self.x, self.y))))
+
+    def _loop(self):
+        last = time.perf_counter()
+        while True:
+            with self._cond:
+                while self._running and self._idle():
+                    self._cond.wait()
+                    last = time.perf_counter() - self.period
+                if not self._running and not self._commands:
+                    break
+                commands = list(self._commands)
+                self._commands.clear()
+                target = self._target
+                target_time, self._target_time = self._target_time, None
+
+            now = time.perf_counter()
+            if target_time is not None:
+                self.latency_total += now - target_time
+                self.latency_count += 1
+
+            if target is not None:
+                if commands:
+                    # Клик должен попасть туда, куда указывает рука
+                    alpha = 1.0
+                else:
+                    alpha = 1.0 - math.exp(-(now - last) / self.glide)
+                self._step(target, alpha)
+
+            for name in commands:
+                getattr(self.backend, name)()
+                self.commands_sent += 1
+
+            last = now
+            time.sleep(max(0.0, self.period - (time.perf_counter() - now)))
+
+    def _step(self, target, alpha):
+        """Сдвигаем курсор к цели на долю alpha"""
+        x = self.x + (target[0] - self.x) * alpha
+        y = self.y + (target[1] - self.y) * alpha
+        if abs(target[0] - x) < 0.5 and abs(target[1] - y) < 0.5:
+            x, y = target
+        if round(x) != round(self.x) or round(y) != round(self.y):
+            self.backend.move_to(round(x), round(y))
+            self.moves_sent += 1
+        with self._cond:
+            self.x, self.y = x, y
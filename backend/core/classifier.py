@@ -0,0 +1,177 @@
+# core/classifier.py - Распознавание поз руки по записанным образцам
+"""Поза руки (кулак, ладонь, "V", свои жесты пользователя) - ближайший
+записанный образец, а не набор порогов.
+
+Каждая рука приводится к виду, не зависящему от положения, размера и
+поворота: точки относительно запястья, в размерах руки (запястье -
+основание среднего пальца), повёрнуты так, что эта ось смотрит вверх,
+левая рука отражена в правую. Получается вектор из 60 чисел.
+
+Образцы хранятся одной матрицей, все руки кадра сравниваются с ней
+одним умножением матриц: |x - t|^2 = |x|^2 - 2 x.t + |t|^2. Сотни
+образцов и две руки - единицы микросекунд на матрицу.
+"""
+import json
+import threading
+
+import numpy as np
+
+from .landmarks import MIDDLE_MCP, NUM_LANDMARKS, WRIST
+from .settings import write_json_atomic
+
+# Глубина MediaPipe шумнее x и y - меньший вес
+Z_WEIGHT = 0.5
+FEATURE_SIZE = (NUM_LANDMARKS - 1) * 3
+NO_POSE = 255  # номер позы "ни на что не похожа" в бинарных протоколах
+LIBRARY_VERSION = 1
+
+
+def hand_features(landmarks, aspect=4 / 3):
+    """LandmarkFrame -> float32 (hands, FEATURE_SIZE).
+    aspect - ширина / высота кадра: x и y нормализованы по разным сторонам."""
+    hands = landmarks.num_hands
+    points = landmarks.points[:, WRIST + 1:] - landmarks.points[:, WRIST:WRIST + 1]
+    # Левая рука - зеркально, образцы общие для обеих рук
+    mirror = np.array([-aspect if label == 'Left' else aspect
+                       for label in landmarks.handedness], dtype=np.float32)
+
+    # Ось запястье - основание среднего пальца: длина - масштаб,
+    # направление - поворот (ось переводим в (0, -1), вверх по кадру)
+    axis_x = points[:, MIDDLE_MCP - 1, 0] * mirror
+    axis_y = points[:, MIDDLE_MCP - 1, 1]
+    size = np.maximum(np.sqrt(axis_x * axis_x + axis_y * axis_y), 1e-6)
+    cos, sin = -axis_y / size, -axis_x / size
+
+    # Отражение, пропорции кадра, поворот и масштаб - одна матрица 3x3
+    # на руку: (x, y, z) -> (x', y', z')
+    transform = np.zeros((hands, 3, 3), dtype=np.float32)
+    transform[:, 0, 0] = cos * mirror
+    transform[:, 0, 1] = sin * mirror
+    transform[:, 1, 0] = -sin
+    transform[:, 1, 1] = cos
+    transform[:, 2, 2] = aspect * Z_WEIGHT
+    transform /= size[:, None, None]
+    return np.matmul(points, transform).reshape(hands, FEATURE_SIZE)
+
+
+class _Library:
+    """Неизменяемый снимок образцов: потоку камеры не нужны блокировки"""
+
+    def __init__(self, vectors, labels):
+        self.vectors = np.asarray(vectors, dtype=np.float32).reshape(
+            -1, FEATURE_SIZE)
+        self.labels = list(labels)
+        self.names = tuple(sorted(set(self.labels)))
+        index = {name: i for i, name in enumerate(self.names)}
+        self.label_ids = np.array([index[label] for label in self.labels],
+                                  dtype=np.uint8)
+        self.norms = np.einsum('nk,nk->n', self.vectors, self.vectors)
+
+
+class PoseClassifier:
+    """Ближайший образец для каждой руки кадра.
+
+    classify() вызывается в потоке камеры, record()/remove() - из
+    других потоков: они собирают новый снимок библиотеки и подменяют
+    его одним присваиванием. version растёт при каждом изменении.
+    max_distance - среднеквадратичное отличие на координату (в размерах
+    руки), дальше которого поза не засчитывается.
+    """
+
+    def __init__(self, path=None, max_distance=0.15):
+        self.path = path
+        self.max_distance = max_distance
+        self.version = 0
+        self.library = _Library(np.zeros((0, FEATURE_SIZE)), [])
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    @property
+    def names(self):
+        return self.library.names
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"Не удалось прочитать образцы поз {self.path}: {e}")
+            return False
+        templates = [t for t in data.get('templates', [])
+                     if len(t.get('vector', ())) == FEATURE_SIZE]
+        with self._lock:
+            self.library = _Library([t['vector'] for t in templates],
+                                    [t['name'] for t in templates])
+            self.version += 1
+        print(f"Образцы поз: {len(templates)} ({', '.join(self.names)})")
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        library = self.library
+        # Без отступов: сотни образцов по 60 чисел
+        write_json_atomic(self.path, {
+            'version': LIBRARY_VERSION,
+            'templates': [{'name': name,
+                           'vector': [round(v, 4) for v in vector.tolist()]}
+                          for name, vector in zip(library.labels,
+                                                  library.vectors)]
+        }, indent=None)
+
+    def classify(self, landmarks, aspect=4 / 3):
+        """Номер позы для каждой руки (NO_POSE - не похожа ни на одну),
+        расстояния до ближайших образцов и имена поз, к которым относятся
+        номера: (uint8[hands], float32[hands], names)"""
+        library = self.library
+        hands = landmarks.num_hands
+        if not hands or not library.labels:
+            return (np.full(hands, NO_POSE, dtype=np.uint8),
+                    np.full(hands, np.inf, dtype=np.float32), library.names)
+        features = hand_features(landmarks, aspect)
+        # Квадраты расстояний до всех образцов сразу: (hands, образцов)
+        squared = (np.einsum('hk,hk->h', features, features)[:, None] -
+                   2 * features @ library.vectors.T + library.norms[None, :])
+        best = squared.argmin(axis=1)
+        distances = np.sqrt(np.maximum(
+            squared[np.arange(hands), best], 0) / FEATURE_SIZE)
+        poses = library.label_ids[best]
+        poses[distances > self.max_distance] = NO_POSE
+        return poses, distances, library.names
+
+    def add(self, name, vectors):
+        """Новые образцы позы (массив векторов hand_features)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, FEATURE_SIZE)
+        with self._lock:
+            library = self.library
+            if name not in library.names and len(library.names) >= NO_POSE:
+                raise ValueError(f"Не больше {NO_POSE} поз")
+            self.library = _Library(np.concatenate([library.vectors, vectors]),
+                                    library.labels + [name] * len(vectors))
+            self.version += 1
+        return len(vectors)
+
+    def record(self, name, landmarks, hand_index=0, aspect=4 / 3):
+        """Образец позы из руки кадра"""
+        features = hand_features(landmarks, aspect)
+        return self.add(name, features[hand_index:hand_index + 1])
+
+    def remove(self, name):
+        """Удаляем все образцы позы; сколько удалено"""
+        with self._lock:
+            library = self.library
+            keep = [i for i, label in enumerate(library.labels) if label != name]
+            removed = len(library.labels) - len(keep)
+            if removed:
+                self.library = _Library(library.vectors[keep],
+                                        [library.labels[i] for i in keep])
+                self.version += 1
+        return removed
+
+    def summary(self):
+        """{поза: число образцов}"""
+        labels = self.library.labels
+        return {name: labels.count(name) for name in self.names}
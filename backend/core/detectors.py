@@ -0,0 +1,238 @@
+# core/detectors.py - Детекция рук: полный кадр или уменьшенный кадр с ROI
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from .landmarks import LandmarkFrame
+from .metrics import NULL_TIMER
+
+
+class HandDetector(ABC):
+    """Кадр BGR -> LandmarkFrame в нормализованных координатах всего кадра.
+    timestamp - время захвата кадра (нужно детекторам с состоянием)."""
+
+    @abstractmethod
+    def detect(self, frame, timer=NULL_TIMER, timestamp=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class SolutionsHandDetector(HandDetector):
+    """mediapipe.solutions.hands на полном кадре"""
+
+    def __init__(self, hands):
+        self.hands = hands
+
+    def detect(self, frame, timer=NULL_TIMER, timestamp=None):
+        # Конвертация цвета для MediaPipe
+        with timer.stage('bgr2rgb'):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_rgb.flags.writeable = False
+
+        # Детекция рук
+        with timer.stage('hands_process'):
+            results = self.hands.process(frame_rgb)
+        return LandmarkFrame.from_results(results)
+
+    def close(self):
+        self.hands.close()
+
+
+class RoiHandDetector(HandDetector):
+    """Инференс на уменьшенном кадре и на области вокруг руки.
+
+    Пока рук нет, MediaPipe получает весь кадр, уменьшенный до max_size
+    по большей стороне. Когда рука найдена, на следующем кадре
+    вырезается область вокруг её рамки (с запасом padding) - так рука
+    занимает больше пикселей при том же размере входа. Landmarks
+    пересчитываются обратно в координаты всего кадра, поэтому остальной
+    код ничего не замечает. Потеряли руку в области - сразу повторяем
+    детекцию на всём кадре.
+
+    Область не двигается, пока рамка руки остаётся внутри неё с запасом
+    margin: встроенный трекинг MediaPipe видит стабильную картинку.
+
+    Вне области новые руки не видны: пока рук меньше max_hands, раз в
+    rescan_every кадров детекция идёт на всём кадре.
+    """
+
+    def __init__(self, hands, max_size=320, track=True, padding=0.5,
+                 margin=0.1, min_roi=0.25, max_hands=1, rescan_every=10):
+        self.hands = hands
+        self.max_size = max_size  # 0 - без уменьшения
+        self.track = track  # False - только уменьшение, без области
+        self.padding = padding  # запас вокруг рамки руки, доля её размера
+        self.margin = margin  # зона у края области, доля размера области
+        self.min_roi = min_roi  # минимальная область, доля меньшей стороны
+        self.max_hands = max_hands
+        self.rescan_every = rescan_every  # 0 - без повторного поиска
+        self.roi = None  # (x0, y0, x1, y1) в пикселях или None - весь кадр
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.rescans = 0
+        self._tracked = 0  # рук на прошлом кадре
+        self._since_full = 0  # кадров в области с последнего полного
+
+    def detect(self, frame, timer=NULL_TIMER, timestamp=None):
+        height, width = frame.shape[:2]
+        full = (0, 0, width, height)
+        landmarks = None
+        if (self.roi is not None and self.rescan_every and
+                self._tracked < self.max_hands and
+                self._since_full >= self.rescan_every):
+            # Не появилась ли рука вне области
+            landmarks = self._detect_region(frame, full, timer)
+            self.full_frames += 1
+            self.rescans += 1
+            self._since_full = 0
+            if landmarks.num_hands < self._tracked:
+                landmarks = None  # на всём кадре рука мельче - не нашлась
+        if landmarks is None and self.roi is not None:
+            landmarks = self._detect_region(frame, self.roi, timer)
+            self.roi_frames += 1
+            self._since_full += 1
+            if not landmarks.num_hands:
+                # Рука ушла из области - ищем на всём кадре
+                self.roi = None
+        if landmarks is None or not landmarks.num_hands:
+            landmarks = self._detect_region(frame, full, timer)
+            self.full_frames += 1
+            self._since_full = 0
+
+        self._tracked = landmarks.num_hands
+        self.roi = self._next_roi(landmarks, width, height)
+        return landmarks
+
+    def _detect_region(self, frame, roi, timer):
+        x0, y0, x1, y1 = roi
+        region = frame[y0:y1, x0:x1]
+        region_width, region_height = x1 - x0, y1 - y0
+
+        # Уменьшаем до конвертации цвета: меньше работы и копирования.
+        # INTER_LINEAR на порядок дешевле INTER_AREA, детектору хватает
+        longest = max(region_width, region_height)
+        if self.max_size and longest > self.max_size:
+            scale = self.max_size / longest
+            with timer.stage('resize'):
+                region = cv2.resize(region, None, fx=scale, fy=scale,
+                                     interpolation=cv2.INTER_LINEAR)
+
+        with timer.stage('bgr2rgb'):
+            region_rgb = cv2.cvtColor(region, cv2.COLOR_BGR2RGB)
+        region_rgb.flags.writeable = False
+
+        with timer.stage('hands_process'):
+            results = self.hands.process(region_rgb)
+        landmarks = LandmarkFrame.from_results(results)
+        if not landmarks.num_hands:
+            return landmarks
+
+        # Обратно в нормализованные координаты всего кадра
+        height, width = frame.shape[:2]
+        points = landmarks.points
+        points[..., 0] = (x0 + points[..., 0] * region_width) / width
+        points[..., 1] = (y0 + points[..., 1] * region_height) / height
+        # z MediaPipe - в тех же единицах, что x
+        points[..., 2] *= region_width / width
+        # Исходные объекты в координатах области - рисуем из массива
+        landmarks.raw = []
+        return landmarks
+
+    def _next_roi(self, landmarks, width, height):
+        """Область для следующего кадра по рамке всех рук"""
+        if not self.track or not landmarks.num_hands:
+            return None
+        xy = landmarks.points[..., :2].reshape(-1, 2) * (width, height)
+        left, top = xy.min(axis=0)
+        right, bottom = xy.max(axis=0)
+
+        # Рамка внутри текущей области с запасом - область не трогаем
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset_x = (x1 - x0) * self.margin
+            inset_y = (y1 - y0) * self.margin
+            if (left >= x0 + inset_x and right <= x1 - inset_x and
+                    top >= y0 + inset_y and bottom <= y1 - inset_y):
+                return self.roi
+
+        # Квадрат вокруг рамки: MediaPipe лучше работает с пропорциями руки
+        size = max(right - left, bottom - top) * (1 + 2 * self.padding)
+        size = max(size, self.min_roi * min(width, height))
+        if size >= min(width, height):
+            return None  # рука почти во весь кадр - обрезать нечего
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        x0 = int(np.clip(center_x - size / 2, 0, width - size))
+        y0 = int(np.clip(center_y - size / 2, 0, height - size))
+        return x0, y0, x0 + int(size), y0 + int(size)
+
+    def close(self):
+        self.hands.close()
+
+
+def create_detector(hands, infer_size=0, roi=False, padding=0.5, max_hands=1):
+    """Детектор по настройкам: без уменьшения и ROI - прежний путь.
+    max_hands - сколько рук ищет hands (для повторного поиска вне ROI)"""
+    if not infer_size and not roi:
+        return SolutionsHandDetector(hands)
+    return RoiHandDetector(hands, max_size=infer_size, track=roi,
+                           padding=padding, max_hands=max_hands)
+
+
+# Открытая ладонь правой руки: смещения точек от запястья в размерах руки
+# (пальцы вверх, порядок точек MediaPipe)
+FAKE_HAND = np.array([
+    (0.0, 0.0),
+    (-0.25, -0.1), (-0.4, -0.25), (-0.5, -0.4), (-0.58, -0.52),
+    (-0.18, -0.55), (-0.2, -0.78), (-0.21, -0.92), (-0.22, -1.05),
+    (0.0, -0.58), (0.0, -0.83), (0.0, -0.98), (0.0, -1.12),
+    (0.17, -0.54), (0.19, -0.76), (0.2, -0.9), (0.21, -1.01),
+    (0.32, -0.46), (0.36, -0.62), (0.38, -0.73), (0.4, -0.84),
+], dtype=np.float32)
+
+
+class FakeHandDetector(HandDetector):
+    """Детерминированные landmarks без MediaPipe - для GESTURE_TEST_MODE.
+
+    Рука ходит по кругу, раз в period кадров сводит большой и указательный
+    (клик). Landmarks зависят только от номера кадра, поэтому прогоны
+    повторяемы. delay - имитация времени инференса, с.
+    """
+
+    def __init__(self, num_hands=1, period=60, size=0.2, delay=0.0):
+        self.num_hands = num_hands
+        self.period = period
+        self.size = size
+        self.delay = delay
+        self.frame_index = 0
+
+    def detect(self, frame, timer=NULL_TIMER, timestamp=None):
+        with timer.stage('hands_process'):
+            if self.delay:
+                time.sleep(self.delay)
+            landmarks = self._landmarks(self.frame_index)
+        self.frame_index += 1
+        return landmarks
+
+    def _landmarks(self, index):
+        phase = 2 * np.pi * (index % self.period) / self.period
+        offsets = FAKE_HAND.copy()
+        # Щипок в последней четверти периода: указательный к большому
+        if index % self.period >= self.period * 3 // 4:
+            offsets[7:9] = offsets[4] + (0.05, -0.05)
+
+        points = np.zeros((self.num_hands, len(offsets), 3), dtype=np.float32)
+        for hand in range(self.num_hands):
+            # Вторая рука - левая: зеркально и левее первой
+            mirror = (1 - 2 * hand, 1)
+            wrist = (0.5 + 0.2 * np.cos(phase) - 0.3 * hand,
+                     0.7 + 0.1 * np.sin(phase))
+            points[hand, :, :2] = wrist + offsets * mirror * self.size
+            # Глубина как у MediaPipe: от запястья, кончики пальцев ближе
+            points[hand, :, 2] = offsets[:, 1] * self.size * 0.3
+        handedness = ['Right', 'Left'][:self.num_hands]
+        return LandmarkFrame(points, handedness,
+                             np.full(self.num_hands, 0.99))
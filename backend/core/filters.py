@@ -0,0 +1,185 @@
+# core/filters.py - Фильтрация и предсказание landmarks между детекциями
+import math
+import time
+
+import numpy as np
+
+from .detectors import HandDetector
+from .landmarks import LandmarkFrame
+from .metrics import NULL_TIMER
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One Euro фильтр (Casiez и др., 2012) для вектора значений.
+
+    На медленных движениях сильно сглаживает (частота среза min_cutoff),
+    на быстрых частота среза растёт на beta * скорость - задержка почти
+    пропадает. Оценка скорости позволяет предсказывать положение между
+    измерениями (predict).
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0,
+                 max_predict=0.1):
+        self.configure(min_cutoff, beta, d_cutoff, max_predict)
+        self.reset()
+
+    def configure(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0,
+                  max_predict=0.1):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_predict = max_predict  # дальше этого не экстраполируем, с
+
+    def reset(self):
+        self.value = None
+        self.velocity = None
+        self.timestamp = None
+
+    def filter(self, value, timestamp):
+        value = np.asarray(value, dtype=np.float64)
+        if self.value is None or self.value.shape != value.shape:
+            self.value = value.copy()
+            self.velocity = np.zeros_like(value)
+            self.timestamp = timestamp
+            return self.value.copy()
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            dt = 1e-3
+        velocity = (value - self.value) / dt
+        self.velocity += _alpha(self.d_cutoff, dt) * (velocity - self.velocity)
+
+        # Частота среза своя для каждой координаты - по её скорости
+        cutoff = self.min_cutoff + self.beta * np.abs(self.velocity)
+        tau = 1.0 / (2 * np.pi * cutoff)
+        alpha = 1.0 / (1.0 + tau / dt)
+        self.value += alpha * (value - self.value)
+        self.timestamp = timestamp
+        return self.value.copy()
+
+    def predict(self, timestamp):
+        """Положение в момент timestamp по последней оценке скорости"""
+        if self.value is None:
+            return None
+        ahead = min(max(timestamp - self.timestamp, 0.0), self.max_predict)
+        return self.value + self.velocity * ahead
+
+
+class LandmarkFilter:
+    """One Euro для всех точек каждой руки (по ключу handedness)"""
+
+    def __init__(self, min_cutoff=1.5, beta=10.0, d_cutoff=1.0,
+                 max_predict=0.1, max_age=0.5):
+        self.options = dict(min_cutoff=min_cutoff, beta=beta,
+                            d_cutoff=d_cutoff, max_predict=max_predict)
+        self.max_age = max_age  # без детекции дольше - рук больше нет
+        self.filters = {}
+        self.last = LandmarkFrame.empty()
+        self.last_timestamp = None
+
+    def configure(self, min_cutoff=1.5, beta=10.0, d_cutoff=1.0,
+                  max_predict=0.1):
+        self.options = dict(min_cutoff=min_cutoff, beta=beta,
+                            d_cutoff=d_cutoff, max_predict=max_predict)
+        for one_euro in self.filters.values():
+            one_euro.configure(**self.options)
+
+    def update(self, landmarks, timestamp):
+        """Новая детекция -> сглаженный LandmarkFrame"""
+        keys = landmarks.hand_keys()
+        points = np.empty_like(landmarks.points)
+        for hand_index, key in enumerate(keys):
+            one_euro = self.filters.get(key)
+            if one_euro is None:
+                one_euro = self.filters[key] = OneEuroFilter(**self.options)
+            points[hand_index] = one_euro.filter(landmarks.points[hand_index],
+                                                 timestamp)
+        for key in list(self.filters):
+            if key not in keys:
+                del self.filters[key]
+
+        self.last = LandmarkFrame(points, landmarks.handedness,
+                                  landmarks.scores)
+        self.last_timestamp = timestamp
+        return self.last
+
+    def predict(self, timestamp):
+        """Руки последней детекции, сдвинутые по их скорости"""
+        if (self.last_timestamp is None or not self.last.num_hands or
+                timestamp - self.last_timestamp > self.max_age):
+            return LandmarkFrame.empty()
+        keys = self.last.hand_keys()
+        points = np.stack([self.filters[key].predict(timestamp) for key in keys])
+        return LandmarkFrame(points, self.last.handedness, self.last.scores,
+                             predicted=True)
+
+
+class PredictiveDetector(HandDetector):
+    """Инференс не на каждом кадре: раз в every кадров или с частотой hz.
+
+    На остальных кадрах landmarks предсказываются LandmarkFilter, поэтому
+    курсор и разметка обновляются с частотой камеры, а MediaPipe
+    работает в every раз реже. Найденные руки тоже проходят через
+    фильтр - он заменяет отстающее экспоненциальное сглаживание.
+    """
+
+    def __init__(self, detector, every=1, hz=0.0, landmark_filter=None):
+        self.detector = detector
+        self.every = max(1, int(every))
+        self.hz = hz
+        self.filter = landmark_filter or LandmarkFilter()
+        self.frame_index = 0
+        self.detections = 0
+        self.predictions = 0
+        self._last_detection = None
+
+    @property
+    def hands(self):
+        return self.detector.hands
+
+    def configure(self, every=1, hz=0.0):
+        self.every = max(1, int(every))
+        self.hz = hz
+
+    def apply_settings(self, settings, rate=True):
+        """Частота инференса и сглаживание из настроек (core/settings.py).
+        rate=False - частоту не трогаем (на сервере её задаёт config)."""
+        if rate:
+            self.configure(settings['inference_every'], settings['inference_hz'])
+        self.filter.configure(settings['filter_min_cutoff'],
+                              settings['filter_beta'],
+                              settings['filter_d_cutoff'],
+                              settings['predict_max'])
+
+    def _due(self, timestamp):
+        if self._last_detection is None:
+            return True
+        if self.hz:
+            return timestamp - self._last_detection >= 1.0 / self.hz
+        return self.frame_index % self.every == 0
+
+    def detect(self, frame, timer=NULL_TIMER, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        due = self._due(timestamp)
+        self.frame_index += 1
+
+        if due:
+            landmarks = self.detector.detect(frame, timer, timestamp)
+            self._last_detection = timestamp
+            self.detections += 1
+            timer.tick('detection')
+            with timer.stage('filter'):
+                return self.filter.update(landmarks, timestamp)
+
+        self.predictions += 1
+        with timer.stage('predict'):
+            return self.filter.predict(timestamp)
+
+    def close(self):
+        self.detector.close()
@@ -0,0 +1,86 @@
+# core/frame_grabber.py - Захват кадров в отдельном потоке
+import threading
+import time
+
+
+class LatestFrameGrabber:
+    """Поток захвата, который хранит только самый свежий кадр.
+
+    Камера читается непрерывно, поэтому кадры не копятся в буфере
+    драйвера. Если обработка не успевает, старые кадры заменяются
+    новыми и учитываются в frames_dropped.
+    """
+
+    def __init__(self, cap, name="frame-grabber"):
+        self.cap = cap
+        self.name = name
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.timestamp = None  # время захвата последнего прочитанного кадра
+
+        self._frame = None
+        self._frame_timestamp = None
+        self._seq = 0
+        self._read_seq = 0
+        self._failed = False
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Запуск потока захвата"""
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._loop, name=self.name,
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while self._running:
+            success, frame = self.cap.read()
+            timestamp = time.time()
+            with self._cond:
+                if not success:
+                    self._failed = True
+                    self._cond.notify_all()
+                    break
+                # Предыдущий кадр так никто и не забрал
+                if self._seq != self._read_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_timestamp = timestamp
+                self._seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=2.0):
+        """Самый свежий ещё не прочитанный кадр. Возвращает (success, frame),
+        как cv2.VideoCapture.read."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (self._seq != self._read_seq or self._failed
+                         or not self._running),
+                timeout)
+            if self._seq == self._read_seq:
+                return False, None
+            self._read_seq = self._seq
+            self.timestamp = self._frame_timestamp
+            return True, self._frame
+
+    def isOpened(self):
+        return self._running and not self._failed and self.cap.isOpened()
+
+    def stop(self):
+        """Останавливаем поток, камера остаётся открытой"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def release(self):
+        """Останавливаем поток и освобождаем камеру"""
+        self.stop()
+        self.cap.release()
@@ -0,0 +1,100 @@
+# core/frame_ring.py - Кольцевой буфер кадров и landmarks в общей памяти
+"""Раскладка multiprocessing.shared_memory (все слоты подряд):
+
+    заголовки:  на слот uint32 frame_id, uint32 число рук, float64 timestamp
+    landmarks:  на слот float32[max_hands, 2 + 21 * 3] - как в записи
+                (core/recording.py): handedness, score, x, y, z...
+    кадры:      на слот uint8[height, width, 3]
+
+Пишет один процесс (воркер камеры), читает другой (веб-сервер). Кадры
+не сериализуются: по каналу идёт только номер слота.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .landmarks import LandmarkFrame, NUM_LANDMARKS
+from .recording import HAND_FLOATS, HANDEDNESS
+
+HEADER_DTYPE = np.dtype([('frame_id', '<u4'), ('hands', '<u4'),
+                         ('timestamp', '<f8')])
+
+
+class FrameRing:
+    """slots слотов под кадр shape и до max_hands рук.
+
+    Кадр, возвращённый read(), - окно в общую память без копирования.
+    Оно действительно, пока в его слот не записан новый кадр, то есть
+    ещё slots - 1 записей.
+    """
+
+    def __init__(self, shape, slots=4, max_hands=2, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.max_hands = max_hands
+        self.owner = name is None
+
+        header_size = HEADER_DTYPE.itemsize * slots
+        landmarks_size = 4 * HAND_FLOATS * max_hands * slots
+        frame_size = int(np.prod(self.shape)) * slots
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=header_size + landmarks_size + frame_size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        buf = self.shm.buf
+        self.headers = np.ndarray((slots,), HEADER_DTYPE, buf, 0)
+        self.landmarks = np.ndarray((slots, max_hands, HAND_FLOATS), '<f4',
+                                    buf, header_size)
+        self.frames = np.ndarray((slots,) + self.shape, np.uint8, buf,
+                                 header_size + landmarks_size)
+        self.next_slot = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def describe(self):
+        """Всё, что нужно другому процессу для подключения"""
+        return self.name, self.shape, self.slots, self.max_hands
+
+    @classmethod
+    def attach(cls, name, shape, slots, max_hands):
+        return cls(shape, slots, max_hands, name=name)
+
+    def write(self, frame, landmarks, timestamp, frame_id=0):
+        """Кадр и landmarks в следующий слот; возвращает номер слота"""
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % self.slots
+
+        self.frames[slot] = frame
+        count = min(landmarks.num_hands, self.max_hands)
+        block = self.landmarks[slot]
+        block[:count, 0] = [HANDEDNESS.index(h) if h in HANDEDNESS else 1
+                            for h in landmarks.handedness[:count]]
+        block[:count, 1] = landmarks.scores[:count]
+        block[:count, 2:] = landmarks.points[:count].reshape(
+            count, NUM_LANDMARKS * 3)
+        self.headers[slot] = (frame_id & 0xFFFFFFFF, count, timestamp)
+        return slot
+
+    def read(self, slot):
+        """(frame, landmarks, timestamp) из слота. Landmarks копируются
+        (они маленькие и живут дольше слота), кадр - нет."""
+        _, count, timestamp = self.headers[slot].tolist()
+        block = self.landmarks[slot, :count].copy()
+        handedness = [HANDEDNESS[int(code)] for code in block[:, 0]]
+        landmarks = LandmarkFrame(block[:, 2:], handedness, block[:, 1])
+        return self.frames[slot], landmarks, timestamp
+
+    def close(self):
+        """Отключаемся от памяти; владелец её ещё и удаляет"""
+        self.headers = self.landmarks = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Кадр ещё у кого-то в руках - память освободит сборщик мусора
+            pass
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,256 @@
+# core/gestures.py - Распознавание жестов как конечный автомат с гистерезисом
+from .landmarks import (WRIST, THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP,
+                        PINKY_TIP)
+
+# События (генерируются только на переходах)
+CLICK = "click"
+DOUBLE_CLICK = "double_click"
+DRAG_START = "drag_start"
+DRAG_MOVE = "drag_move"
+DRAG_END = "drag_end"
+
+# Текущее состояние для интерфейса (поле current-gesture)
+STATE_NONE = "No gesture"
+STATE_MOVING = "Moving"
+STATE_CLICK = "Click"
+STATE_DOUBLE_CLICK = "Double click"
+STATE_DRAG = "Drag"
+STATES = (STATE_NONE, STATE_MOVING, STATE_CLICK, STATE_DOUBLE_CLICK,
+          STATE_DRAG)
+
+# Пары точек для жестов: все расстояния считаются одним вызовом
+GESTURE_PAIRS = [
+    (THUMB_TIP, INDEX_TIP),  # клик
+    (PINKY_TIP, RING_TIP),  # двойной клик
+    (INDEX_TIP, WRIST),  # кулак
+    (MIDDLE_TIP, WRIST),
+    (RING_TIP, WRIST),
+    (PINKY_TIP, WRIST),
+]
+
+# Настройки по умолчанию (те же ключи, что в cursor_settings.json)
+DEFAULT_SETTINGS = {
+    'click_threshold': 0.045,
+    'click_release_threshold': 0.06,
+    'click_min_hold': 0.03,
+    'click_refractory': 0.25,
+    'double_click_threshold': 0.035,
+    'double_click_release_threshold': 0.05,
+    'double_click_min_hold': 0.05,
+    'double_click_refractory': 0.5,
+    'fist_threshold': 0.12,
+    'fist_release_threshold': 0.15,
+    'fist_min_hold': 0.1,
+    'drag_delay': 0.3,
+    'enable_double_click': True,
+    'enable_drag': True,
+    'enable_click': True
+}
+
+
+class GestureEvent:
+    """Дискретное событие жеста"""
+
+    def __init__(self, kind, timestamp, x=None, y=None):
+        self.kind = kind
+        self.timestamp = timestamp
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return f"GestureEvent({self.kind!r}, {self.timestamp:.3f})"
+
+
+class HysteresisTrigger:
+    """Порог с гистерезисом для расстояния (меньше - жест сделан).
+
+    Включается, когда значение продержалось ниже enter не меньше min_hold
+    секунд и прошло refractory секунд с прошлого выключения. Выключается,
+    когда значение продержалось выше exit не меньше release_hold секунд.
+    """
+
+    def __init__(self, enter, exit, min_hold=0.0, release_hold=0.0,
+                 refractory=0.0):
+        self.configure(enter, exit, min_hold, release_hold, refractory)
+        self.active = False
+        self._since = None  # начало кандидата на переход
+        self._released_at = None
+
+    def configure(self, enter, exit, min_hold=0.0, release_hold=0.0,
+                  refractory=0.0):
+        self.enter = enter
+        self.exit = max(exit, enter)
+        self.min_hold = min_hold
+        self.release_hold = release_hold
+        self.refractory = refractory
+
+    def reset(self):
+        self.active = False
+        self._since = None
+
+    def update(self, value, timestamp):
+        """True - включился, False - выключился, None - без изменений"""
+        if not self.active:
+            if value >= self.enter:
+                self._since = None
+                return None
+            if (self._released_at is not None and
+                    timestamp - self._released_at < self.refractory):
+                return None
+            if self._since is None:
+                self._since = timestamp
+            if timestamp - self._since >= self.min_hold:
+                self.active = True
+                self._since = None
+                return True
+            return None
+
+        if value <= self.exit:
+            self._since = None
+            return None
+        if self._since is None:
+            self._since = timestamp
+        if timestamp - self._since >= self.release_hold:
+            self.active = False
+            self._since = None
+            self._released_at = timestamp
+            return False
+        return None
+
+
+class GestureEngine:
+    """Жесты одной руки: клик (щипок большого и указательного), двойной
+    клик (мизинец к безымянному), перетаскивание (кулак).
+
+    В отличие от проверки порогов на каждом кадре, события выдаются только
+    при смене состояния, поэтому удерживаемый щипок даёт один клик.
+    """
+
+    def __init__(self, settings=None):
+        self.click = HysteresisTrigger(0, 0)
+        self.double_click = HysteresisTrigger(0, 0)
+        self.drag = HysteresisTrigger(0, 0)
+        self.configure(settings or {})
+        self.hand_present = False
+
+    def configure(self, settings):
+        """Применяем настройки (можно менять на ходу)"""
+        values = dict(DEFAULT_SETTINGS)
+        values.update({k: v for k, v in settings.items() if k in values})
+        self.settings = values
+        self.click.configure(values['click_threshold'],
+                             values['click_release_threshold'],
+                             min_hold=values['click_min_hold'],
+                             refractory=values['click_refractory'])
+        self.double_click.configure(values['double_click_threshold'],
+                                    values['double_click_release_threshold'],
+                                    min_hold=values['double_click_min_hold'],
+                                    refractory=values['double_click_refractory'])
+        self.drag.configure(values['fist_threshold'],
+                            values['fist_release_threshold'],
+                            min_hold=values['fist_min_hold'],
+                            release_hold=values['drag_delay'])
+
+    @property
+    def dragging(self):
+        return self.drag.active
+
+    @property
+    def state(self):
+        """Текущий жест для интерфейса"""
+        if self.drag.active:
+            return STATE_DRAG
+        if self.click.active:
+            return STATE_CLICK
+        if self.double_click.active:
+            return STATE_DOUBLE_CLICK
+        return STATE_MOVING if self.hand_present else STATE_NONE
+
+    def update(self, landmarks, hand_index, timestamp, position=None,
+               distances=None):
+        """Новый кадр руки. distances - готовые расстояния GESTURE_PAIRS
+        для этой руки (если уже посчитаны). Возвращает список событий."""
+        if distances is None:
+            distances = landmarks.distances(GESTURE_PAIRS)[hand_index].tolist()
+        return self.update_distances(distances, timestamp, position)
+
+    def update_distances(self, distances, timestamp, position=None):
+        thumb_index_dist, pinky_ring_dist = distances[:2]
+        fist_dist = max(distances[2:])
+        x, y = position if position is not None else (None, None)
+        settings = self.settings
+        events = []
+        self.hand_present = True
+
+        # Пока тянем, щипки не проверяем
+        if self.drag.active:
+            if self.drag.update(fist_dist, timestamp) is False:
+                events.append(GestureEvent(DRAG_END, timestamp, x, y))
+            else:
+                events.append(GestureEvent(DRAG_MOVE, timestamp, x, y))
+            return events
+
+        if settings['enable_click']:
+            if self.click.update(thumb_index_dist, timestamp):
+                events.append(GestureEvent(CLICK, timestamp, x, y))
+        if self.click.active:
+            self.double_click.reset()
+            self.drag.reset()
+            return events
+
+        if settings['enable_double_click']:
+            if self.double_click.update(pinky_ring_dist, timestamp):
+                events.append(GestureEvent(DOUBLE_CLICK, timestamp, x, y))
+        if self.double_click.active:
+            self.drag.reset()
+            return events
+
+        if settings['enable_drag']:
+            if self.drag.update(fist_dist, timestamp):
+                events.append(GestureEvent(DRAG_START, timestamp, x, y))
+        return events
+
+    def lost(self, timestamp):
+        """Рука пропала из кадра: отпускаем всё, что было зажато"""
+        events = []
+        if self.drag.active:
+            events.append(GestureEvent(DRAG_END, timestamp))
+        self.click.reset()
+        self.double_click.reset()
+        self.drag.reset()
+        self.hand_present = False
+        return events
+
+
+class MultiHandGestures:
+    """Отдельный автомат на каждую руку кадра (по handedness)"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+        self.engines = {}
+
+    def configure(self, settings):
+        self.settings = settings
+        for engine in self.engines.values():
+            engine.configure(settings)
+
+    def update(self, landmarks, timestamp):
+        """Состояния жестов для всех рук кадра и события по ним:
+        (states, [(hand_index, event), ...])"""
+        states, events = [], []
+        keys = landmarks.hand_keys()
+        distances = landmarks.distances(GESTURE_PAIRS).tolist()
+        for hand_index, key in enumerate(keys):
+            engine = self.engines.get(key)
+            if engine is None:
+                engine = self.engines[key] = GestureEngine(self.settings)
+            for event in engine.update_distances(distances[hand_index],
+                                                 timestamp):
+                events.append((hand_index, event))
+            states.append(engine.state)
+
+        # Руки, которые пропали
+        for key in list(self.engines):
+            if key not in keys:
+                self.engines.pop(key).lost(timestamp)
+        return states, events
@@ -0,0 +1,66 @@
+# core/hands.py - Создание и прогрев MediaPipe Hands по требованию
+"""mediapipe импортируется около секунды, а первый process() заметно
+дольше следующих. Поэтому Hands строится только когда он нужен, с
+max_num_hands конкретного приложения, и в фоновом потоке - пока
+открывается камера."""
+import threading
+import time
+
+import numpy as np
+
+
+def preload():
+    """Импорт mediapipe заранее (например, пока пользователь в меню)"""
+    import mediapipe
+
+
+def create_hands(max_num_hands=2, model_complexity=1, min_confidence=0.7):
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_num_hands,
+        model_complexity=model_complexity,
+        min_detection_confidence=min_confidence,
+        min_tracking_confidence=min_confidence
+    )
+
+
+def warm_up(hands, width=640, height=480):
+    """Один пустой кадр: граф и модели инициализируются до первого
+    настоящего кадра"""
+    hands.process(np.zeros((height, width, 3), dtype=np.uint8))
+
+
+class HandsLoader:
+    """Строит и прогревает Hands в фоновом потоке; get() дожидается"""
+
+    def __init__(self, max_num_hands=2, **options):
+        self.max_num_hands = max_num_hands
+        self.options = options
+        self.hands = None
+        self.error = None
+        self.elapsed = None
+        self._thread = threading.Thread(target=self._load, name="hands-loader",
+                                        daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            self.hands = create_hands(self.max_num_hands, **self.options)
+            warm_up(self.hands)
+        except Exception as e:
+            self.error = e
+        self.elapsed = time.perf_counter() - started
+
+    def get(self):
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.hands
+
+    def close(self):
+        self._thread.join()
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None
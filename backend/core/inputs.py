@@ -0,0 +1,53 @@
+# core/inputs.py - Источники кадров с landmarks для приложений и сервера
+import cv2
+
+from .metrics import NULL_TIMER
+
+
+class CameraInput:
+    """Кадры с камеры (или другого FrameSource) и детекция рук
+    (HandDetector из core/detectors.py).
+
+    read() возвращает (frame, landmarks, timestamp) или (None, None, None),
+    если кадров больше нет. Тот же интерфейс у ReplaySource
+    (core/recording.py), поэтому запись можно подставить вместо камеры.
+    """
+
+    def __init__(self, frames, detector, mirror=False, owns_detector=False,
+                 timer=NULL_TIMER):
+        # LatestFrameGrabber или FrameSource.start(): read() и timestamp
+        self.frames = frames
+        self.detector = detector
+        self.mirror = mirror
+        self.owns_detector = owns_detector
+        self.timer = timer
+
+    def read(self):
+        success, frame = self.frames.read()
+        if not success:
+            return None, None, None
+        timestamp = self.frames.timestamp
+
+        # Зеркальное отображение для естественного восприятия
+        if self.mirror:
+            with self.timer.stage('flip'):
+                frame = cv2.flip(frame, 1)
+
+        # Детекция рук, landmarks в координатах всего кадра
+        return (frame, self.detector.detect(frame, self.timer, timestamp),
+                timestamp)
+
+    def configure(self, settings):
+        """Живые настройки: сглаживание landmarks, если детектор умеет"""
+        apply_settings = getattr(self.detector, 'apply_settings', None)
+        if apply_settings is not None:
+            apply_settings(settings, rate=False)
+
+    def isOpened(self):
+        return self.frames.isOpened()
+
+    def close(self):
+        """Останавливаем захват; детектор закрываем, только если он наш"""
+        self.frames.release()
+        if self.owns_detector:
+            self.detector.close()
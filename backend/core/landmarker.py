@@ -0,0 +1,192 @@
+# core/landmarker.py - Детектор на MediaPipe Tasks HandLandmarker
+"""Второй движок детекции рядом с mp.solutions.hands (core/detectors.py).
+
+    solutions   - Hands.process: вызывающий ждёт весь инференс
+    video       - HandLandmarker.detect_for_video: тоже синхронно, но с
+                  метками времени кадров (трекинг между кадрами по времени)
+    live_stream - HandLandmarker.detect_async: кадр уходит в граф MediaPipe
+                  и detect() сразу возвращается, результат приходит в
+                  callback из потока MediaPipe. Захват и инференс идут
+                  параллельно. В обработке держим не больше
+                  max_in_flight кадров, остальные не отправляем. Ответ
+                  на каждый кадр граф не обещает (FlowLimiter может
+                  кадр выбросить): кадр без ответа дольше result_timeout
+                  считается потерянным (счётчик landmarker_lost).
+
+В live_stream detect() отдаёт последний готовый результат - он найден
+на одном из предыдущих кадров. Время захвата этого кадра - в
+LandmarkFrame.timestamp, разница с текущим кадром - стадия landmark_age.
+
+Модель hand_landmarker.task в пакет mediapipe не входит, её скачивают
+отдельно (GESTURE_TASK_MODEL / --task-model).
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .detectors import HandDetector
+from .landmarks import NUM_LANDMARKS, LandmarkFrame
+from .metrics import NULL_TIMER
+
+ENGINE_SOLUTIONS = "solutions"
+ENGINE_VIDEO = "video"
+ENGINE_LIVE_STREAM = "live_stream"
+ENGINES = (ENGINE_SOLUTIONS, ENGINE_VIDEO, ENGINE_LIVE_STREAM)
+
+DEFAULT_MODEL = "hand_landmarker.task"
+
+
+def parse_engine(value):
+    """Движок из настроек; неизвестный - ValueError"""
+    engine = (value or ENGINE_SOLUTIONS).strip().lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный движок детекции: {value} "
+                         f"(возможные: {', '.join(ENGINES)})")
+    return engine
+
+
+def _to_landmark_frame(result, timestamp=None):
+    """HandLandmarkerResult -> LandmarkFrame"""
+    if not result.hand_landmarks:
+        return LandmarkFrame(np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32),
+                             timestamp=timestamp)
+    points = np.array([[(lm.x, lm.y, lm.z) for lm in hand]
+                       for hand in result.hand_landmarks], dtype=np.float32)
+    handedness = [hand[0].category_name for hand in result.handedness]
+    scores = [hand[0].score for hand in result.handedness]
+    if len(handedness) != len(points):
+        handedness, scores = None, None
+    return LandmarkFrame(points, handedness, scores, timestamp=timestamp)
+
+
+class TasksHandDetector(HandDetector):
+    """HandLandmarker в режиме VIDEO или LIVE_STREAM (см. модуль)"""
+
+    def __init__(self, model_path=DEFAULT_MODEL, mode=ENGINE_LIVE_STREAM,
+                 num_hands=2, min_confidence=0.7, max_size=0,
+                 max_in_flight=1, result_timeout=1.0):
+        from mediapipe.tasks.python import BaseOptions, vision
+
+        if mode not in (ENGINE_VIDEO, ENGINE_LIVE_STREAM):
+            raise ValueError(f"HandLandmarker не поддерживает режим {mode}")
+        self.mode = mode
+        self.max_size = max_size  # 0 - без уменьшения
+        self.live = mode == ENGINE_LIVE_STREAM
+        self.max_in_flight = max_in_flight
+        self.result_timeout = result_timeout  # с, дольше ответа не ждём
+        self.submitted = 0
+        self.skipped = 0
+        self.completed = 0
+        self.lost = 0
+        self._last_ms = -1
+        self._pending = {}  # метка кадра, мс -> (время захвата, отправки)
+        self._latest = LandmarkFrame.empty()
+        self._lock = threading.Lock()
+        self._timer = NULL_TIMER
+
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=(vision.RunningMode.LIVE_STREAM if self.live
+                          else vision.RunningMode.VIDEO),
+            num_hands=num_hands,
+            min_hand_detection_confidence=min_confidence,
+            min_hand_presence_confidence=min_confidence,
+            min_tracking_confidence=min_confidence,
+            result_callback=self._on_result if self.live else None)
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+    def _timestamp_ms(self, timestamp):
+        """Метки времени для MediaPipe должны строго расти"""
+        timestamp_ms = int((timestamp if timestamp is not None
+                            else time.time()) * 1000)
+        if timestamp_ms <= self._last_ms:
+            timestamp_ms = self._last_ms + 1
+        self._last_ms = timestamp_ms
+        return timestamp_ms
+
+    def _image(self, frame, timer):
+        import mediapipe as mp
+
+        longest = max(frame.shape[:2])
+        if self.max_size and longest > self.max_size:
+            scale = self.max_size / longest
+            with timer.stage('resize'):
+                frame = cv2.resize(frame, None, fx=scale, fy=scale,
+                                   interpolation=cv2.INTER_LINEAR)
+        with timer.stage('bgr2rgb'):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+
+    def detect(self, frame, timer=NULL_TIMER, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if not self.live:
+            image = self._image(frame, timer)
+            self.submitted += 1
+            with timer.stage('hands_process'):
+                result = self.landmarker.detect_for_video(
+                    image, self._timestamp_ms(timestamp))
+            self.completed += 1
+            return _to_landmark_frame(result, timestamp)
+
+        self._timer = timer
+        with self._lock:
+            # Без ответа граф не освободится сам - не ждём его вечно
+            expired = time.perf_counter() - self.result_timeout
+            lost = [key for key, (_, submitted) in self._pending.items()
+                    if submitted < expired]
+            for key in lost:
+                del self._pending[key]
+            self.lost += len(lost)
+            busy = len(self._pending) >= self.max_in_flight
+        if lost:
+            timer.count('landmarker_lost', len(lost))
+        if busy:
+            # Граф не успевает - кадр не отправляем, очередь не растёт
+            self.skipped += 1
+            timer.count('landmarker_skipped')
+        else:
+            # Кадр - в граф, ответ придёт в _on_result
+            image = self._image(frame, timer)
+            timestamp_ms = self._timestamp_ms(timestamp)
+            self.submitted += 1
+            with self._lock:
+                self._pending[timestamp_ms] = (timestamp, time.perf_counter())
+            with timer.stage('hands_submit'):
+                self.landmarker.detect_async(image, timestamp_ms)
+
+        with self._lock:
+            latest = self._latest
+        if latest.timestamp is not None:
+            timer.add('landmark_age', max(0.0, timestamp - latest.timestamp))
+        return latest
+
+    def _on_result(self, result, image, timestamp_ms):
+        """Callback из потока MediaPipe"""
+        with self._lock:
+            # Кадры, пропущенные графом, ответа не получат
+            for stale in [key for key in self._pending if key < timestamp_ms]:
+                del self._pending[stale]
+            timestamp, submitted = self._pending.pop(
+                timestamp_ms, (timestamp_ms / 1000.0, None))
+            self._latest = _to_landmark_frame(result, timestamp)
+            self.completed += 1
+        if submitted is not None:
+            self._timer.add('hands_process', time.perf_counter() - submitted)
+        self._timer.tick('landmarker_results')
+
+    def close(self):
+        self.landmarker.close()
+
+
+def create_tasks_detector(engine, model_path=None, num_hands=2,
+                          min_confidence=0.7, infer_size=0):
+    """Детектор HandLandmarker для движка video или live_stream"""
+    detector = TasksHandDetector(model_path or DEFAULT_MODEL, mode=engine,
+                                 num_hands=num_hands,
+                                 min_confidence=min_confidence,
+                                 max_size=infer_size)
+    print(f"HandLandmarker: {engine}, модель {model_path or DEFAULT_MODEL}")
+    return detector
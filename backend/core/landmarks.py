@@ -0,0 +1,115 @@
+# core/landmarks.py - Векторизованное представление landmarks одного кадра
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# Индексы точек руки MediaPipe
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+MIDDLE_MCP = 9
+MIDDLE_TIP = 12
+RING_TIP = 16
+PINKY_TIP = 20
+FINGERTIPS = (THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP)
+
+
+class LandmarkFrame:
+    """Все руки одного кадра в одном массиве.
+
+    points - float32 (hands, 21, 3) с нормализованными x, y, z,
+    handedness - 'Left'/'Right' для каждой руки, scores - уверенность.
+    Строится один раз на кадр; приложения и сервер работают только с ним.
+    """
+
+    def __init__(self, points, handedness=None, scores=None, raw=None,
+                 predicted=False, timestamp=None):
+        self.points = np.ascontiguousarray(points, dtype=np.float32).reshape(
+            -1, NUM_LANDMARKS, 3)
+        count = len(self.points)
+        self.handedness = list(handedness) if handedness else ['Right'] * count
+        self.scores = (np.asarray(scores, dtype=np.float32) if scores is not None
+                       else np.ones(count, dtype=np.float32))
+        # Исходные объекты MediaPipe (нужны только mp_drawing)
+        self.raw = raw or []
+        # Landmarks предсказаны фильтром, а не найдены на этом кадре
+        self.predicted = predicted
+        # Время захвата кадра, на котором найдены landmarks, если это не
+        # текущий кадр (асинхронный HandLandmarker, core/landmarker.py)
+        self.timestamp = timestamp
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32))
+
+    @classmethod
+    def from_results(cls, results):
+        """Из результата Hands.process"""
+        hands = results.multi_hand_landmarks
+        if not hands:
+            return cls.empty()
+
+        points = np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark]
+                           for hand in hands], dtype=np.float32)
+        handedness, scores = [], []
+        for classification in (results.multi_handedness or []):
+            category = classification.classification[0]
+            handedness.append(category.label)
+            scores.append(category.score)
+        if len(handedness) != len(points):
+            handedness, scores = None, None
+        return cls(points, handedness, scores, raw=list(hands))
+
+    def landmark_list(self, hand_index):
+        """Рука в формате MediaPipe (для mp_drawing); для записей без
+        исходных объектов собирается из массива"""
+        if hand_index < len(self.raw):
+            return self.raw[hand_index]
+        from mediapipe.framework.formats import landmark_pb2
+        return landmark_pb2.NormalizedLandmarkList(landmark=[
+            landmark_pb2.NormalizedLandmark(x=x, y=y, z=z)
+            for x, y, z in self.points[hand_index].tolist()])
+
+    def hand_keys(self):
+        """Ключи рук для сопоставления между кадрами: 'Left', 'Right',
+        при совпадении - с номером"""
+        keys = []
+        for index, label in enumerate(self.handedness):
+            keys.append(label if label not in keys else f"{label}-{index}")
+        return keys
+
+    @property
+    def num_hands(self):
+        return len(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    def to_pixels(self, width, height):
+        """Координаты в пикселях: int32 (hands, 21, 2)"""
+        scale = np.array([width, height], dtype=np.float32)
+        return (self.points[..., :2] * scale).astype(np.int32)
+
+    def distances(self, pairs):
+        """Расстояния (x, y) между парами точек: (hands, len(pairs))"""
+        pairs = np.asarray(pairs)
+        xy = self.points[..., :2]
+        diff = xy[:, pairs[:, 0]] - xy[:, pairs[:, 1]]
+        return np.sqrt(np.einsum('hpk,hpk->hp', diff, diff))
+
+    def fingertip_distances(self):
+        """Попарные расстояния между кончиками пальцев: (hands, 5, 5)"""
+        tips = self.points[:, FINGERTIPS, :2]
+        diff = tips[:, :, None, :] - tips[:, None, :, :]
+        return np.sqrt(np.einsum('hijk,hijk->hij', diff, diff))
+
+    def hand_size(self):
+        """Размер руки - расстояние от запястья до основания среднего пальца"""
+        return self.distances([(WRIST, MIDDLE_MCP)])[:, 0]
+
+    def normalized(self):
+        """Точки относительно запястья в единицах размера руки:
+        признаки, не зависящие от положения и удалённости руки"""
+        centered = self.points - self.points[:, WRIST:WRIST + 1]
+        size = np.maximum(self.hand_size(), 1e-6)
+        return centered / size[:, None, None]
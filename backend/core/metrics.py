@@ -0,0 +1,273 @@
+# core/metrics.py - Замеры времени по стадиям конвейера
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+# Границы корзин гистограммы задержек, мс: от 0.05 мс до ~10 с,
+# шаг 25% - погрешность перцентиля не больше шага
+BUCKETS_MS = tuple(round(0.05 * 1.25 ** i, 4) for i in range(56))
+
+
+class _Stage:
+    """with timer.stage('name'): ... - время блока в секундах"""
+
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class StageTimer:
+    """Время каждой стадии обработки кадра: flip, bgr2rgb, hands_process,
+    gestures, draw, imencode, base64, json... Стадии могут вызываться из
+    разных потоков (камера, пул отрисовки)."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.samples[name].append(seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def tick(self, name):
+        self.count(name)
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+            self.counters = defaultdict(int)
+
+    def summary(self):
+        """{стадия: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        result = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000.0
+            stats = {'count': len(ms), 'mean_ms': float(ms.mean())}
+            for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+                stats[f'p{p}_ms'] = float(value)
+            stats['max_ms'] = float(ms.max())
+            result[name] = stats
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return {'stages': self.summary(), 'counters': counters}
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами.
+
+    Добавление - O(log корзин) без хранения замеров. Перцентили
+    считаются по последним window..2*window секундам (текущее и прошлое
+    окно), счётчики count/total - за всё время.
+    """
+
+    def __init__(self, window=10.0, bounds=BUCKETS_MS):
+        self.window = window
+        self.bounds = bounds
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._current = [0] * (len(bounds) + 1)
+        self._previous = [0] * (len(bounds) + 1)
+        self._window_start = time.monotonic()
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._previous = self._current
+            self._current = [0] * (len(self.bounds) + 1)
+            self._window_start = now
+        self._current[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        counts = [a + b for a, b in zip(self._current, self._previous)]
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = total * p / 100.0
+        seen = 0
+        for index, value in enumerate(counts):
+            seen += value
+            if seen >= rank:
+                # Верхняя граница корзины, но не больше максимума
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.max)
+                return self.max
+        return self.max
+
+    def snapshot(self):
+        stats = {'count': self.count,
+                 'mean_ms': self.total / self.count if self.count else 0.0}
+        for p in PERCENTILES:
+            stats[f'p{p}_ms'] = self.percentile(p)
+        stats['max_ms'] = self.max
+        return stats
+
+
+class RateMeter:
+    """Частота событий (кадров в секунду) со сглаживанием"""
+
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing
+        self.count = 0
+        self._last = None
+        self._interval = None
+
+    def tick(self, timestamp=None):
+        now = time.monotonic() if timestamp is None else timestamp
+        if self._last is not None:
+            interval = now - self._last
+            if self._interval is None:
+                self._interval = interval
+            else:
+                self._interval += self.smoothing * (interval - self._interval)
+        self._last = now
+        self.count += 1
+
+    @property
+    def rate(self):
+        # Давно не было событий - частота падает, а не замирает
+        if self._interval is None:
+            return 0.0
+        idle = time.monotonic() - self._last
+        interval = max(self._interval, idle)
+        return 1.0 / interval if interval > 0 else 0.0
+
+
+class PipelineMetrics:
+    """Живые метрики конвейера: гистограммы стадий, счётчики и частоты.
+
+    Интерфейс таймера как у StageTimer, поэтому подставляется везде,
+    где принимается timer (CameraInput, FrameHub, приложения). Память
+    не растёт со временем работы.
+    """
+
+    def __init__(self, window=10.0):
+        self.window = window
+        self.histograms = {}
+        self.counters = defaultdict(int)
+        self.rates = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram(self.window)
+            histogram.add(seconds)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def tick(self, name):
+        """Событие для счётчика частоты (например, кадр инференса)"""
+        with self._lock:
+            meter = self.rates.get(name)
+            if meter is None:
+                meter = self.rates[name] = RateMeter()
+            meter.tick()
+
+    def rate(self, name):
+        meter = self.rates.get(name)
+        return meter.rate if meter is not None else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = defaultdict(int)
+            self.rates = {}
+            self.started = time.time()
+
+    def summary(self):
+        """{стадия: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}"""
+        with self._lock:
+            return {name: histogram.snapshot()
+                    for name, histogram in self.histograms.items()}
+
+    def snapshot(self):
+        """Всё сразу - для /metrics и сообщения stats"""
+        stages = self.summary()
+        with self._lock:
+            counters = dict(self.counters)
+            rates = {name: meter.rate for name, meter in self.rates.items()}
+        return {'uptime': time.time() - self.started, 'stages': stages,
+                'counters': counters, 'rates': rates}
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullTimer:
+    """Таймер по умолчанию: ничего не замеряет и почти ничего не стоит"""
+
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def add(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def tick(self, name):
+        pass
+
+    def reset(self):
+        pass
+
+    def summary(self):
+        return {}
+
+    def snapshot(self):
+        return {}
+
+
+NULL_TIMER = NullTimer()
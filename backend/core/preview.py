@@ -0,0 +1,165 @@
+# core/preview.py - MJPEG превью для приложений без окна
+"""Размеченный кадр по HTTP (multipart/x-mixed-replace - открывается
+прямо в браузере). Кадр рисуется и кодируется, только когда кто-то
+смотрит, и не чаще fps: без зрителей превью ничего не стоит."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+BOUNDARY = "frame"
+
+PAGE = b"""<!DOCTYPE html>
+<html><head><title>Gesture Control preview</title></head>
+<body style="margin:0;background:#111">
+<img src="/stream" style="display:block;margin:auto;max-width:100%">
+</body></html>
+"""
+
+
+class PreviewServer:
+    """HTTP сервер превью: / - страница, /stream - MJPEG, /frame.jpg -
+    последний кадр. due() отвечает, нужен ли кадр сейчас, publish()
+    кодирует его и раздаёт зрителям."""
+
+    def __init__(self, port=8080, host="127.0.0.1", fps=2.0, quality=70):
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / fps if fps else 0.0
+        self.quality = quality
+        self.viewers = 0
+        self.frames_published = 0
+        self._jpeg = None
+        self._frame_id = 0
+        self._next = 0.0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        preview = self
+
+        class Handler(_PreviewHandler):
+            server_preview = preview
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="preview", daemon=True)
+        self._thread.start()
+        print(f"Превью: http://{self.host}:{self.port}/ "
+              f"(до {1 / self.interval if self.interval else 0:.0f} кадр/с, "
+              f"только при зрителях)")
+        return self
+
+    @property
+    def watching(self):
+        return self.viewers > 0
+
+    def due(self, now=None):
+        """Рисовать ли этот кадр для превью"""
+        if not self.viewers:
+            return False
+        now = time.monotonic() if now is None else now
+        if now < self._next:
+            return False
+        self._next = now + self.interval
+        return True
+
+    def publish(self, frame):
+        ok, jpeg = cv2.imencode('.jpg', frame,
+                                [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        with self._condition:
+            self._jpeg = jpeg.tobytes()
+            self._frame_id += 1
+            self.frames_published += 1
+            self._condition.notify_all()
+
+    def latest(self):
+        return self._jpeg
+
+    def wait_frame(self, last_id, timeout=1.0):
+        """Следующий кадр после last_id: (id, jpeg) или (last_id, None)"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._closed or self._frame_id != last_id, timeout)
+            if self._closed or self._frame_id == last_id:
+                return last_id, None
+            return self._frame_id, self._jpeg
+
+    def _viewer(self, delta):
+        with self._condition:
+            self.viewers += delta
+            if delta > 0:
+                # Новому зрителю - кадр сразу, не дожидаясь интервала
+                self._next = 0.0
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class _PreviewHandler(BaseHTTPRequestHandler):
+    server_preview = None
+
+    def do_GET(self):
+        preview = self.server_preview
+        if self.path in ("/", "/index.html"):
+            self._send(200, "text/html; charset=utf-8", PAGE)
+        elif self.path == "/frame.jpg":
+            jpeg = preview.latest()
+            if jpeg is None:
+                self._send(503, "text/plain", b"No frame yet")
+            else:
+                self._send(200, "image/jpeg", jpeg)
+        elif self.path == "/stream":
+            self._stream(preview)
+        else:
+            self._send(404, "text/plain", b"Not found")
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, preview):
+        self.send_response(200)
+        self.send_header("Content-Type",
+                         f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        preview._viewer(1)
+        try:
+            frame_id = 0
+            while not preview.closed:
+                frame_id, jpeg = preview.wait_frame(frame_id)
+                if jpeg is None:
+                    continue
+                self.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                self.wfile.write(jpeg)
+                self.wfile.write(b"\r\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # зритель закрыл страницу
+        finally:
+            preview._viewer(-1)
+
+    def log_message(self, format, *args):
+        pass  # без строки в консоли на каждый запрос
@@ -0,0 +1,227 @@
+# core/recording.py - Запись landmarks в компактный файл и воспроизведение без камеры
+"""Формат файла (little-endian, кадры дописываются в конец):
+
+    заголовок файла: b'GLMK', uint16 версия, uint16 точек на руку (21)
+    запись кадра:    uint32 frame_id, uint32 число рук, float64 timestamp
+    затем на каждую руку float32[2 + 21 * 3]:
+                     handedness (0 - Left, 1 - Right), score, x, y, z...
+
+Чтение идёт через mmap без копирования. Видео (если нужно) пишется
+отдельным файлом, по одному кадру на запись. Каждый сеанс записи
+(LandmarkRecorder) начинает оба файла заново: видео дописать нельзя,
+а landmarks без своих кадров при воспроизведении не нужны.
+"""
+import mmap
+import os
+import struct
+import time
+
+import cv2
+import numpy as np
+
+from .landmarks import LandmarkFrame, NUM_LANDMARKS
+
+MAGIC = b'GLMK'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+RECORD_HEADER = struct.Struct('<IId')
+HAND_FLOATS = 2 + NUM_LANDMARKS * 3
+HANDEDNESS = ('Left', 'Right')
+
+
+class LandmarkRecorder:
+    """Пишет landmarks каждого кадра (и, по желанию, видео).
+    Прежняя запись в тех же файлах перезаписывается."""
+
+    def __init__(self, path, video_path=None, video_fps=30):
+        self.path = path
+        self.video_path = video_path
+        self.video_fps = video_fps
+        self.frames_written = 0
+        self._video = None
+
+        if os.path.exists(path) and os.path.getsize(path) > FILE_HEADER.size:
+            print(f"Запись {path} будет перезаписана")
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, NUM_LANDMARKS))
+
+    def write(self, landmarks, timestamp, frame=None, frame_id=None):
+        if frame_id is None:
+            frame_id = self.frames_written
+        count = landmarks.num_hands
+
+        block = np.empty((count, HAND_FLOATS), dtype='<f4')
+        block[:, 0] = [HANDEDNESS.index(h) if h in HANDEDNESS else 1
+                       for h in landmarks.handedness]
+        block[:, 1] = landmarks.scores
+        block[:, 2:] = landmarks.points.reshape(count, NUM_LANDMARKS * 3)
+
+        self._file.write(RECORD_HEADER.pack(frame_id & 0xFFFFFFFF, count,
+                                            timestamp))
+        self._file.write(block.tobytes())
+
+        if self.video_path and frame is not None:
+            if self._video is None:
+                height, width = frame.shape[:2]
+                self._video = cv2.VideoWriter(
+                    self.video_path, cv2.VideoWriter_fourcc(*'mp4v'),
+                    self.video_fps, (width, height))
+            self._video.write(frame)
+
+        self.frames_written += 1
+
+    def close(self):
+        self._file.close()
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+
+class LandmarkRecording:
+    """Запись, открытая через mmap: len(), [i] -> (frame_id, timestamp,
+    LandmarkFrame), итерация"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, points = FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or points != NUM_LANDMARKS:
+            raise ValueError(f"Не файл записи landmarks: {path}")
+
+        # Индекс смещений записей
+        self._records = []
+        offset = FILE_HEADER.size
+        size = len(self._map)
+        while offset + RECORD_HEADER.size <= size:
+            frame_id, count, timestamp = RECORD_HEADER.unpack_from(self._map, offset)
+            data_offset = offset + RECORD_HEADER.size
+            end = data_offset + count * HAND_FLOATS * 4
+            if end > size:
+                break  # недописанная запись в конце
+            self._records.append((frame_id, count, timestamp, data_offset))
+            offset = end
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        frame_id, count, timestamp, offset = self._records[index]
+        # Копия маленькая, зато mmap можно закрыть в любой момент
+        block = np.frombuffer(self._map, dtype='<f4',
+                              count=count * HAND_FLOATS,
+                              offset=offset).reshape(count, HAND_FLOATS).copy()
+        handedness = [HANDEDNESS[int(code)] for code in block[:, 0]]
+        landmarks = LandmarkFrame(block[:, 2:], handedness, block[:, 1])
+        return frame_id, timestamp, landmarks
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def duration(self):
+        if len(self._records) < 2:
+            return 0.0
+        return self._records[-1][2] - self._records[0][2]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class ReplaySource:
+    """Воспроизведение записи вместо камеры и MediaPipe.
+
+    speed=1.0 - в исходном темпе, speed=0 - максимально быстро.
+    Метки времени сохраняют исходные интервалы (сдвинуты к моменту
+    старта), поэтому жесты воспроизводятся одинаково на любой скорости.
+    Интерфейс как у CameraInput: read() -> (frame, landmarks, timestamp).
+    """
+
+    def __init__(self, path, video_path=None, speed=1.0, loop=False,
+                 frame_size=(640, 480)):
+        self.recording = LandmarkRecording(path)
+        self.video_path = video_path
+        self.speed = speed
+        self.loop = loop
+        self.frame_size = frame_size
+        self.index = 0
+        self._video = cv2.VideoCapture(video_path) if video_path else None
+        self._start = None
+        self._first_timestamp = None
+        self._offset = 0.0  # сдвиг времени при повторе по кругу
+
+    def read(self):
+        if self.index >= len(self.recording):
+            if not self.loop or not len(self.recording):
+                return None, None, None
+            self._rewind()
+
+        _, recorded, landmarks = self.recording[self.index]
+        self.index += 1
+
+        if self._start is None:
+            self._start = time.time()
+            self._first_timestamp = recorded
+        elapsed = recorded - self._first_timestamp + self._offset
+        timestamp = self._start + elapsed
+
+        # В исходном темпе ждём момента кадра
+        if self.speed > 0:
+            delay = self._start + elapsed / self.speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        return self._next_frame(), landmarks, timestamp
+
+    def _rewind(self):
+        # Время продолжает идти вперёд
+        frame_interval = self.recording.duration / max(1, len(self.recording) - 1)
+        self._offset += self.recording.duration + frame_interval
+        self.index = 0
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def _next_frame(self):
+        if self._video is not None:
+            success, frame = self._video.read()
+            if success:
+                return frame
+        width, height = self.frame_size
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return self.loop or self.index < len(self.recording)
+
+    def close(self):
+        self.recording.close()
+        if self._video is not None:
+            self._video.release()
+
+
+class RecordingInput:
+    """Обёртка над источником: всё прочитанное пишется в LandmarkRecorder"""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def read(self):
+        frame, landmarks, timestamp = self.source.read()
+        if frame is not None:
+            self.recorder.write(landmarks, timestamp, frame)
+        return frame, landmarks, timestamp
+
+    def configure(self, settings):
+        configure = getattr(self.source, 'configure', None)
+        if configure is not None:
+            configure(settings)
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def close(self):
+        self.source.close()
+        self.recorder.close()
@@ -0,0 +1,104 @@
+# core/rendering.py - Отрисовка рук из массивов и кэшированные статичные надписи
+import cv2
+import numpy as np
+
+# Цвета стиля MediaPipe по умолчанию (BGR)
+RED = (48, 48, 255)
+GREEN = (48, 255, 48)
+BLUE = (192, 101, 21)
+YELLOW = (0, 204, 255)
+GRAY = (128, 128, 128)
+PURPLE = (128, 64, 128)
+PEACH = (180, 229, 255)
+
+# Соединения руки ломаными: одна ломаная на палец, один вызов
+# cv2.polylines на группу для всех рук кадра
+HAND_POLYLINES = (
+    ((1, 0, 5, 9, 13, 17, 0), GRAY, 3),  # ладонь
+    ((1, 2, 3, 4), PEACH, 2),  # большой
+    ((5, 6, 7, 8), PURPLE, 2),  # указательный
+    ((9, 10, 11, 12), YELLOW, 2),  # средний
+    ((13, 14, 15, 16), GREEN, 2),  # безымянный
+    ((17, 18, 19, 20), BLUE, 2),  # мизинец
+)
+
+# Цвет каждой из 21 точки
+POINT_COLORS = ((RED,) * 2 + (PEACH,) * 3 + (RED,) + (PURPLE,) * 3 + (RED,) +
+                (YELLOW,) * 3 + (RED,) + (GREEN,) * 3 + (RED,) + (BLUE,) * 3)
+
+
+class HandRenderer:
+    """Рисует все руки кадра за один проход прямо из LandmarkFrame,
+    без построения protobuf-объектов для mp_drawing"""
+
+    def __init__(self, radius=4):
+        self.radius = radius
+
+    def draw_hands(self, frame, landmarks):
+        """Соединения и точки всех рук. Возвращает пиксели (hands, 21, 2),
+        чтобы приложения не пересчитывали их."""
+        height, width = frame.shape[:2]
+        pixels = landmarks.to_pixels(width, height)
+        if not landmarks.num_hands:
+            return pixels
+
+        for indices, color, thickness in HAND_POLYLINES:
+            lines = [hand[list(indices)].reshape(-1, 1, 2) for hand in pixels]
+            cv2.polylines(frame, lines, False, color, thickness)
+
+        for hand in pixels.tolist():
+            for (x, y), color in zip(hand, POINT_COLORS):
+                cv2.circle(frame, (x, y), self.radius, color, -1)
+        return pixels
+
+    @staticmethod
+    def draw_labels(frame, items, font_scale=0.4, thickness=1):
+        """Подписи одним проходом: items - [(текст, (x, y), цвет), ...]"""
+        for text, position, color in items:
+            cv2.putText(frame, text, position, cv2.FONT_HERSHEY_SIMPLEX,
+                        font_scale, color, thickness)
+
+
+class StaticOverlay:
+    """Неизменные надписи, нарисованные один раз на размер кадра.
+
+    draw(canvas) вызывается дважды - на чёрном и на белом холсте: из
+    разницы получаем цвет и прозрачность каждого пикселя (сглаженные
+    края текста тоже). Затронутые пиксели группируются в прямоугольники,
+    на кадре смешиваются только они - без повторной растеризации текста.
+    """
+
+    def __init__(self, draw, gap=(25, 9)):
+        self.draw = draw
+        self.gap = gap  # соседние надписи ближе этого - один прямоугольник
+        self._size = None
+        self._layers = []
+
+    def invalidate(self):
+        self._size = None
+
+    def _prepare(self, height, width):
+        black = np.zeros((height, width, 3), dtype=np.uint8)
+        white = np.full((height, width, 3), 255, dtype=np.uint8)
+        self.draw(black)
+        self.draw(white)
+        mask = ((black != 0).any(axis=2) | (white != 255).any(axis=2))
+        mask = cv2.dilate(mask.astype(np.uint8),
+                          np.ones(self.gap[::-1], dtype=np.uint8))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+
+        self._layers = []
+        for x, y, w, h, _ in stats[1:].tolist():
+            color = black[y:y + h, x:x + w].copy()  # уже с учётом прозрачности
+            keep = cv2.subtract(white[y:y + h, x:x + w], color)  # доля фона
+            self._layers.append((y, y + h, x, x + w, color, keep))
+        self._size = (height, width)
+
+    def apply(self, frame):
+        height, width = frame.shape[:2]
+        if self._size != (height, width):
+            self._prepare(height, width)
+        for y0, y1, x0, x1, color, keep in self._layers:
+            region = frame[y0:y1, x0:x1]
+            region[:] = cv2.add(cv2.multiply(region, keep, scale=1 / 255), color)
+        return frame
@@ -0,0 +1,186 @@
+# core/settings.py - Настройки жестов и курсора в памяти с подхватом из файла
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .gestures import DEFAULT_SETTINGS as GESTURE_SETTINGS
+
+# Все ключи cursor_settings.json: жесты, курсор, фильтры и частота инференса
+DEFAULT_SETTINGS = dict(GESTURE_SETTINGS, **{
+    'cursor_smoothing': 0.25,  # 0-1, чем больше - плавнее
+    'cursor_speed': 1.0,  # Скорость курсора
+    'deadzone': 0.15,  # Мёртвая зона по краям
+    'cursor_filter': 'exponential',  # или 'one_euro' - меньше задержка
+    'cursor_min_cutoff': 1.0,  # One Euro курсора: сглаживание в покое, Гц
+    'cursor_beta': 0.01,  # рост частоты среза со скоростью (пиксели/с)
+    'inference_every': 1,  # MediaPipe раз в N кадров
+    'inference_hz': 0,  # или с такой частотой (0 - не ограничивать)
+    'landmark_filter': False,  # One Euro для landmarks
+    'filter_min_cutoff': 1.5,  # One Euro landmarks, Гц
+    'filter_beta': 10.0,  # (нормализованные координаты/с)
+    'filter_d_cutoff': 1.0,
+    'predict_max': 0.1  # дальше не предсказываем, с
+})
+
+
+def write_json_atomic(path, data, indent=4):
+    """Запись JSON через временный файл и os.replace: читатель видит
+    либо старый файл, либо новый целиком"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json',
+                                    dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+        # mkstemp создаёт файл 0600 - оставляем права прежнего файла,
+        # новый - как у open(): 0666 без umask
+        try:
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _coerce(key, value, default):
+    """Значение к типу значения по умолчанию; ValueError, если нельзя"""
+    number = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(default, bool):
+        if isinstance(value, bool):
+            return value
+    elif isinstance(default, float):
+        if number:
+            return float(value)
+    elif isinstance(default, int):
+        # Целые по умолчанию (inference_hz) могут быть и дробными
+        if number:
+            return int(value) if float(value).is_integer() else float(value)
+    elif isinstance(value, type(default)):
+        return value
+    raise ValueError(f"{key}: ожидается {type(default).__name__}, "
+                     f"получено {value!r}")
+
+
+class SettingsStore:
+    """Настройки в памяти, общие для всех потоков.
+
+    values - живой словарь (меняется на месте), version растёт при каждом
+    изменении: потребители сравнивают version на кадре и перенастраиваются
+    в своём потоке. poll() проверяет mtime файла не чаще check_interval
+    секунд, так что на кадр нет обращений к диску. save() пишет
+    атомарно (временный файл + os.replace) и только если что-то изменилось.
+    """
+
+    def __init__(self, path, defaults=DEFAULT_SETTINGS, check_interval=1.0):
+        self.path = path
+        self.defaults = dict(defaults)
+        self.check_interval = check_interval
+        self.values = dict(defaults)
+        self.version = 0
+        self._saved = dict(defaults)  # что сейчас на диске (с умолчаниями)
+        self._mtime = None  # mtime последнего удачно прочитанного файла
+        self._bad_mtime = None  # о битой версии файла пишем один раз
+        self._next_check = 0.0
+        self._lock = threading.RLock()
+        self.load()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self):
+        """Читаем файл; True - настройки изменились.
+        Значения проверяются как в update(); файл с ошибкой не
+        применяется и перечитывается при следующем poll()."""
+        with self._lock:
+            mtime = self._file_mtime()
+            if mtime is None:
+                self._mtime = None
+                return False
+            try:
+                with open(self.path, 'r') as f:
+                    saved = json.load(f)
+                if not isinstance(saved, dict):
+                    raise ValueError("ожидается объект JSON")
+                saved = self._validate(saved)
+            except (OSError, ValueError) as e:
+                # Файл мог читаться в момент записи редактором - подождём
+                if mtime != self._bad_mtime:
+                    print(f"Не удалось прочитать {self.path}: {e}")
+                    self._bad_mtime = mtime
+                return False
+            self._mtime = mtime
+            self._bad_mtime = None
+            values = dict(self.defaults)
+            values.update(saved)
+            self._saved = dict(values)
+            return self._replace(values)
+
+    def _validate(self, changes):
+        """Значения к типам по умолчанию; неизвестный ключ или неверный
+        тип - ValueError"""
+        coerced = {}
+        for key, value in changes.items():
+            if key not in self.defaults:
+                raise ValueError(f"Неизвестная настройка: {key}")
+            coerced[key] = _coerce(key, value, self.defaults[key])
+        return coerced
+
+    def _replace(self, values):
+        if values == self.values:
+            return False
+        self.values.clear()
+        self.values.update(values)
+        self.version += 1
+        return True
+
+    def poll(self):
+        """Подхват изменений файла (дёшево, можно звать на каждом кадре)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        with self._lock:
+            self._next_check = now + self.check_interval
+            if self._file_mtime() == self._mtime:
+                return False
+            changed = self.load()
+        if changed:
+            print(f"Настройки перечитаны из {self.path}")
+        return changed
+
+    def update(self, changes):
+        """Меняем часть настроек; возвращаем реально изменённые.
+        Неизвестный ключ или неверный тип - ValueError, ничего не меняется."""
+        with self._lock:
+            coerced = self._validate(changes)
+            changed = {key: value for key, value in coerced.items()
+                       if self.values.get(key) != value}
+            if changed:
+                values = dict(self.values)
+                values.update(changed)
+                self._replace(values)
+            return changed
+
+    def save(self):
+        """Атомарная запись, только если значения отличаются от файла"""
+        with self._lock:
+            if self.values == self._saved:
+                return False
+            write_json_atomic(self.path, self.values)
+            self._saved = dict(self.values)
+            # Своя запись - не повод перечитывать файл
+            self._mtime = self._file_mtime()
+            return True
@@ -0,0 +1,289 @@
+# core/sources.py - Источники кадров: камера, видеофайл, папка с картинками, генератор
+import os
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from .frame_grabber import LatestFrameGrabber
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SOURCE_KINDS = ("camera", "video", "images", "synthetic")
+
+
+class FrameSource(ABC):
+    """Источник кадров с интерфейсом cv2.VideoCapture: read() -> (success,
+    frame), isOpened(), release(). После open() читается через start()."""
+
+    # Живой источник (камера) отдаёт кадры сам по себе - его читает поток
+    # LatestFrameGrabber. Файлы читаются по порядку, без пропусков.
+    live = False
+
+    def __init__(self, fps=None):
+        self.fps = fps  # для файлов и генератора: None - максимально быстро
+        self.timestamp = None  # время последнего прочитанного кадра
+        self._next_time = None
+
+    @abstractmethod
+    def open(self):
+        """Открываем источник. Возвращает True, если получилось."""
+
+    @abstractmethod
+    def _read_frame(self):
+        """Следующий кадр (success, frame)"""
+
+    def read(self):
+        if not self.live and self.fps:
+            self._wait_frame()
+        success, frame = self._read_frame()
+        self.timestamp = time.time()
+        return success, frame
+
+    def _wait_frame(self):
+        """Отдаём файловые кадры в заданном темпе"""
+        now = time.time()
+        if self._next_time is None or self._next_time < now:
+            self._next_time = now
+        elif self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time += 1.0 / self.fps
+
+    @abstractmethod
+    def isOpened(self):
+        pass
+
+    def release(self):
+        pass
+
+    def start(self, name="frame-grabber"):
+        """Читатель кадров: поток захвата для живых источников,
+        сам источник - для остальных"""
+        if self.live:
+            return LatestFrameGrabber(self, name=name).start()
+        return self
+
+
+class CameraSource(FrameSource):
+    """Камера с явными настройками захвата.
+
+    Камера в MJPG на меньшем разрешении часто даёт самую дешёвую
+    экономию задержки: меньше данных по USB и меньше работы на кадр.
+    Нулевые/пустые значения оставляют настройки драйвера.
+    """
+
+    live = True
+
+    def __init__(self, index=0, width=0, height=0, fps=0, fourcc=None,
+                 buffer_size=0):
+        super().__init__(fps)
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            self.cap.release()
+            return False
+
+        # FOURCC до разрешения: иначе часть драйверов не даст нужный размер
+        if self.fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC,
+                         cv2.VideoWriter_fourcc(*self.fourcc[:4].ljust(4)))
+        if self.width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        print(f"Камера {self.index}: {self.describe()}")
+        return True
+
+    def describe(self):
+        """Фактические настройки, которые принял драйвер"""
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        code = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        fourcc = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+        return f"{width}x{height} @ {fps:.0f} fps, {fourcc.strip() or '?'}"
+
+    def _read_frame(self):
+        return self.cap.read()
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Кадры из видеофайла (по кругу, если loop)"""
+
+    def __init__(self, path, fps=None, loop=False, width=0, height=0):
+        super().__init__(fps)
+        self.path = path
+        self.loop = loop
+        self.width = width
+        self.height = height
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            print(f"Не удалось открыть видео: {self.path}")
+            return False
+        return True
+
+    def _read_frame(self):
+        success, frame = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        if success:
+            frame = _resize(frame, self.width, self.height)
+        return success, frame
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class ImageFolderSource(FrameSource):
+    """Картинки из папки в порядке имён файлов"""
+
+    def __init__(self, path, fps=None, loop=False, width=0, height=0):
+        super().__init__(fps)
+        self.path = path
+        self.loop = loop
+        self.width = width
+        self.height = height
+        self.files = []
+        self.index = 0
+
+    def open(self):
+        if not os.path.isdir(self.path):
+            print(f"Папка не найдена: {self.path}")
+            return False
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.files:
+            print(f"В папке нет картинок: {self.path}")
+            return False
+        return True
+
+    def _read_frame(self):
+        skipped = 0
+        while self.isOpened():
+            if skipped >= len(self.files):
+                # Круг без единого кадра: по кругу читать нечего
+                print(f"Ни одна картинка не читается: {self.path}")
+                self.files = []
+                break
+            if self.index >= len(self.files):
+                self.index = 0
+            path = self.files[self.index]
+            self.index += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, _resize(frame, self.width, self.height)
+            print(f"Пропускаем файл: {path}")
+            skipped += 1
+        return False, None
+
+    def isOpened(self):
+        return bool(self.files) and (self.loop or self.index < len(self.files))
+
+
+class SyntheticSource(FrameSource):
+    """Сгенерированные кадры - для запуска без камеры (headless, тесты
+    нагрузки). Кадры заранее подготовлены, чтение почти ничего не стоит."""
+
+    def __init__(self, width=640, height=480, fps=None, frames=0, variants=30):
+        super().__init__(fps)
+        self.width = width or 640
+        self.height = height or 480
+        self.frames = frames  # 0 - бесконечно
+        self.variants = variants
+        self.frame_index = 0
+        self._frames = []
+
+    def open(self):
+        # Градиент с движущимся кругом: кадры различаются, как с камеры
+        base = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        base[..., 0] = np.linspace(40, 200, self.width, dtype=np.uint8)
+        base[..., 1] = np.linspace(60, 160, self.height,
+                                   dtype=np.uint8)[:, None]
+        radius = max(4, min(self.width, self.height) // 10)
+        self._frames = []
+        for index in range(self.variants):
+            frame = base.copy()
+            angle = 2 * np.pi * index / self.variants
+            center = (int(self.width * (0.5 + 0.3 * np.cos(angle))),
+                      int(self.height * (0.5 + 0.3 * np.sin(angle))))
+            cv2.circle(frame, center, radius, (255, 255, 255), -1)
+            self._frames.append(frame)
+        return True
+
+    def _read_frame(self):
+        if not self.isOpened():
+            return False, None
+        frame = self._frames[self.frame_index % len(self._frames)]
+        self.frame_index += 1
+        # Копия: дальше по конвейеру на кадре рисуют
+        return True, frame.copy()
+
+    def isOpened(self):
+        return bool(self._frames) and (
+            not self.frames or self.frame_index < self.frames)
+
+    def release(self):
+        self._frames = []
+
+
+def _resize(frame, width, height):
+    if not width or not height:
+        return frame
+    if frame.shape[1] == width and frame.shape[0] == height:
+        return frame
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def create_source(spec=None, width=0, height=0, fps=0, fourcc=None,
+                  buffer_size=0, loop=False):
+    """Источник по описанию:
+
+        0, "camera:1"        - камера по индексу
+        "video:path", *.mp4  - видеофайл
+        "images:dir", папка  - картинки из папки
+        "synthetic"          - сгенерированные кадры
+    """
+    spec = "0" if spec is None else str(spec).strip()
+    kind, _, value = spec.partition(":")
+    if kind not in SOURCE_KINDS:
+        kind, value = "", spec  # просто путь (в том числе C:\...)
+
+    if kind == "camera" or (not kind and value.isdigit()):
+        return CameraSource(int(value or 0), width, height, fps, fourcc,
+                            buffer_size)
+    if kind == "synthetic" or value == "synthetic":
+        return SyntheticSource(width, height, fps or None)
+    if kind == "images" or (not kind and os.path.isdir(value)):
+        return ImageFolderSource(value, fps or None, loop, width, height)
+    if kind == "video" or (not kind and value.lower().endswith(VIDEO_EXTENSIONS)):
+        return VideoFileSource(value, fps or None, loop, width, height)
+    raise ValueError(f"Неизвестный источник кадров: {spec}")
@@ -0,0 +1,192 @@
+# core/workers.py - Захват и инференс камеры в отдельном процессе
+"""Каждая камера - свой процесс со своим Hands и своим GIL, поэтому
+несколько камер занимают несколько ядер. Кадры и landmarks возвращаются
+через FrameRing (core/frame_ring.py), по каналу идут только команды и
+номера слотов.
+"""
+import multiprocessing
+import time
+
+from .frame_ring import FrameRing
+from .metrics import NULL_TIMER, _Stage
+
+# spawn, а не fork: веб-процесс многопоточный (event loop, пулы)
+_context = multiprocessing.get_context('spawn')
+
+
+class _ForwardTimer:
+    """Таймер воркера: копит замеры кадра и отдаёт их вместе с кадром"""
+
+    def __init__(self):
+        self.events = []
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        self.events.append(('add', name, seconds))
+
+    def count(self, name, value=1):
+        self.events.append(('count', name, value))
+
+    def tick(self, name):
+        self.events.append(('tick', name, None))
+
+    def drain(self):
+        events, self.events = self.events, []
+        return events
+
+
+def _worker_main(camera_index, factory, conn, slots, max_hands):
+    """Цикл процесса камеры: на каждый запрос 'read' - кадр в кольцо,
+    ('configure', настройки) - передаём источнику"""
+    timer = _ForwardTimer()
+    try:
+        frame_input = factory(camera_index, timer)
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    if frame_input is None:
+        conn.send(('error', "Camera not available"))
+        return
+    conn.send(('ready', None))
+
+    ring = None
+    frame_id = 0
+    try:
+        while True:
+            request = conn.recv()
+            if isinstance(request, tuple) and request[0] == 'configure':
+                configure = getattr(frame_input, 'configure', None)
+                if configure is not None:
+                    configure(request[1])
+                continue
+            if request != 'read':
+                break
+
+            frame, landmarks, timestamp = frame_input.read()
+            if frame is None:
+                conn.send(('error', "Camera read failed"))
+                break
+
+            # Кольцо создаём по первому кадру и заново, если размер сменился
+            ring_info = None
+            if ring is None or ring.shape != frame.shape:
+                if ring is not None:
+                    ring.close()
+                ring = FrameRing(frame.shape, slots, max_hands)
+                ring_info = ring.describe()
+
+            frame_id += 1
+            slot = ring.write(frame, landmarks, timestamp, frame_id)
+            conn.send(('frame', (slot, ring_info, timer.drain())))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        frame_input.close()
+        if ring is not None:
+            ring.close()
+
+
+class ProcessInput:
+    """Источник с интерфейсом CameraInput, работающий в процессе-воркере.
+
+    factory(camera_index, timer) вызывается в воркере и должна быть
+    функцией уровня модуля (передаётся по имени). Замеры стадий воркера
+    переносятся в timer веб-процесса вместе с кадрами.
+
+    Кадр из read() не копируется: он живёт в слоте общей памяти, пока
+    не прочитаны ещё slots - 1 кадров. Воркер пишет, только когда его
+    просят, поэтому slots больше числа кадров в обработке достаточно.
+    """
+
+    def __init__(self, camera_index, factory, timer=NULL_TIMER, slots=4,
+                 max_hands=2, start_timeout=60.0, read_timeout=5.0):
+        self.camera_index = camera_index
+        self.timer = timer
+        self.slots = slots
+        self.read_timeout = read_timeout
+        self.error = None
+        self.ring = None
+        self._closed = False
+
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(
+            target=_worker_main, name=f"camera-{camera_index}",
+            args=(camera_index, factory, child_conn, slots, max_hands),
+            daemon=True)
+        started = time.perf_counter()
+        self.process.start()
+        child_conn.close()
+
+        # Ждём, пока воркер загрузит MediaPipe и откроет камеру
+        kind, payload = self._receive(start_timeout)
+        if kind != 'ready':
+            self.error = payload
+        else:
+            print(f"Camera {camera_index} worker started in "
+                  f"{time.perf_counter() - started:.1f} s "
+                  f"(pid {self.process.pid})")
+
+    def _receive(self, timeout):
+        try:
+            if not self.conn.poll(timeout):
+                return 'error', "Camera worker timed out"
+            return self.conn.recv()
+        except (EOFError, OSError):
+            return 'error', "Camera worker exited"
+
+    def read(self):
+        if self.error is not None:
+            return None, None, None
+        try:
+            self.conn.send('read')
+        except (BrokenPipeError, OSError):
+            self.error = "Camera worker exited"
+            return None, None, None
+
+        kind, payload = self._receive(self.read_timeout)
+        if kind != 'frame':
+            self.error = payload
+            return None, None, None
+
+        slot, ring_info, events = payload
+        if ring_info is not None:
+            if self.ring is not None:
+                self.ring.close()
+            self.ring = FrameRing.attach(*ring_info)
+
+        # Стадии воркера (flip, bgr2rgb, hands_process...) - в метрики камеры
+        for kind, name, value in events:
+            if kind == 'tick':
+                self.timer.tick(name)
+            else:
+                getattr(self.timer, kind)(name, value)
+        return self.ring.read(slot)
+
+    def configure(self, settings):
+        """Живые настройки - в процесс-воркер, без ответа"""
+        try:
+            self.conn.send(('configure', dict(settings)))
+        except (BrokenPipeError, OSError):
+            pass
+
+    def isOpened(self):
+        return self.error is None and self.process.is_alive()
+
+    def close(self):
+        """Останавливаем воркер: он сам закроет камеру и удалит память"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.conn.send('stop')
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+        if self.ring is not None:
+            self.ring.close()
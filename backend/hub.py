@@ -0,0 +1,472 @@
+# backend/hub.py - Общий захват и инференс с раздачей всем WebSocket клиентам
+import asyncio
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from backend.core.classifier import hand_features
+from backend.core.gestures import MultiHandGestures
+from backend.core.metrics import NULL_TIMER, PipelineMetrics
+from backend.core.rendering import HandRenderer
+from backend.pacing import AdaptiveQuality, FramePacer, RateLimiter
+
+
+class FramePacket:
+    """Результат обработки одного кадра, общий для всех подписчиков"""
+
+    def __init__(self, frame_id, timestamp, landmarks, gestures, jpegs,
+                 poses=None, pose_names=()):
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.landmarks = landmarks  # LandmarkFrame
+        self.gestures = gestures  # текущий жест каждой руки
+        # Поза каждой руки - номер в pose_names, NO_POSE - не распознана
+        # (None - классификатора нет)
+        self.poses = poses
+        self.pose_names = pose_names
+        self.jpegs = jpegs  # (режим, качество, масштаб) -> JPEG, только запрошенные
+        self._cache = {}
+
+    @property
+    def points(self):
+        """float32 (hands, 21, 3)"""
+        return self.landmarks.points
+
+    def cached(self, key, build):
+        """Сериализация считается один раз на кадр и переиспользуется всеми
+        клиентами (см. backend/protocol.py)"""
+        value = self._cache.get(key)
+        if value is None:
+            value = build()
+            self._cache[key] = value
+        return value
+
+
+# Режимы видео для клиента
+VIDEO_OFF = "off"  # только landmarks
+VIDEO_RAW = "raw"  # кадр без разметки
+VIDEO_ANNOTATED = "annotated"  # кадр с нарисованной рукой
+VIDEO_MODES = (VIDEO_OFF, VIDEO_RAW, VIDEO_ANNOTATED)
+
+
+def parse_video_mode(value):
+    """Режим видео из параметра подключения"""
+    if value in VIDEO_MODES:
+        return value
+    return VIDEO_ANNOTATED
+
+
+class Subscription:
+    """Подписка клиента на хаб с ограниченной очередью.
+
+    Landmarks приходят не чаще fps (None - с каждым кадром), видео - в
+    выбранном режиме и не чаще video_fps. Качество, размер и частота
+    видео подстраиваются под скорость клиента (AdaptiveQuality).
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, hub, maxsize=2, video=VIDEO_ANNOTATED, video_fps=None,
+                 fps=None, quality=None):
+        self.id = next(self._ids)
+        self.hub = hub
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.video = video
+        self.fps = fps
+        self.quality = quality or AdaptiveQuality()
+        self._frames = RateLimiter(fps)
+        self._video = RateLimiter(video_fps)
+        # Последний отчёт клиента о декодировании и отрисовке на его
+        # стороне и когда он пришёл (time.monotonic)
+        self.report = None
+        self.report_time = None
+
+    def plan(self, timestamp, frame_interval):
+        """Нужен ли клиенту этот кадр и какой вариант видео к нему:
+        (send, (режим, качество, масштаб) или None)"""
+        if not self._frames.due(timestamp):
+            return False, None
+        if self.video == VIDEO_OFF:
+            return True, None
+
+        interval = self._video.interval
+        rate = self.quality.video_rate
+        if rate < 1.0:
+            interval = max(interval, self._frames.interval, frame_interval) / rate
+        if not self._video.due(timestamp, interval):
+            return True, None
+        return True, (self.video, self.quality.quality, self.quality.scale)
+
+    def report_send(self, send_latency):
+        """Время отправки очередного пакета - для подстройки качества"""
+        self.quality.update(send_latency, self.queue.qsize(), self.dropped)
+
+    def push(self, packet, video=None):
+        """Кладём пакет в очередь, вытесняя самый старый, если клиент не успевает"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+                self.hub.timer.count('client_dropped')
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait((packet, video))
+
+    def report_client(self, report):
+        """Отчёт клиента ({"type": "client_stats", ...}) - в stats()"""
+        self.report = {key: value for key, value in report.items()
+                       if key != 'type'}
+        self.report_time = time.monotonic()
+
+    async def get(self):
+        """Следующий пакет и вариант его видео (None - без кадра).
+        Пакет None означает, что поток остановлен."""
+        return await self.queue.get()
+
+    def stats(self):
+        """Состояние клиента для /metrics и сообщения stats"""
+        return {
+            'id': self.id,
+            'video': self.video,
+            'fps': self.fps,
+            'queue': self.queue.qsize(),
+            'dropped': self.dropped,
+            'quality': self.quality.quality,
+            'scale': self.quality.scale,
+            'video_rate': self.quality.video_rate,
+            'report': (dict(self.report,
+                            age_s=time.monotonic() - self.report_time)
+                       if self.report is not None else None),
+        }
+
+
+class FrameHub:
+    """Один производитель кадров на камеру и N подписчиков.
+
+    Захват стартует с первым подписчиком и останавливается после ухода
+    последнего. Landmarks и JPEG считаются один раз на кадр; кадр
+    рисуется и кодируется, только если он нужен хотя бы одному клиенту.
+    """
+
+    def __init__(self, camera_index, input_factory, render_executor,
+                 render_workers=1, queue_size=2, target_fps=30,
+                 timer=NULL_TIMER, settings=None, classifier=None):
+        self.camera_index = camera_index
+        self.input_factory = input_factory
+        self.render_executor = render_executor
+        self.render_workers = render_workers
+        self.queue_size = queue_size
+        self.target_fps = target_fps
+        self.timer = timer
+        self.pacer = FramePacer(target_fps)
+        self.subscribers = set()
+        self.error = None
+        # Живые настройки (SettingsStore): пороги жестов и сглаживание
+        # применяются в потоке камеры, когда меняется их version
+        self.settings = settings
+        self._settings_version = None
+        self.gestures = MultiHandGestures()
+        # Позы рук по образцам (PoseClassifier), общий для всех камер
+        self.classifier = classifier
+        self._recording = None  # запись образцов позы, см. record_pose
+        self.frame_id = 0
+        self.first_frame = None  # секунд от запуска захвата до первого кадра
+        self._task = None
+        self._lock = asyncio.Lock()
+        # Разметка рисуется из массива landmarks, без mediapipe
+        self.renderer = HandRenderer()
+
+    async def subscribe(self, video=VIDEO_ANNOTATED, video_fps=None, fps=None,
+                        quality=None):
+        """Добавляем клиента и при необходимости запускаем захват"""
+        async with self._lock:
+            subscription = Subscription(self, self.queue_size, video,
+                                        video_fps, fps, quality)
+            self.subscribers.add(subscription)
+            self._update_pacing()
+            if self._task is None or self._task.done():
+                self.error = None
+                self._task = asyncio.create_task(self._produce())
+            return subscription
+
+    async def unsubscribe(self, subscription):
+        """Убираем клиента; после последнего останавливаем захват"""
+        async with self._lock:
+            self.subscribers.discard(subscription)
+            self._update_pacing()
+            if self.subscribers or self._task is None:
+                return
+            task, self._task = self._task, None
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def close(self):
+        """Принудительная остановка хаба"""
+        async with self._lock:
+            if self._task is not None:
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+                self._task = None
+            self._broadcast(None)
+            self.subscribers.clear()
+
+    def _update_pacing(self):
+        """Камера работает с частотой самого требовательного клиента"""
+        fps = [s.fps or self.target_fps for s in self.subscribers]
+        self.pacer.set_fps(max(fps) if fps else self.target_fps)
+
+    def _broadcast(self, packet, plan=None):
+        """Рассылка пакета; plan - кому и с каким видео (None - всем)"""
+        if packet is not None:
+            self.timer.add('capture_to_broadcast', time.time() - packet.timestamp)
+        if plan is None:
+            for subscription in list(self.subscribers):
+                subscription.push(packet)
+            return
+        for subscription, video in plan.items():
+            if subscription in self.subscribers:
+                subscription.push(packet, video)
+
+    def _plan(self, timestamp):
+        """Кому отправить этот кадр и какой вариант видео"""
+        plan = {}
+        for subscription in self.subscribers:
+            send, video = subscription.plan(timestamp, self.pacer.interval)
+            if send:
+                plan[subscription] = video
+        return plan
+
+    def stats(self):
+        """Метрики камеры: стадии, частота инференса, клиенты"""
+        stats = self.timer.snapshot()
+        stats.update({
+            'camera': self.camera_index,
+            'running': self._task is not None and not self._task.done(),
+            'error': self.error,
+            'frame_id': self.frame_id,
+            'first_frame_s': self.first_frame,
+            'target_fps': 1.0 / self.pacer.interval if self.pacer.interval else None,
+            'clients': [s.stats() for s in self.subscribers],
+        })
+        return stats
+
+    def _open(self):
+        """Открываем источник кадров (в потоке камеры): камера с Hands
+        или запись. None - источник недоступен."""
+        return self.input_factory(self.camera_index, self.timer)
+
+    @staticmethod
+    def _release_opened(future):
+        frame_input = future.result()
+        if frame_input is not None:
+            frame_input.close()
+
+    def _capture_and_infer(self, frame_input):
+        """Свежий кадр, детекция рук, жесты и позы. Hands и автоматы жестов
+        хранят состояние, поэтому всегда выполняются в одном потоке камеры."""
+        self._apply_settings(frame_input)
+        frame, landmarks, timestamp = frame_input.read()
+        if frame is None:
+            return None, None, None, None, None
+        self.timer.tick('inference')
+        with self.timer.stage('gestures'):
+            gestures, _ = self.gestures.update(landmarks, timestamp)
+        poses = None
+        if self.classifier is not None:
+            with self.timer.stage('classify'):
+                poses, _, names = self.classifier.classify(
+                    landmarks, frame.shape[1] / frame.shape[0])
+            poses = (poses, names)
+        return frame, landmarks, gestures, poses, timestamp
+
+    def _apply_settings(self, frame_input):
+        """Новые настройки - автоматам жестов и источнику (фильтр landmarks)"""
+        if self.settings is None:
+            return
+        self.settings.poll()
+        if self.settings.version == self._settings_version:
+            return
+        self._settings_version = self.settings.version
+        values = self.settings.snapshot()
+        self.gestures.configure(values)
+        configure = getattr(frame_input, 'configure', None)
+        if configure is not None:
+            configure(values)
+
+    def _encode(self, frame, quality, scale):
+        if scale < 1.0:
+            with self.timer.stage('resize'):
+                frame = cv2.resize(frame, None, fx=scale, fy=scale,
+                                   interpolation=cv2.INTER_AREA)
+        with self.timer.stage('imencode'):
+            _, buffer = cv2.imencode('.jpg', frame,
+                                     [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes()
+
+    def _render(self, frame, landmarks, gestures, poses, frame_id, timestamp,
+                videos):
+        """Только если кому-то нужно - отрисовка и кодирование кадра
+        (в пуле потоков)"""
+        jpegs = {}
+        raw = [v for v in videos if v[0] == VIDEO_RAW]
+        annotated = [v for v in videos if v[0] == VIDEO_ANNOTATED]
+
+        # Кодируем каждый вариант кадра один раз для всех клиентов
+        for video in raw:
+            jpegs[video] = self._encode(frame, video[1], video[2])
+
+        # Рисуем landmarks на кадре, только если его кто-то увидит
+        if annotated:
+            with self.timer.stage('draw'):
+                self.renderer.draw_hands(frame, landmarks)
+
+        for video in annotated:
+            jpegs[video] = self._encode(frame, video[1], video[2])
+
+        poses, pose_names = poses or (None, ())
+        return FramePacket(frame_id, timestamp, landmarks, gestures, jpegs,
+                           poses, pose_names)
+
+    async def record_pose(self, name, samples=10, hand_index=0, timeout=10.0):
+        """Записываем образцы позы с руки hand_index на следующих кадрах
+        (по одному на кадр). Захват уже должен идти - хаб запускают
+        подписчики. Число записанных образцов; TimeoutError - рука не
+        появилась, RuntimeError - нет классификатора, камера не работает
+        или уже идёт запись."""
+        if self.classifier is None:
+            raise RuntimeError("Pose classifier disabled")
+        if self._task is None or self._task.done():
+            raise RuntimeError(f"Camera {self.camera_index} is not running")
+        if self._recording is not None:
+            raise RuntimeError("Pose recording already in progress")
+        done = asyncio.get_running_loop().create_future()
+        self._recording = (hand_index, samples, [], done)
+        try:
+            vectors = await asyncio.wait_for(done, timeout)
+        finally:
+            self._recording = None
+        return self.classifier.add(name, vectors)
+
+    def _record_sample(self, frame, landmarks):
+        """Очередной образец позы для record_pose (в event loop)"""
+        hand_index, samples, vectors, done = self._recording
+        if done.done() or landmarks.num_hands <= hand_index:
+            return
+        features = hand_features(landmarks, frame.shape[1] / frame.shape[0])
+        vectors.append(features[hand_index])
+        if len(vectors) >= samples:
+            done.set_result(vectors)
+
+    async def _produce(self):
+        """Цикл захвата и инференса, пока есть подписчики.
+
+        Блокирующие вызовы не выполняются в event loop: захват и инференс
+        идут в выделенном потоке камеры, отрисовка и кодирование - в общем
+        пуле. Пока кодируется кадр N, камера уже обрабатывает кадр N+1.
+        Захват идёт в своём потоке, инференс всегда берёт свежий кадр.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.first_frame = None
+        camera_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"camera-{self.camera_index}")
+
+        opening = camera_executor.submit(self._open)
+        try:
+            frame_input = await asyncio.wrap_future(opening)
+        except asyncio.CancelledError:
+            # Камера откроется в своём потоке - там же её и закроем
+            opening.add_done_callback(self._release_opened)
+            camera_executor.shutdown(wait=False)
+            raise
+        if frame_input is None:
+            camera_executor.shutdown(wait=False)
+            self.error = "Camera not available"
+            self._broadcast(None)
+            return
+
+        print(f"Camera {self.camera_index} started")
+        pending = deque()
+        max_in_flight = max(1, self.render_workers)
+        try:
+            while True:
+                # Ждём дедлайн кадра с учётом уже потраченного времени
+                await self.pacer.wait()
+
+                (frame, landmarks, gestures, poses,
+                 timestamp) = await loop.run_in_executor(
+                    camera_executor, self._capture_and_infer, frame_input)
+                if frame is None:
+                    self.error = "Camera read failed"
+                    break
+                if self._recording is not None:
+                    self._record_sample(frame, landmarks)
+
+                self.frame_id += 1
+                if self.first_frame is None:
+                    self.first_frame = time.perf_counter() - started
+                    print(f"Camera {self.camera_index} first frame in "
+                          f"{self.first_frame:.2f} s")
+                plan = self._plan(timestamp)
+                videos = {video for video in plan.values() if video}
+                pending.append((loop.run_in_executor(
+                    self.render_executor, self._render, frame, landmarks,
+                    gestures, poses, self.frame_id, timestamp, videos), plan))
+
+                # Рассылаем готовые кадры строго по порядку
+                while pending and (pending[0][0].done() or
+                                   len(pending) >= max_in_flight):
+                    future, plan = pending.popleft()
+                    self._broadcast(await future, plan)
+
+            while pending:
+                future, plan = pending.popleft()
+                self._broadcast(await future, plan)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error in camera {self.camera_index}: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            # Освобождаем в потоке камеры, после текущего вызова
+            camera_executor.submit(frame_input.close)
+            camera_executor.shutdown(wait=False)
+            print(f"Camera {self.camera_index} stopped")
+
+        self._broadcast(None)
+
+
+class HubRegistry:
+    """Хабы по индексу камеры"""
+
+    def __init__(self, input_factory, workers=1, metrics=True, **hub_options):
+        self.input_factory = input_factory
+        self.workers = max(1, workers)
+        self.metrics = metrics  # PipelineMetrics на каждую камеру
+        self.hub_options = hub_options
+        self.hubs = {}
+        # Общий пул для отрисовки и кодирования всех камер
+        self.render_executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="render")
+
+    def get(self, camera_index=0):
+        hub = self.hubs.get(camera_index)
+        if hub is None:
+            timer = PipelineMetrics() if self.metrics else NULL_TIMER
+            hub = FrameHub(camera_index, self.input_factory,
+                           self.render_executor, self.workers,
+                           timer=timer, **self.hub_options)
+            self.hubs[camera_index] = hub
+        return hub
+
+    async def close_all(self):
+        for hub in self.hubs.values():
+            await hub.close()
+        self.hubs.clear()
+        self.render_executor.shutdown(wait=False)
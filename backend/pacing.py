@@ -0,0 +1,137 @@
+# backend/pacing.py - Темп кадров и адаптация качества под клиента
+import asyncio
+import time
+
+# Ступени масштаба кадра: клиенты с одинаковыми настройками делят один JPEG
+SCALE_STEPS = (1.0, 0.75, 0.5, 0.35)
+# Ступени частоты видео относительно заказанной
+VIDEO_RATE_STEPS = (1.0, 0.5, 0.25)
+QUALITY_STEP = 10
+
+
+class FramePacer:
+    """Ожидание дедлайна следующего кадра.
+
+    Время, уже потраченное на обработку, вычитается из паузы. Если кадр
+    опоздал, график сдвигается без накопления долга.
+    """
+
+    def __init__(self, fps=30):
+        self.interval = 1.0 / fps if fps else 0.0
+        self._deadline = None
+
+    def set_fps(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+
+    async def wait(self):
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+        self._deadline += self.interval
+        delay = self._deadline - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            self._deadline = now
+            # Даём отработать отправке клиентам
+            await asyncio.sleep(0)
+
+
+class RateLimiter:
+    """Пропускает события не чаще заданной частоты (fps=None - все)"""
+
+    def __init__(self, fps=None):
+        self.interval = 1.0 / fps if fps else 0.0
+        self._next = 0.0
+
+    def due(self, timestamp, interval=None):
+        if interval is None:
+            interval = self.interval
+        if timestamp < self._next:
+            return False
+        self._next += interval
+        if self._next <= timestamp:
+            # Отстали (или первое событие) - отсчитываем от текущего
+            self._next = timestamp + interval
+        return True
+
+
+class AdaptiveQuality:
+    """Подстройка видео под медленного клиента.
+
+    Признаки перегрузки - долгая отправка (дольше бюджета кадра) или
+    очередь, из которой вытесняются кадры. Сначала снижается качество
+    JPEG, затем размер кадра, затем частота видео. Когда клиент
+    стабильно успевает, ступени возвращаются в обратном порядке.
+    """
+
+    def __init__(self, quality_max=70, quality_min=30, min_scale=0.5,
+                 frame_budget=1.0 / 30, recover_after=30, cooldown=5,
+                 smoothing=0.2):
+        self.quality_max = _round_quality(quality_max)
+        self.quality_min = min(_round_quality(quality_min), self.quality_max)
+        self.scales = [s for s in SCALE_STEPS if s >= min_scale - 1e-6] or [1.0]
+        self.frame_budget = frame_budget
+        self.recover_after = recover_after
+        self.cooldown = cooldown  # отправок между снижениями
+        self.smoothing = smoothing
+
+        self.quality = self.quality_max
+        self.scale_index = 0
+        self.rate_index = 0
+        self.send_latency = 0.0  # сглаженное время отправки, с
+        self._healthy = 0
+        self._since_change = cooldown
+        self._dropped = 0
+
+    @property
+    def scale(self):
+        return self.scales[self.scale_index]
+
+    @property
+    def video_rate(self):
+        return VIDEO_RATE_STEPS[self.rate_index]
+
+    def update(self, send_latency, queue_depth, dropped):
+        """Учитываем очередную отправку; dropped - счётчик вытесненных"""
+        self.send_latency += self.smoothing * (send_latency - self.send_latency)
+        new_drops = dropped - self._dropped
+        self._dropped = dropped
+
+        self._since_change += 1
+
+        congested = (new_drops > 0 or queue_depth > 1 or
+                     self.send_latency > self.frame_budget)
+        if congested:
+            self._healthy = 0
+            # Даём предыдущему снижению подействовать
+            if self._since_change >= self.cooldown:
+                self._since_change = 0
+                self._degrade()
+        else:
+            self._healthy += 1
+            if self._healthy >= self.recover_after:
+                self._healthy = 0
+                self._recover()
+
+    def _degrade(self):
+        if self.quality > self.quality_min:
+            self.quality = max(self.quality_min, self.quality - QUALITY_STEP)
+        elif self.scale_index < len(self.scales) - 1:
+            self.scale_index += 1
+        elif self.rate_index < len(VIDEO_RATE_STEPS) - 1:
+            self.rate_index += 1
+
+    def _recover(self):
+        if self.rate_index > 0:
+            self.rate_index -= 1
+        elif self.scale_index > 0:
+            self.scale_index -= 1
+        elif self.quality < self.quality_max:
+            self.quality = min(self.quality_max, self.quality + QUALITY_STEP)
+
+
+def _round_quality(value):
+    """Качество кратно шагу, чтобы клиенты чаще делили один JPEG"""
+    value = int(round(value / QUALITY_STEP)) * QUALITY_STEP
+    return max(QUALITY_STEP, min(100, value))
@@ -0,0 +1,114 @@
+# backend/pipeline.py - Источник кадров для хаба камеры по настройкам config
+"""Отдельно от server.py: create_input вызывается и в процессах-воркерах
+камер (GESTURE_CAMERA_PROCESSES), которые не должны поднимать FastAPI.
+mediapipe импортируется только при открытии камеры (core/hands.py)."""
+from backend import config
+from backend.core.detectors import FakeHandDetector, create_detector
+from backend.core.filters import PredictiveDetector
+from backend.core.hands import HandsLoader
+from backend.core.inputs import CameraInput
+from backend.core.landmarker import (ENGINE_SOLUTIONS, create_tasks_detector,
+                                     parse_engine)
+from backend.core.metrics import NULL_TIMER
+from backend.core.recording import LandmarkRecorder, RecordingInput, ReplaySource
+from backend.core.sources import create_source
+from backend.core.workers import ProcessInput
+
+MAX_HANDS = 2
+
+
+def source_spec(camera_index):
+    """GESTURE_SOURCE для камеры: один на все или свой у каждой"""
+    if not config.SOURCE:
+        return camera_index
+    sources = [spec.strip() for spec in config.SOURCE.split(",")]
+    if len(sources) == 1:
+        return sources[0]
+    return sources[camera_index] if camera_index < len(sources) else camera_index
+
+
+def create_input(camera_index, timer=NULL_TIMER):
+    """Источник кадров для хаба: запись (GESTURE_REPLAY), камера или
+    GESTURE_SOURCE; в GESTURE_TEST_MODE - без камеры и MediaPipe.
+    None - источник недоступен."""
+    if config.REPLAY_PATH:
+        print(f"Replaying {config.REPLAY_PATH} "
+              f"(speed {config.REPLAY_SPEED or 'max'})")
+        return ReplaySource(config.REPLAY_PATH, config.REPLAY_VIDEO,
+                            speed=config.REPLAY_SPEED, loop=True)
+
+    # Hands строится и прогревается, пока открывается камера
+    engine = parse_engine(config.ENGINE)
+    loader = None
+    if not config.TEST_MODE and engine == ENGINE_SOLUTIONS:
+        loader = HandsLoader(MAX_HANDS)
+
+    # Камера или другой источник из GESTURE_SOURCE (файлы - по кругу)
+    spec = source_spec(camera_index)
+    if config.TEST_MODE and not config.SOURCE:
+        spec = "synthetic"
+    source = create_source(
+        spec,
+        width=config.CAPTURE_WIDTH, height=config.CAPTURE_HEIGHT,
+        fps=config.CAPTURE_FPS, fourcc=config.CAPTURE_FOURCC,
+        buffer_size=config.CAPTURE_BUFFER, loop=True)
+    if not source.open():
+        source.release()
+        if loader is not None:
+            loader.close()
+        return None
+
+    if config.TEST_MODE:
+        detector = FakeHandDetector(min(config.TEST_HANDS, MAX_HANDS),
+                                    delay=config.TEST_INFER_MS / 1000.0)
+        print(f"Camera {camera_index}: test mode ({spec}, fake hands)")
+    elif loader is None:
+        # HandLandmarker: ROI не поддерживается, уменьшение - да
+        try:
+            detector = create_tasks_detector(engine, config.TASK_MODEL,
+                                             num_hands=MAX_HANDS,
+                                             infer_size=config.INFER_SIZE)
+        except Exception:
+            source.release()
+            raise
+    else:
+        try:
+            hands = loader.get()
+        except Exception:
+            source.release()
+            raise
+        print(f"Camera {camera_index}: Hands ready in {loader.elapsed:.2f} s")
+        detector = create_detector(hands, infer_size=config.INFER_SIZE,
+                                   roi=bool(config.ROI_TRACKING),
+                                   padding=config.ROI_PADDING,
+                                   max_hands=MAX_HANDS)
+    frames = source.start(name=f"grabber-{camera_index}")
+    if (config.LANDMARK_FILTER or config.INFER_EVERY > 1 or
+            config.INFER_HZ > 0):
+        detector = PredictiveDetector(detector, every=config.INFER_EVERY,
+                                      hz=config.INFER_HZ)
+    frame_input = CameraInput(frames, detector, owns_detector=True,
+                              timer=timer)
+
+    if config.RECORD_PATH:
+        recorder = LandmarkRecorder(config.RECORD_PATH, config.RECORD_VIDEO,
+                                    video_fps=config.TARGET_FPS)
+        frame_input = RecordingInput(frame_input, recorder)
+    return frame_input
+
+
+def create_hub_input(camera_index, timer=NULL_TIMER):
+    """create_input в этом процессе или в процессе-воркере камеры"""
+    if not config.CAMERA_PROCESSES:
+        return create_input(camera_index, timer)
+
+    # Кадр в слоте живёт, пока отрисовываются следующие: слотов больше,
+    # чем кадров в пуле отрисовки
+    slots = max(config.FRAME_SLOTS, config.PIPELINE_WORKERS + 2)
+    frame_input = ProcessInput(camera_index, create_input, timer,
+                               slots=slots, max_hands=MAX_HANDS)
+    if frame_input.error is not None:
+        print(f"Camera {camera_index} worker failed: {frame_input.error}")
+        frame_input.close()
+        return None
+    return frame_input
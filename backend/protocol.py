@@ -0,0 +1,336 @@
+# backend/protocol.py - Форматы сообщений WebSocket
+"""Кодирование FramePacket для клиентов.
+
+JSON (по умолчанию, для старых клиентов):
+    {"app", "hands": [{"landmarks": [{"id","x","y","z"}], "index_finger",
+    "thumb", "handedness", "score", "gesture", "pose"}],
+    "frame": "data:image/jpeg;base64,...", "frame_id",
+    "timestamp" (время захвата, секунды, time.time())}
+
+Бинарный (?protocol=binary), little-endian, заголовок 16 байт:
+    uint8 тип, uint8 число рук, uint16 версия, uint32 frame_id,
+    float64 timestamp (секунды, time.time())
+    MSG_LANDMARKS: далее float32[hands][21][3] (x, y, z), затем
+        uint8[hands] - индекс жеста руки в GESTURE_STATES, затем
+        uint8[hands] - поза руки (см. ниже)
+    MSG_FRAME: далее байты JPEG (не с каждым кадром, см. ?video=&video_fps=)
+
+Сжатый (?protocol=delta): клиент выбирает точки и признаки, значения
+передаются целыми (значение * scale) и разностями с прошлым отправленным:
+    ?points=4,8,12 (по умолчанию все 21), &coords=xy|xyz (xyz),
+    &features=pinch,double_pinch,fist,hand_size, &scale=4096,
+    &keyframe=30 (полный кадр раз в N сообщений), &threshold=1
+    (сообщение не отправляется, пока ни одно значение не сдвинулось
+    на threshold единиц и жесты и позы те же)
+    Сразу после подключения - текстом {"type": "schema", ...}: порядок
+    значений руки (точки по coords, затем признаки) и scale.
+    MSG_KEYFRAME: int16[hands][значений], затем uint8[hands] - жесты,
+        затем uint8[hands] - позы
+    MSG_DELTA: int8[hands][значений] - прибавить к прошлым, затем жесты
+        и позы. Число рук то же, что в прошлом сообщении
+    MSG_FRAME - как в бинарном.
+
+Позы (backend/core/classifier.py) в бинарных протоколах - номер в
+списке имён из текстового {"type": "poses", "names": [...]}: он
+приходит при подключении и каждый раз, когда список меняется. 255 -
+поза не распознана.
+"""
+import base64
+import json
+import struct
+
+import numpy as np
+
+from backend.core.classifier import NO_POSE
+from backend.core.gestures import GESTURE_PAIRS, STATES as GESTURE_STATES
+from backend.core.landmarks import NUM_LANDMARKS
+from backend.core.metrics import NULL_TIMER
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOL_DELTA = "delta"
+
+VERSION = 1
+MSG_LANDMARKS = 1
+MSG_FRAME = 2
+MSG_KEYFRAME = 3
+MSG_DELTA = 4
+
+# Признаки руки для ?features=: номер столбца в
+# LandmarkFrame.distances(GESTURE_PAIRS) (те же расстояния, что у жестов)
+# или функция от этих расстояний
+FEATURES = {
+    "pinch": 0,  # большой - указательный (клик)
+    "double_pinch": 1,  # мизинец - безымянный (двойной клик)
+    "fist": lambda distances: distances[:, 2:].max(axis=1),  # кулак
+}
+HAND_SIZE = "hand_size"  # запястье - основание среднего пальца
+FEATURE_NAMES = tuple(FEATURES) + (HAND_SIZE,)
+
+HEADER = struct.Struct('<BBHId')
+
+
+def parse_protocol(value):
+    """Протокол из параметра подключения"""
+    if value in (PROTOCOL_BINARY, PROTOCOL_DELTA):
+        return value
+    return PROTOCOL_JSON
+
+
+def _int_param(params, name, default, low, high):
+    value = params.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name}: ожидается целое число")
+    if not low <= number <= high:
+        raise ValueError(f"{name}: от {low} до {high}")
+    return number
+
+
+def create_delta_encoder(params):
+    """DeltaEncoder по параметрам подключения; ValueError - неверные"""
+    points = params.get("points")
+    if points and points != "all":
+        try:
+            points = [int(index) for index in points.split(",") if index.strip()]
+        except ValueError:
+            raise ValueError("points: номера точек через запятую")
+        if not all(0 <= index < NUM_LANDMARKS for index in points):
+            raise ValueError(f"points: номера от 0 до {NUM_LANDMARKS - 1}")
+    else:
+        points = None
+    features = [name.strip() for name in params.get("features", "").split(",")
+                if name.strip()]
+    unknown = [name for name in features if name not in FEATURE_NAMES]
+    if unknown:
+        raise ValueError(f"features: неизвестные {', '.join(unknown)} "
+                         f"(возможные: {', '.join(FEATURE_NAMES)})")
+    coords = params.get("coords") or "xyz"
+    if coords not in ("xy", "xyz"):
+        raise ValueError("coords: xy или xyz")
+    return DeltaEncoder(
+        points=points, features=features, dims=len(coords),
+        scale=_int_param(params, "scale", 4096, 1, 8192),
+        keyframe_interval=_int_param(params, "keyframe", 30, 1, 10000),
+        threshold=_int_param(params, "threshold", 1, 1, 127))
+
+
+def pose_labels(packet):
+    """Имя позы каждой руки (None - не распознана)"""
+    if packet.poses is None:
+        return [None] * len(packet.points)
+    return [packet.pose_names[pose] if pose != NO_POSE else None
+            for pose in packet.poses.tolist()]
+
+
+def pose_bytes(packet):
+    """uint8[hands] - номера поз для бинарных протоколов"""
+    if packet.poses is None:
+        return bytes([NO_POSE]) * len(packet.points)
+    return packet.poses.tobytes()
+
+
+def poses_message(names):
+    """Имена поз для бинарных протоколов"""
+    return json.dumps({"type": "poses", "names": list(names)},
+                      ensure_ascii=False)
+
+
+def hands_to_dicts(landmark_frame, gestures, poses):
+    """LandmarkFrame в прежний список словарей"""
+    hands_data = []
+    for hand, handedness, score, gesture, pose in zip(
+            landmark_frame.points.tolist(), landmark_frame.handedness,
+            landmark_frame.scores.tolist(), gestures, poses):
+        landmarks = [{"id": idx, "x": x, "y": y, "z": z}
+                     for idx, (x, y, z) in enumerate(hand)]
+        hands_data.append({
+            "landmarks": landmarks,
+            "index_finger": landmarks[8] if len(landmarks) > 8 else None,
+            "thumb": landmarks[4] if len(landmarks) > 4 else None,
+            "handedness": handedness,
+            "score": score,
+            "gesture": gesture,
+            "pose": pose
+        })
+    return hands_data
+
+
+def frame_url(packet, video, timer=NULL_TIMER):
+    """data:URL кадра, base64 считается один раз на кадр"""
+    jpeg = packet.jpegs.get(video)
+    if jpeg is None:
+        return None
+
+    def build():
+        with timer.stage('base64'):
+            frame_base64 = base64.b64encode(jpeg).decode('utf-8')
+            return f"data:image/jpeg;base64,{frame_base64}"
+
+    return packet.cached(("frame_url", video), build)
+
+
+def encode_json(packet, app_type, video=None, timer=NULL_TIMER):
+    """JSON сообщение; сериализуем один раз на тип приложения и режим видео"""
+
+    def build():
+        frame = frame_url(packet, video, timer)
+        with timer.stage('json'):
+            return json.dumps({
+                "app": app_type,
+                "hands": packet.cached("hands", lambda: hands_to_dicts(
+                    packet.landmarks, packet.gestures, pose_labels(packet))),
+                "frame": frame,
+                "frame_id": packet.frame_id,
+                "timestamp": packet.timestamp
+            }, separators=(",", ":"), ensure_ascii=False)
+
+    return packet.cached(("json", app_type, video), build)
+
+
+def encode_landmarks(packet):
+    """Бинарное сообщение с landmarks"""
+
+    def build():
+        points = np.ascontiguousarray(packet.points, dtype='<f4')
+        header = HEADER.pack(MSG_LANDMARKS, len(points), VERSION,
+                             packet.frame_id & 0xFFFFFFFF, packet.timestamp)
+        gestures = bytes(GESTURE_STATES.index(g) for g in packet.gestures)
+        return header + points.tobytes() + gestures + pose_bytes(packet)
+
+    return packet.cached("binary_landmarks", build)
+
+
+def encode_frame(packet, video):
+    """Бинарное сообщение с JPEG; None, если кадра нет"""
+    jpeg = packet.jpegs.get(video)
+    if jpeg is None:
+        return None
+
+    def build():
+        header = HEADER.pack(MSG_FRAME, len(packet.points), VERSION,
+                             packet.frame_id & 0xFFFFFFFF, packet.timestamp)
+        return header + jpeg
+
+    return packet.cached(("binary_frame", video), build)
+
+
+class DeltaEncoder:
+    """Протокол delta для одного клиента (см. описание модуля).
+
+    Значения кадра квантуются один раз на кадр и набор полей (общие для
+    клиентов с одинаковой подпиской), разности считаются с тем, что
+    клиент уже получил, - пропущенные сообщения не накапливают ошибку.
+    """
+
+    def __init__(self, points=None, features=(), dims=3, scale=4096,
+                 keyframe_interval=30, threshold=1):
+        self.points = list(range(NUM_LANDMARKS)) if points is None else list(points)
+        self.features = list(features)
+        self.dims = dims
+        self.scale = scale
+        self.keyframe_interval = keyframe_interval
+        self.threshold = threshold
+        self.key = (tuple(self.points), tuple(self.features), dims, scale)
+        self.sent = None  # значения, которые сейчас у клиента
+        self.gestures = None
+        self.since_keyframe = 0
+        self.keyframes = 0
+        self.deltas = 0
+        self.skipped = 0
+        self.bytes = 0
+
+    def schema(self):
+        """Первое сообщение клиенту: как разбирать значения"""
+        return {"type": "schema", "protocol": PROTOCOL_DELTA,
+                "points": self.points, "coords": "xyz"[:self.dims],
+                "features": self.features, "scale": self.scale,
+                "values": len(self.points) * self.dims + len(self.features),
+                "gestures": list(GESTURE_STATES)}
+
+    def _quantize(self, packet):
+        """int32 (hands, значений) и байты жестов и поз - один раз на кадр"""
+
+        def build():
+            landmarks = packet.landmarks
+            columns = [landmarks.points[:, self.points, :self.dims].reshape(
+                len(landmarks), len(self.points) * self.dims)]
+            if self.features:
+                distances = packet.cached("distances", lambda: (
+                    landmarks.distances(GESTURE_PAIRS)))
+                for name in self.features:
+                    if name == HAND_SIZE:
+                        value = landmarks.hand_size()
+                    elif callable(FEATURES[name]):
+                        value = FEATURES[name](distances)
+                    else:
+                        value = distances[:, FEATURES[name]]
+                    columns.append(value.reshape(-1, 1))
+            values = np.rint(np.concatenate(columns, axis=1) * self.scale)
+            values = np.clip(values, -32768, 32767).astype(np.int32)
+            gestures = bytes(GESTURE_STATES.index(g) for g in packet.gestures)
+            return values, gestures + pose_bytes(packet)
+
+        return packet.cached(("quantized",) + self.key, build)
+
+    def _header(self, kind, packet, hands):
+        return HEADER.pack(kind, hands, VERSION, packet.frame_id & 0xFFFFFFFF,
+                           packet.timestamp)
+
+    def encode(self, packet):
+        """Сообщение для клиента или None - ничего заметно не изменилось"""
+        values, gestures = self._quantize(packet)
+        keyframe = (self.sent is None or len(self.sent) != len(values) or
+                    self.since_keyframe >= self.keyframe_interval)
+        if not keyframe:
+            delta = values - self.sent
+            change = int(np.abs(delta).max()) if delta.size else 0
+            if change < self.threshold and gestures == self.gestures:
+                self.skipped += 1
+                return None
+            keyframe = change > 127  # в int8 не помещается
+
+        if keyframe:
+            message = packet.cached(("keyframe",) + self.key, lambda: (
+                self._header(MSG_KEYFRAME, packet, len(values)) +
+                values.astype('<i2').tobytes() + gestures))
+            self.since_keyframe = 0
+            self.keyframes += 1
+        else:
+            message = (self._header(MSG_DELTA, packet, len(values)) +
+                       delta.astype(np.int8).tobytes() + gestures)
+            self.since_keyframe += 1
+            self.deltas += 1
+        self.sent = values
+        self.gestures = gestures
+        self.bytes += len(message)
+        return message
+
+    def stats(self):
+        return {"keyframes": self.keyframes, "deltas": self.deltas,
+                "skipped": self.skipped, "bytes": self.bytes}
+
+
+async def send_packet(websocket, packet, app_type, protocol, video=None,
+                      encoder=None, timer=NULL_TIMER):
+    """Отправка пакета клиенту в выбранном протоколе.
+    video - какой вариант кадра приложить (None - только landmarks),
+    encoder - DeltaEncoder клиента для протокола delta, timer - метрики
+    хаба (стадии base64 и json)."""
+    if protocol == PROTOCOL_DELTA:
+        message = encoder.encode(packet)
+        if message is not None:
+            await websocket.send_bytes(message)
+        frame_message = encode_frame(packet, video)
+        if frame_message is not None:
+            await websocket.send_bytes(frame_message)
+    elif protocol == PROTOCOL_BINARY:
+        await websocket.send_bytes(encode_landmarks(packet))
+        frame_message = encode_frame(packet, video)
+        if frame_message is not None:
+            await websocket.send_bytes(frame_message)
+    else:
+        await websocket.send_text(encode_json(packet, app_type, video, timer))
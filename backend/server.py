@@ -1,15 +1,15 @@
 # backend/server.py
+import time
+
+STARTED = time.perf_counter()
+
+import asyncio
 import os
 from pathlib import Path
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Body, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-import cv2
-import mediapipe as mp
-import numpy as np
 import json
-import asyncio
-import base64
 import sys
 
 # Добавляем корневую папку в путь импорта
@@ -17,6 +17,17 @@ current_dir = Path(__file__).parent
 project_root = current_dir.parent  # gesture/
 sys.path.append(str(project_root))
 
+from backend import config
+from backend.core.classifier import PoseClassifier
+from backend.core.hands import preload
+from backend.core.settings import SettingsStore
+from backend.hub import HubRegistry, parse_video_mode
+from backend.pipeline import create_hub_input
+from backend.pacing import AdaptiveQuality
+from backend.protocol import (PROTOCOL_DELTA, PROTOCOL_JSON,
+                              create_delta_encoder, parse_protocol,
+                              poses_message, send_packet)
+
 # Создаем FastAPI приложение
 app = FastAPI(title="Gesture Control System")
 
@@ -30,19 +41,33 @@ if frontend_path.exists():
 else:
     print(f"WARNING: Frontend directory not found at {frontend_path}")
 
-# Инициализация MediaPipe
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
+# Настройки жестов в памяти: меняются через /settings без остановки камер
+settings = SettingsStore(config.SETTINGS_PATH)
+
+# Образцы поз рук: распознаются в потоке каждой камеры, пополняются через /poses
+classifier = PoseClassifier(config.POSES_PATH, config.POSE_DISTANCE)
 
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=2,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+# Один производитель кадров на камеру, общий для всех клиентов
+# (в этом процессе или в процессе-воркере на камеру, см. backend/pipeline.py)
+hubs = HubRegistry(
+    create_hub_input,
+    workers=config.PIPELINE_WORKERS,
+    metrics=bool(config.METRICS),
+    queue_size=config.CLIENT_QUEUE_SIZE,
+    target_fps=config.TARGET_FPS,
+    settings=settings,
+    classifier=classifier
 )
 
 
+def query_number(websocket, name, default=None):
+    """Числовой параметр подключения или default"""
+    try:
+        return float(websocket.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
 @app.get("/")
 async def get_frontend():
     """Отдаём главную страницу"""
@@ -54,77 +79,232 @@ async def get_frontend():
         return FileResponse(str(project_root / "frontend" / "index.html"))
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Метрики конвейера по камерам: задержки стадий (p50/p95/p99),
+    задержка от захвата до отправки, частота инференса, очереди клиентов"""
+    return {"cameras": {str(index): hub.stats()
+                        for index, hub in hubs.hubs.items()}}
+
+
+def settings_message():
+    return {"type": "settings", "version": settings.version,
+            "settings": settings.snapshot()}
+
+
+async def update_settings(changes):
+    """Меняем настройки и сохраняем файл (только если что-то изменилось)"""
+    if not isinstance(changes, dict):
+        raise ValueError("Ожидается объект {настройка: значение}")
+    changed = settings.update(changes)
+    if changed:
+        await asyncio.get_running_loop().run_in_executor(None, settings.save)
+        print(f"Settings changed: {changed}")
+    return changed
+
+
+@app.get("/settings")
+async def get_settings():
+    """Текущие настройки жестов и сглаживания"""
+    settings.poll()
+    return settings_message()
+
+
+@app.patch("/settings")
+async def patch_settings(changes: dict = Body(...)):
+    """Меняем часть настроек на лету: {"click_threshold": 0.05, ...}"""
+    try:
+        changed = await update_settings(changes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    message = settings_message()
+    message["changed"] = changed
+    return message
+
+
+@app.websocket("/settings/ws")
+async def settings_websocket(websocket: WebSocket):
+    """Настройки через WebSocket: сразу присылаем текущие, клиент шлёт
+    {"настройка": значение, ...}, изменения (свои, чужие и из файла)
+    приходят всем подключённым"""
+    await websocket.accept()
+    await websocket.send_text(json.dumps(settings_message()))
+    sent_version = settings.version
+    try:
+        while True:
+            try:
+                text = await asyncio.wait_for(websocket.receive_text(), 1.0)
+            except asyncio.TimeoutError:
+                settings.poll()
+            else:
+                try:
+                    await update_settings(json.loads(text))
+                except ValueError as e:
+                    await websocket.send_text(json.dumps(
+                        {"type": "error", "error": str(e)}))
+            if settings.version != sent_version:
+                sent_version = settings.version
+                await websocket.send_text(json.dumps(settings_message()))
+    except WebSocketDisconnect:
+        pass
+
+
+def poses_summary():
+    return {"poses": classifier.summary(),
+            "max_distance": classifier.max_distance}
+
+
+@app.get("/poses")
+async def get_poses():
+    """Записанные позы и число образцов каждой"""
+    return poses_summary()
+
+
+@app.post("/poses")
+async def record_pose(request: dict = Body(...)):
+    """Записываем образцы позы с камеры, которую уже смотрит клиент:
+    {"name": "peace", "camera": 0, "hand": 0, "samples": 10} -
+    держите позу, пока запись не закончится"""
+    name = str(request.get("name") or "").strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="name is required")
+    try:
+        camera_index = int(request.get("camera", config.CAMERA_INDEX))
+        hand_index = int(request.get("hand", 0))
+        samples = int(request.get("samples", 10))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400,
+                            detail="camera, hand, samples must be integers")
+    if not 1 <= samples <= 300 or hand_index < 0:
+        raise HTTPException(status_code=400,
+                            detail="samples: 1..300, hand: 0 or more")
+    hub = hubs.hubs.get(camera_index)
+    if hub is None:
+        raise HTTPException(status_code=409,
+                            detail=f"Camera {camera_index} is not running")
+    try:
+        recorded = await hub.record_pose(name, samples, hand_index)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=408, detail="No hand in view")
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await asyncio.get_running_loop().run_in_executor(None, classifier.save)
+    print(f"Pose recorded: {name} ({recorded} samples)")
+    summary = poses_summary()
+    summary["recorded"] = recorded
+    return summary
+
+
+@app.delete("/poses/{name}")
+async def delete_pose(name: str):
+    """Удаляем все образцы позы"""
+    if not classifier.remove(name):
+        raise HTTPException(status_code=404, detail=f"Unknown pose {name}")
+    await asyncio.get_running_loop().run_in_executor(None, classifier.save)
+    return poses_summary()
+
+
+async def receive_reports(websocket, subscription):
+    """Сообщения от клиента: отчёты о задержках декодирования и
+    отрисовки на его стороне ({"type": "client_stats", ...}, см.
+    frontend/frame_worker.js) - в stats подписки и /metrics"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                data = json.loads(message.get("text") or "")
+            except ValueError:
+                continue  # бинарные и не JSON сообщения не ждём
+            if isinstance(data, dict) and data.get("type") == "client_stats":
+                subscription.report_client(data)
+    except RuntimeError:
+        pass  # сокет уже закрыт сервером
+
+
 @app.websocket("/ws/{app_type}")
 async def websocket_endpoint(websocket: WebSocket, app_type: str):
     """WebSocket для передачи данных в реальном времени"""
     await websocket.accept()
-    print(f"Client connected to {app_type}")
 
-    # Инициализируем камеру
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        await websocket.close(code=1011, reason="Camera not available")
+    # Протокол выбирается клиентом: JSON (по умолчанию), binary или delta
+    # (выбранные точки и признаки, разностями - см. backend/protocol.py)
+    protocol = parse_protocol(websocket.query_params.get("protocol"))
+    encoder = None
+    if protocol == PROTOCOL_DELTA:
+        try:
+            encoder = create_delta_encoder(websocket.query_params)
+        except ValueError as e:
+            await websocket.close(code=1008, reason=str(e))
+            return
+
+    # Видео: off - только landmarks, raw - без разметки, annotated - с разметкой.
+    # video_fps ограничивает частоту кадров, landmarks идут с каждым кадром
+    video = parse_video_mode(websocket.query_params.get("video"))
+    video_fps = query_number(websocket, "video_fps") or None
+
+    # Темп и границы качества: ?fps=&quality=&quality_min=&min_scale=
+    fps = query_number(websocket, "fps") or None
+    quality = AdaptiveQuality(
+        quality_max=query_number(websocket, "quality", config.JPEG_QUALITY),
+        quality_min=query_number(websocket, "quality_min",
+                                 config.JPEG_QUALITY_MIN),
+        min_scale=query_number(websocket, "min_scale", config.MIN_SCALE),
+        frame_budget=1.0 / (fps or config.TARGET_FPS)
+    )
+    # ?stats=N - раз в N секунд присылать сообщение с метриками
+    # ({"type": "stats", ...} текстом в любом протоколе)
+    stats_interval = query_number(websocket, "stats") or None
+    next_stats = time.monotonic() + (stats_interval or 0)
+
+    # ?camera=N - какая камера (по умолчанию GESTURE_CAMERA)
+    camera_index = int(query_number(websocket, "camera", config.CAMERA_INDEX))
+    if config.CAMERAS is not None and camera_index not in config.CAMERAS:
+        await websocket.close(code=1008, reason=f"Unknown camera {camera_index}")
         return
+    print(f"Client connected to {app_type} (camera {camera_index}, "
+          f"{protocol}, video={video})")
+
+    if encoder is not None:
+        await websocket.send_text(json.dumps(encoder.schema()))
+    # Бинарные протоколы передают номера поз, имена - отдельным сообщением
+    pose_names = None
+
+    # Подписываемся на общий поток камеры
+    hub = hubs.get(camera_index)
+    subscription = await hub.subscribe(video=video, video_fps=video_fps,
+                                       fps=fps, quality=quality)
+    reports = asyncio.create_task(receive_reports(websocket, subscription))
 
     try:
         while True:
-            # Читаем кадр
-            ret, frame = cap.read()
-            if not ret:
+            packet, frame_video = await subscription.get()
+            if packet is None:
+                await websocket.close(code=1011,
+                                      reason=hub.error or "Camera not available")
                 break
 
-            # Обрабатываем кадр
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_rgb.flags.writeable = False
-
-            # Детекция рук
-            results = hands.process(frame_rgb)
-
-            frame_rgb.flags.writeable = True
-
-            gesture_data = {
-                "app": app_type,
-                "hands": [],
-                "frame": None
-            }
-
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Рисуем landmarks на кадре
-                    mp_drawing.draw_landmarks(
-                        frame,
-                        hand_landmarks,
-                        mp_hands.HAND_CONNECTIONS,
-                        mp_drawing_styles.get_default_hand_landmarks_style(),
-                        mp_drawing_styles.get_default_hand_connections_style()
-                    )
-
-                    # Собираем данные о точках руки
-                    landmarks = []
-                    for idx, lm in enumerate(hand_landmarks.landmark):
-                        landmarks.append({
-                            "id": idx,
-                            "x": lm.x,
-                            "y": lm.y,
-                            "z": lm.z
-                        })
-
-                    gesture_data["hands"].append({
-                        "landmarks": landmarks,
-                        "index_finger": landmarks[8] if len(landmarks) > 8 else None,
-                        "thumb": landmarks[4] if len(landmarks) > 4 else None
-                    })
-
-            # Конвертируем кадр в base64 для отправки в браузер
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-            gesture_data["frame"] = f"data:image/jpeg;base64,{frame_base64}"
-
-            # Отправляем данные клиенту
-            await websocket.send_json(gesture_data)
-
-            # Контроль FPS
-            await asyncio.sleep(0.033)  # ~30 FPS
+            if protocol != PROTOCOL_JSON and packet.pose_names != pose_names:
+                pose_names = packet.pose_names
+                await websocket.send_text(poses_message(pose_names))
+
+            # Отправляем данные клиенту и замеряем, успевает ли он
+            started = time.perf_counter()
+            await send_packet(websocket, packet, app_type, protocol,
+                              frame_video, encoder, hub.timer)
+            send_latency = time.perf_counter() - started
+            subscription.report_send(send_latency)
+            hub.timer.add('send', send_latency)
+            hub.timer.add('capture_to_send', time.time() - packet.timestamp)
+
+            if stats_interval and time.monotonic() >= next_stats:
+                next_stats = time.monotonic() + stats_interval
+                stats = hub.stats()
+                stats.update(type="stats", client=subscription.stats())
+                if encoder is not None:
+                    stats["client"]["delta"] = encoder.stats()
+                await websocket.send_text(json.dumps(stats))
 
     except WebSocketDisconnect:
         print(f"Client disconnected from {app_type}")
@@ -133,12 +313,26 @@ async def websocket_endpoint(websocket: WebSocket, app_type: str):
         import traceback
         traceback.print_exc()
     finally:
-        # Освобождаем камеру
-        cap.release()
+        reports.cancel()
+        await asyncio.gather(reports, return_exceptions=True)
+        # Отписываемся; последний клиент останавливает камеру
+        await hub.unsubscribe(subscription)
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Отчёт о времени запуска; mediapipe догружается в фоне"""
+    print(f"Server ready in {time.perf_counter() - STARTED:.2f} s")
+    # В режиме воркеров mediapipe нужен только их процессам,
+    # в тестовом режиме - не нужен совсем
+    if config.TEST_MODE:
+        print("Test mode: synthetic frames and fake hands, no MediaPipe")
+    elif config.PRELOAD and not config.CAMERA_PROCESSES:
+        asyncio.get_running_loop().run_in_executor(None, preload)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Очистка при завершении"""
-    hands.close()
-    print("Server shutdown complete")
\ No newline at end of file
+    await hubs.close_all()
+    print("Server shutdown complete")
@@ -0,0 +1,255 @@
+# benchmark.py - Замер времени по стадиям конвейера на записанных видео
+"""Прогоняет настоящий конвейер (BaseGestureApp.run и цикл сервера) по
+видеофайлам и пишет p50/p95/p99 каждой стадии в JSON:
+
+    python benchmark.py --video clip.mp4 --resolutions 640x480,320x240 \\
+        --max-hands 1,2 --complexity 0,1 --confidence 0.5,0.7 \\
+        --infer-sizes 0,320 --roi 0,1 --output results/bench.json
+
+Стадии: flip, resize, bgr2rgb, hands_process, gestures, draw, process_frame,
+imencode, base64, json и frame (весь кадр). Без --video используется
+synthetic-источник (рук на нём нет, меряется всё, кроме жестов).
+
+--engines solutions,video,live_stream сравнивает mp.solutions.hands с
+Tasks HandLandmarker (нужна модель --task-model). В live_stream инференс
+идёт в потоке MediaPipe: hands_process - время до callback, frame - то,
+что ждёт сам цикл, landmark_age - насколько результат старше кадра,
+счётчик landmarker_results - сколько кадров граф успел обработать,
+landmarker_lost - сколько кадров так и остались без ответа.
+model_complexity и ROI к HandLandmarker не применяются.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+
+import cv2
+import mediapipe as mp
+
+from backend.apps.cursor_monitoring import CursorMonitoringApp
+from backend.core.actuator import RecordingBackend
+from backend.core.detectors import create_detector
+from backend.core.inputs import CameraInput
+from backend.core.landmarker import (DEFAULT_MODEL, ENGINE_SOLUTIONS, ENGINES,
+                                     create_tasks_detector)
+from backend.core.metrics import StageTimer
+from backend.core.sources import create_source
+from backend.hub import FrameHub, VIDEO_ANNOTATED
+from backend.protocol import encode_json
+
+PIPELINES = ("app", "server")
+
+
+def parse_list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def parse_resolution(value):
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark")
+    parser.add_argument('--video', action='append', default=[],
+                        help="видеофайл (можно несколько раз)")
+    parser.add_argument('--pipelines', default="app,server",
+                        help="какие конвейеры мерить: app, server")
+    parser.add_argument('--resolutions', default="640x480",
+                        help="разрешения через запятую, например 640x480,320x240")
+    parser.add_argument('--max-hands', default="1,2",
+                        help="max_num_hands (CLI - 1, сервер - 2)")
+    parser.add_argument('--complexity', default="1",
+                        help="model_complexity через запятую")
+    parser.add_argument('--confidence', default="0.7",
+                        help="min_detection/tracking_confidence через запятую")
+    parser.add_argument('--infer-sizes', default="0",
+                        help="размер входа MediaPipe через запятую (0 - полный кадр)")
+    parser.add_argument('--roi', default="0",
+                        help="инференс на области вокруг руки: 0,1")
+    parser.add_argument('--engines', default=ENGINE_SOLUTIONS,
+                        help=f"движки детекции через запятую: {', '.join(ENGINES)}")
+    parser.add_argument('--task-model', default=DEFAULT_MODEL,
+                        help="модель HandLandmarker (движки video, live_stream)")
+    parser.add_argument('--frames', type=int, default=300,
+                        help="кадров на прогон")
+    parser.add_argument('--warmup', type=int, default=10,
+                        help="кадров на прогрев (не учитываются)")
+    parser.add_argument('--quality', type=int, default=70,
+                        help="качество JPEG для конвейера сервера")
+    parser.add_argument('--output', default="benchmark_results.json",
+                        help="куда записать JSON")
+    return parser.parse_args()
+
+
+def create_hands(max_hands, complexity, confidence):
+    return mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_hands,
+        model_complexity=complexity,
+        min_detection_confidence=confidence,
+        min_tracking_confidence=confidence
+    )
+
+
+def build_detector(engine, task_model, max_hands, complexity, confidence,
+                   infer_size, roi):
+    if engine == ENGINE_SOLUTIONS:
+        return create_detector(create_hands(max_hands, complexity, confidence),
+                               infer_size=infer_size, roi=bool(roi),
+                               max_hands=max_hands)
+    return create_tasks_detector(engine, task_model, num_hands=max_hands,
+                                 min_confidence=confidence,
+                                 infer_size=infer_size)
+
+
+def open_source(video, resolution):
+    width, height = resolution
+    source = create_source(f"video:{video}" if video else "synthetic",
+                           width=width, height=height, loop=True)
+    if not source.open():
+        raise RuntimeError(f"Не удалось открыть {video}")
+    return source
+
+
+def bench_app(video, resolution, detector, frames, warmup):
+    """BaseGestureApp.run без окна: приложение управления курсором,
+    курсор пишется в RecordingBackend"""
+    timer = StageTimer()
+    app = CursorMonitoringApp(
+        getattr(detector, 'hands', None), mp.solutions.hands, mp.solutions.drawing_utils,
+        cursor_backend=RecordingBackend(1920, 1080),
+        source=open_source(video, resolution), timer=timer, detector=detector)
+    # Прогрев и замер - два запуска с одним Hands
+    app.run(max_frames=warmup, display=False, render=True)
+    timer.reset()
+    app.source = open_source(video, resolution)
+    app.input = None
+    started = time.perf_counter()
+    app.run(max_frames=frames, display=False, render=True)
+    return timer, time.perf_counter() - started
+
+
+def bench_server(video, resolution, detector, frames, warmup, quality):
+    """Цикл сервера без event loop: инференс, жесты, отрисовка,
+    JPEG и JSON - те же методы FrameHub и protocol"""
+    timer = StageTimer()
+    source = open_source(video, resolution)
+    frame_input = CameraInput(source.start(), detector, timer=timer)
+    hub = FrameHub(0, None, None, timer=timer)
+    video = (VIDEO_ANNOTATED, quality, 1.0)
+
+    started = None
+    for frame_id in range(warmup + frames):
+        if frame_id == warmup:
+            timer.reset()
+            started = time.perf_counter()
+        frame_started = time.perf_counter()
+        frame, landmarks, gestures, poses, timestamp = hub._capture_and_infer(
+            frame_input)
+        if frame is None:
+            break
+        packet = hub._render(frame, landmarks, gestures, poses, frame_id,
+                             timestamp, {video})
+        encode_json(packet, "cursor", video, timer)
+        timer.add('frame', time.perf_counter() - frame_started)
+    source.release()
+    return timer, time.perf_counter() - (started or time.perf_counter())
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    videos = [os.path.abspath(path) for path in args.video] or [None]
+    pipelines = [p for p in parse_list(args.pipelines) if p in PIPELINES]
+    matrix = itertools.product(
+        videos,
+        parse_list(args.resolutions, parse_resolution),
+        parse_list(args.max_hands, int),
+        parse_list(args.complexity, int),
+        parse_list(args.confidence, float),
+        parse_list(args.infer_sizes, int),
+        parse_list(args.roi, int),
+        parse_list(args.engines),
+    )
+    complexities = parse_list(args.complexity, int)
+
+    runs = []
+    for (video, resolution, max_hands, complexity, confidence, infer_size,
+         roi, engine) in matrix:
+        if engine not in ENGINES:
+            raise SystemExit(f"Неизвестный движок: {engine}")
+        # У HandLandmarker нет model_complexity и ROI - не повторяем прогоны
+        if engine != ENGINE_SOLUTIONS and (roi or
+                                           complexity != complexities[0]):
+            continue
+        for pipeline in pipelines:
+            print(f"\n{pipeline}: {video or 'synthetic'} "
+                  f"{resolution[0]}x{resolution[1]}, engine={engine}, "
+                  f"hands={max_hands}, complexity={complexity}, "
+                  f"confidence={confidence}, infer_size={infer_size}, roi={roi}")
+            detector = build_detector(engine, args.task_model, max_hands,
+                                      complexity, confidence, infer_size, roi)
+            try:
+                if pipeline == "app":
+                    timer, elapsed = bench_app(video, resolution, detector,
+                                               args.frames, args.warmup)
+                else:
+                    timer, elapsed = bench_server(video, resolution, detector,
+                                                  args.frames, args.warmup,
+                                                  args.quality)
+            finally:
+                detector.close()
+
+            stages = timer.summary()
+            frames = stages.get('frame', {}).get('count', 0)
+            runs.append({
+                'pipeline': pipeline,
+                'engine': engine,
+                'video': video,
+                'resolution': f"{resolution[0]}x{resolution[1]}",
+                'max_num_hands': max_hands,
+                'model_complexity': complexity,
+                'min_detection_confidence': confidence,
+                'infer_size': infer_size,
+                'roi': bool(roi),
+                'frames': frames,
+                'fps': frames / elapsed if elapsed > 0 else 0.0,
+                'stages': stages,
+                'counters': dict(timer.counters),
+            })
+            for name, stats in stages.items():
+                print(f"  {name:14s} p50 {stats['p50_ms']:7.2f}  "
+                      f"p95 {stats['p95_ms']:7.2f}  p99 {stats['p99_ms']:7.2f} мс")
+
+    result = {
+        'commit': git_commit(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'mediapipe': mp.__version__,
+        'cpu_count': os.cpu_count(),
+        'frames_per_run': args.frames,
+        'runs': runs,
+    }
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nРезультаты записаны в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
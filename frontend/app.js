@@ -1,20 +1,39 @@
+// Приём и декодирование потока - в frontend/frame_worker.js, здесь
+// только интерфейс: свежие руки рисуются раз за кадр экрана
+// (requestAnimationFrame), промежуточные сообщения пропускаются.
+
+// Протокол delta: каждая панель получает только то, что показывает
+// (жесты и позы приходят всегда)
+const SUBSCRIPTIONS = {
+    coordinates: {points: 'all', coords: 'xy', features: 'pinch'},
+    cursor: {points: '8', coords: 'xy'}
+};
+
 class GestureApp {
     constructor() {
-        this.ws = null;
         this.currentApp = null;
+        this.pending = null;  // последние руки, ещё не показанные
+        this.pendingFrame = null;  // кадр от воркера без OffscreenCanvas
+        this.renderRequested = false;
+        // Замеры отрисовки для воркера (он отправляет их серверу)
+        this.samples = {landmarks: [], render: [], droppedFrames: 0, droppedUpdates: 0};
         this.fps = 0;
         this.frameCount = 0;
         this.lastTime = Date.now();
         this.canvas = document.getElementById('hand-canvas');
         this.ctx = this.canvas.getContext('2d');
+        this.video = document.getElementById('video-feed');
+        this.videoCtx = null;
 
+        this.initWorker();
         this.initEventListeners();
+        this.initPoseRecorder();
         this.updateFPS();
     }
 
     initEventListeners() {
         // Кнопки запуска приложений
-        document.querySelectorAll('.app-btn').forEach(btn => {
+        document.querySelectorAll('.app-card .app-btn').forEach(btn => {
             if (!btn.disabled) {
                 btn.addEventListener('click', (e) => {
                     const app = e.target.closest('.app-card').dataset.app;
@@ -29,6 +48,118 @@ class GestureApp {
         });
     }
 
+    initWorker() {
+        this.worker = new Worker('static/frame_worker.js');
+        // Кадры рисует сам воркер, если браузер умеет OffscreenCanvas
+        if (this.video.transferControlToOffscreen) {
+            const offscreen = this.video.transferControlToOffscreen();
+            this.worker.postMessage({type: 'canvas', canvas: offscreen}, [offscreen]);
+        } else {
+            this.videoCtx = this.video.getContext('2d');
+        }
+        this.worker.onmessage = (event) => {
+            const message = event.data;
+            if (message.type === 'hands') {
+                if (this.pending) {
+                    this.samples.droppedUpdates++;
+                }
+                this.pending = message;
+                this.frameCount++;
+                this.requestRender();
+            } else if (message.type === 'frame') {
+                if (this.pendingFrame) {
+                    this.pendingFrame.bitmap.close();
+                    this.samples.droppedFrames++;
+                }
+                this.pendingFrame = message;
+                this.requestRender();
+            } else if (message.type === 'stats') {
+                this.updateServerStats(message);
+            } else if (message.type === 'status') {
+                this.onConnectionState(message.state);
+            }
+        };
+        // Замеры отрисовки - воркеру раз в секунду
+        setInterval(() => {
+            this.worker.postMessage({type: 'samples', ...this.samples});
+            this.samples = {landmarks: [], render: [], droppedFrames: 0, droppedUpdates: 0};
+        }, 1000);
+    }
+
+    requestRender() {
+        if (!this.renderRequested) {
+            this.renderRequested = true;
+            requestAnimationFrame(() => this.render());
+        }
+    }
+
+    render() {
+        // Сколько бы сообщений ни пришло с прошлого кадра экрана - рисуем последнее
+        this.renderRequested = false;
+        const now = performance.timeOrigin + performance.now();
+        const frame = this.pendingFrame;
+        if (frame) {
+            this.pendingFrame = null;
+            if (this.video.width !== frame.bitmap.width || this.video.height !== frame.bitmap.height) {
+                this.video.width = frame.bitmap.width;
+                this.video.height = frame.bitmap.height;
+            }
+            this.videoCtx.drawImage(frame.bitmap, 0, 0);
+            frame.bitmap.close();
+            this.samples.render.push(now - frame.received);
+        }
+        const data = this.pending;
+        if (data && this.currentApp) {
+            this.pending = null;
+            this.processGestureData(data);
+            this.samples.landmarks.push(now - data.received);
+        }
+    }
+
+    onConnectionState(state) {
+        if (state === 'connected') {
+            this.updateConnectionStatus('Connected', 'connected');
+            console.log(`Connected to ${this.currentApp} app`);
+        } else if (state === 'disconnected') {
+            this.updateConnectionStatus('Disconnected', 'disconnected');
+            console.log('WebSocket disconnected');
+        } else {
+            this.updateConnectionStatus('Error', 'error');
+        }
+    }
+
+    initPoseRecorder() {
+        // Запись своей позы: сервер снимает образцы с камеры, пока рука в кадре
+        const button = document.getElementById('record-pose-btn');
+        const input = document.getElementById('pose-name');
+        const status = document.getElementById('pose-status');
+        button.addEventListener('click', async () => {
+            const name = input.value.trim();
+            if (!name) {
+                input.focus();
+                return;
+            }
+            const camera = new URLSearchParams(window.location.search).get('camera');
+            button.disabled = true;
+            status.textContent = `Hold "${name}"...`;
+            try {
+                const response = await fetch('/poses', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify(camera === null ? {name} : {name, camera: Number(camera)})
+                });
+                const result = await response.json();
+                status.textContent = response.ok
+                    ? `Recorded ${result.recorded} samples of "${name}"`
+                    : `Failed: ${result.detail}`;
+            } catch (error) {
+                status.textContent = `Failed: ${error}`;
+            } finally {
+                button.disabled = false;
+            }
+        });
+    }
+
     async launchApp(appType) {
         this.currentApp = appType;
 
@@ -50,45 +181,30 @@ class GestureApp {
 
     async connectWebSocket(appType) {
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws/${appType}`;
-
-        try {
-            this.ws = new WebSocket(wsUrl);
-            this.updateConnectionStatus('Connecting...', 'connecting');
-
-            this.ws.onopen = () => {
-                this.updateConnectionStatus('Connected', 'connected');
-                console.log(`Connected to ${appType} app`);
-            };
-
-            this.ws.onmessage = (event) => {
-                const data = JSON.parse(event.data);
-                this.processGestureData(data);
-                this.frameCount++;
-            };
-
-            this.ws.onclose = () => {
-                this.updateConnectionStatus('Disconnected', 'disconnected');
-                console.log('WebSocket disconnected');
-            };
-
-            this.ws.onerror = (error) => {
-                console.error('WebSocket error:', error);
-                this.updateConnectionStatus('Error', 'error');
-            };
-
-        } catch (error) {
-            console.error('Failed to connect:', error);
-            alert('Failed to connect to server. Make sure backend is running.');
+        // Режим видео можно передать через адрес страницы: ?video=off|raw|annotated&video_fps=N,
+        // метрики сервера раз в N секунд: ?stats=N, камера станции: ?camera=N,
+        // все landmarks без сжатия: ?protocol=binary, порог сдвига: ?threshold=N
+        const pageParams = new URLSearchParams(window.location.search);
+        const query = new URLSearchParams({protocol: 'delta'});
+        for (const key of ['protocol', 'video', 'video_fps', 'stats', 'camera', 'threshold']) {
+            if (pageParams.has(key)) {
+                query.set(key, pageParams.get(key));
+            }
         }
+        if (query.get('protocol') === 'delta') {
+            for (const [key, value] of Object.entries(SUBSCRIPTIONS[appType] || {})) {
+                query.set(key, value);
+            }
+        }
+        const wsUrl = `${protocol}//${window.location.host}/ws/${appType}?${query}`;
+
+        // Подключается и разбирает сообщения воркер
+        this.pending = null;
+        this.updateConnectionStatus('Connecting...', 'connecting');
+        this.worker.postMessage({type: 'connect', url: wsUrl});
     }
 
     processGestureData(data) {
-        // Обновляем видео
-        if (data.frame) {
-            document.getElementById('video-feed').src = data.frame;
-        }
-
         // Обрабатываем данные в зависимости от приложения
         if (this.currentApp === 'coordinates') {
             this.updateCoordinates(data);
@@ -111,10 +227,10 @@ class GestureApp {
             document.getElementById('thumb-coords').textContent =
                 `X: ${(hand.thumb.x * 100).toFixed(1)}%, Y: ${(hand.thumb.y * 100).toFixed(1)}%`;
 
-            // Рассчитываем расстояние
+            // Расстояние: готовое с сервера (delta) или считаем сами
             const dx = hand.index_finger.x - hand.thumb.x;
             const dy = hand.index_finger.y - hand.thumb.y;
-            const distance = Math.sqrt(dx * dx + dy * dy);
+            const distance = hand.features?.pinch ?? Math.sqrt(dx * dx + dy * dy);
             document.getElementById('finger-distance').textContent = distance.toFixed(3);
 
             // Рисуем схему руки
@@ -135,19 +251,11 @@ class GestureApp {
             document.getElementById('cursor-pos').textContent =
                 `${screenX}, ${screenY}`;
 
-            // Определяем жест
-            const dx = hand.index_finger.x - hand.thumb.x;
-            const dy = hand.index_finger.y - hand.thumb.y;
-            const distance = Math.sqrt(dx * dx + dy * dy);
-
-            let gesture = "Moving";
-            if (distance < 0.05) {
-                gesture = "Click";
-            } else if (this.isFist(hand.landmarks)) {
-                gesture = "Drag";
-            }
-
-            document.getElementById('current-gesture').textContent = gesture;
+            // Жест и позу определяет сервер: тот же автомат, что и у
+            // курсора, и записанные образцы поз (backend/core/classifier.py)
+            document.getElementById('current-gesture').textContent =
+                hand.gesture || 'No gesture';
+            document.getElementById('current-pose').textContent = hand.pose || '—';
         }
     }
 
@@ -176,6 +284,9 @@ class GestureApp {
             ctx.beginPath();
             finger.forEach((pointIdx, i) => {
                 const point = landmarks[pointIdx];
+                if (!point) {
+                    return;  // точка не выбрана в подписке
+                }
                 const x = point.x * width;
                 const y = point.y * height;
 
@@ -213,27 +324,6 @@ class GestureApp {
         });
     }
 
-    isFist(landmarks) {
-        // Простая проверка на кулак (все пальцы близко к запястью)
-        const wrist = landmarks[0];
-        let allClose = true;
-
-        // Проверяем кончики пальцев
-        for (let i of [4, 8, 12, 16, 20]) {
-            const point = landmarks[i];
-            const dx = point.x - wrist.x;
-            const dy = point.y - wrist.y;
-            const distance = Math.sqrt(dx * dx + dy * dy);
-
-            if (distance > 0.15) { // Пороговое значение
-                allClose = false;
-                break;
-            }
-        }
-
-        return allClose;
-    }
-
     updateHandCount(count) {
         document.getElementById('hand-count').textContent = count;
     }
@@ -244,6 +334,26 @@ class GestureApp {
         element.className = className;
     }
 
+    updateServerStats(stats) {
+        // Частота инференса и задержка от захвата до отправки
+        const latency = (stats.stages || {}).capture_to_send;
+        const inference = (stats.rates || {}).inference || 0;
+        let text = `${inference.toFixed(0)} inf/s`;
+        if (latency) {
+            text += `, ${latency.p50_ms.toFixed(0)}/${latency.p95_ms.toFixed(0)} ms`;
+        }
+        if (stats.client) {
+            text += `, q${stats.client.queue}, drop ${stats.client.dropped}`;
+            // Своя сторона - из отчёта воркера, который сервер уже получил
+            const render = stats.client.report?.render;
+            if (render) {
+                text += `, render ${render.p50_ms.toFixed(0)} ms`;
+            }
+        }
+        document.getElementById('server-stats-text').textContent = text;
+        document.getElementById('server-stats').hidden = false;
+    }
+
     updateFPS() {
         setInterval(() => {
             const now = Date.now();
@@ -257,9 +367,14 @@ class GestureApp {
     }
 
     closeApp() {
-        if (this.ws) {
-            this.ws.close();
-            this.ws = null;
+        this.worker.postMessage({type: 'close'});
+        this.pending = null;
+        if (this.pendingFrame) {
+            this.pendingFrame.bitmap.close();
+            this.pendingFrame = null;
+        }
+        if (this.videoCtx) {
+            this.videoCtx.clearRect(0, 0, this.video.width, this.video.height);
         }
 
         this.currentApp = null;
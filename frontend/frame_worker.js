@@ -0,0 +1,319 @@
+// Поток приёма: WebSocket, разбор сообщений и декодирование кадров.
+// Основной поток страницы не видит ни base64, ни JPEG - только руки,
+// небольшие объекты, которые он рисует по requestAnimationFrame.
+//
+// Кадр декодируется через createImageBitmap и рисуется в OffscreenCanvas
+// страницы; старые кадры, не успевшие попасть на экран, выбрасываются.
+// Без OffscreenCanvas ImageBitmap передаётся странице и рисуется там.
+//
+// Раз в REPORT_INTERVAL задержки клиента уходят серверу сообщением
+// {"type": "client_stats", ...} - они видны в /metrics и stats.
+
+// Бинарный протокол (см. backend/protocol.py)
+const MSG_LANDMARKS = 1;
+const MSG_FRAME = 2;
+const MSG_KEYFRAME = 3;
+const MSG_DELTA = 4;
+const HEADER_SIZE = 16;
+const POINTS_PER_HAND = 21;
+// Порядок совпадает с backend/core/gestures.py STATES
+const GESTURE_STATES = ['No gesture', 'Moving', 'Click', 'Double click', 'Drag'];
+const REPORT_INTERVAL = 2000;  // мс
+
+// Время в мс, общее для воркера и страницы
+const now = () => performance.timeOrigin + performance.now();
+const nextFrame = self.requestAnimationFrame
+    ? (callback) => self.requestAnimationFrame(callback)
+    : (callback) => setTimeout(callback, 0);
+
+let ws = null;
+let canvas = null;  // OffscreenCanvas страницы
+let ctx = null;
+let schema = null;  // порядок значений протокола delta
+let values = null;  // значения, собранные из ключевого кадра и разностей
+let poseNames = [];  // имена поз для номеров в бинарных сообщениях
+let frameSeq = 0;  // номер последнего отправленного на декодирование кадра
+let newestSeq = 0;  // номер самого свежего декодированного кадра
+let pendingFrame = null;  // декодирован, ждёт отрисовки
+let drawRequested = false;
+let reportTimer = null;
+
+// Замеры до следующего отчёта: задержки в мс от получения сообщения
+const samples = {decode: [], render: [], landmarks: []};
+let droppedFrames = 0;  // декодированы, но не показаны - пришёл новее
+let droppedUpdates = 0;  // руки, которые страница не успела показать
+
+self.onmessage = (event) => {
+    const message = event.data;
+    if (message.type === 'canvas') {
+        canvas = message.canvas;
+        ctx = canvas.getContext('2d');
+    } else if (message.type === 'connect') {
+        connect(message.url);
+    } else if (message.type === 'close') {
+        disconnect();
+    } else if (message.type === 'samples') {
+        // Замеры страницы: отрисовка рук и (без OffscreenCanvas) кадров
+        samples.landmarks.push(...message.landmarks);
+        samples.render.push(...message.render);
+        droppedFrames += message.droppedFrames;
+        droppedUpdates += message.droppedUpdates;
+    }
+};
+
+function connect(url) {
+    disconnect();
+    ws = new WebSocket(url);
+    ws.binaryType = 'arraybuffer';
+    ws.onopen = () => self.postMessage({type: 'status', state: 'connected'});
+    ws.onclose = () => self.postMessage({type: 'status', state: 'disconnected'});
+    ws.onerror = () => self.postMessage({type: 'status', state: 'error'});
+    ws.onmessage = (event) => {
+        const received = now();
+        if (typeof event.data === 'string') {
+            handleText(event.data, received);
+        } else {
+            handleBinary(event.data, received);
+        }
+    };
+    reportTimer = setInterval(report, REPORT_INTERVAL);
+}
+
+function disconnect() {
+    if (ws) {
+        ws.onclose = null;
+        ws.close();
+        ws = null;
+    }
+    clearInterval(reportTimer);
+    schema = null;
+    values = null;
+    poseNames = [];
+    newestSeq = frameSeq;  // кадры, которые ещё декодируются, не нужны
+    if (pendingFrame) {
+        pendingFrame.bitmap.close();
+        pendingFrame = null;
+    }
+    if (ctx) {
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+    }
+    for (const name in samples) {
+        samples[name] = [];
+    }
+    droppedFrames = 0;
+    droppedUpdates = 0;
+}
+
+function handleText(text, received) {
+    const data = JSON.parse(text);
+    if (data.type === 'schema') {
+        schema = data;
+    } else if (data.type === 'poses') {
+        poseNames = data.names;
+    } else if (data.type === 'stats') {
+        self.postMessage(data);
+    } else if (data.type === undefined) {
+        // JSON протокол: кадр - data:URL в том же сообщении
+        if (data.frame) {
+            decodeFrame(dataUrlToBlob(data.frame), received);
+        }
+        postHands(data.hands, data.frame_id, data.timestamp, received);
+    }
+}
+
+function handleBinary(buffer, received) {
+    const view = new DataView(buffer);
+    const type = view.getUint8(0);
+    const handCount = view.getUint8(1);
+    const frameId = view.getUint32(4, true);
+    const timestamp = view.getFloat64(8, true);
+
+    if (type === MSG_FRAME) {
+        // Сырые байты JPEG, без base64
+        decodeFrame(new Blob([new Uint8Array(buffer, HEADER_SIZE)], {type: 'image/jpeg'}),
+                    received);
+    } else if (type === MSG_LANDMARKS) {
+        postHands(decodeLandmarks(buffer, handCount), frameId, timestamp, received);
+    } else if ((type === MSG_KEYFRAME || type === MSG_DELTA) && schema) {
+        const hands = decodeDelta(type, buffer, handCount);
+        if (hands) {
+            postHands(hands, frameId, timestamp, received);
+        }
+    }
+}
+
+function postHands(hands, frameId, timestamp, received) {
+    self.postMessage({type: 'hands', hands, frameId, timestamp, received});
+}
+
+function decodeLandmarks(buffer, handCount) {
+    const points = new Float32Array(buffer, HEADER_SIZE, handCount * POINTS_PER_HAND * 3);
+    const gestures = new Uint8Array(buffer, HEADER_SIZE + points.byteLength, handCount);
+    const poses = new Uint8Array(buffer, HEADER_SIZE + points.byteLength + handCount, handCount);
+    const hands = [];
+    for (let h = 0; h < handCount; h++) {
+        const landmarks = [];
+        for (let i = 0; i < POINTS_PER_HAND; i++) {
+            const offset = (h * POINTS_PER_HAND + i) * 3;
+            landmarks.push({
+                id: i,
+                x: points[offset],
+                y: points[offset + 1],
+                z: points[offset + 2]
+            });
+        }
+        hands.push({
+            landmarks,
+            index_finger: landmarks[8],
+            thumb: landmarks[4],
+            gesture: GESTURE_STATES[gestures[h]],
+            pose: poseNames[poses[h]] ?? null
+        });
+    }
+    return hands;
+}
+
+function decodeDelta(type, buffer, handCount) {
+    // Целые значения: ключевой кадр - целиком, иначе прибавляем разности
+    const count = handCount * schema.values;
+    let offset = HEADER_SIZE;
+    if (type === MSG_KEYFRAME) {
+        values = Int32Array.from(new Int16Array(buffer, offset, count));
+        offset += count * 2;
+    } else {
+        if (!values || values.length !== count) {
+            return null;  // ждём ключевой кадр
+        }
+        const deltas = new Int8Array(buffer, offset, count);
+        for (let i = 0; i < count; i++) {
+            values[i] += deltas[i];
+        }
+        offset += count;
+    }
+    const gestures = new Uint8Array(buffer, offset, handCount);
+    const poses = new Uint8Array(buffer, offset + handCount, handCount);
+
+    // Обратно в привычный вид: landmarks по номеру точки (только выбранные)
+    const dims = schema.coords.length;
+    const hands = [];
+    for (let h = 0; h < handCount; h++) {
+        let i = h * schema.values;
+        const landmarks = [];
+        for (const id of schema.points) {
+            landmarks[id] = {
+                id,
+                x: values[i] / schema.scale,
+                y: values[i + 1] / schema.scale,
+                z: dims === 3 ? values[i + 2] / schema.scale : 0
+            };
+            i += dims;
+        }
+        const features = {};
+        for (const name of schema.features) {
+            features[name] = values[i++] / schema.scale;
+        }
+        hands.push({
+            landmarks,
+            features,
+            index_finger: landmarks[8],
+            thumb: landmarks[4],
+            gesture: schema.gestures[gestures[h]],
+            pose: poseNames[poses[h]] ?? null
+        });
+    }
+    return hands;
+}
+
+function dataUrlToBlob(url) {
+    const binary = atob(url.slice(url.indexOf(',') + 1));
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return new Blob([bytes], {type: 'image/jpeg'});
+}
+
+async function decodeFrame(blob, received) {
+    const seq = ++frameSeq;
+    let bitmap;
+    try {
+        bitmap = await createImageBitmap(blob);
+    } catch (error) {
+        return;  // битый JPEG - ждём следующий
+    }
+    samples.decode.push(now() - received);
+    // Декодирование асинхронное: более новый кадр мог успеть раньше
+    if (seq <= newestSeq) {
+        bitmap.close();
+        droppedFrames++;
+        return;
+    }
+    newestSeq = seq;
+    if (!canvas) {
+        // Рисует страница, ImageBitmap передаётся без копирования
+        self.postMessage({type: 'frame', bitmap, received}, [bitmap]);
+        return;
+    }
+    if (pendingFrame) {
+        pendingFrame.bitmap.close();
+        droppedFrames++;
+    }
+    pendingFrame = {bitmap, received};
+    if (!drawRequested) {
+        drawRequested = true;
+        nextFrame(drawFrame);
+    }
+}
+
+function drawFrame() {
+    drawRequested = false;
+    const frame = pendingFrame;
+    if (!frame) {
+        return;
+    }
+    pendingFrame = null;
+    if (canvas.width !== frame.bitmap.width || canvas.height !== frame.bitmap.height) {
+        canvas.width = frame.bitmap.width;
+        canvas.height = frame.bitmap.height;
+    }
+    ctx.drawImage(frame.bitmap, 0, 0);
+    frame.bitmap.close();
+    samples.render.push(now() - frame.received);
+}
+
+function summary(latencies) {
+    if (!latencies.length) {
+        return null;
+    }
+    latencies.sort((a, b) => a - b);
+    const at = (p) => latencies[Math.min(latencies.length - 1,
+                                         Math.floor(p / 100 * latencies.length))];
+    return {
+        count: latencies.length,
+        mean_ms: latencies.reduce((sum, value) => sum + value, 0) / latencies.length,
+        p50_ms: at(50),
+        p95_ms: at(95),
+        max_ms: latencies[latencies.length - 1]
+    };
+}
+
+function report() {
+    if (!ws || ws.readyState !== WebSocket.OPEN) {
+        return;
+    }
+    ws.send(JSON.stringify({
+        type: 'client_stats',
+        interval_s: REPORT_INTERVAL / 1000,
+        offscreen: canvas !== null,
+        decode: summary(samples.decode),
+        render: summary(samples.render),
+        landmarks: summary(samples.landmarks),
+        dropped_frames: droppedFrames,
+        dropped_updates: droppedUpdates
+    }));
+    for (const name in samples) {
+        samples[name] = [];
+    }
+    droppedFrames = 0;
+    droppedUpdates = 0;
+}
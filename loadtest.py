@@ -0,0 +1,288 @@
+# loadtest.py - Нагрузочный тест WebSocket сервера: N клиентов /ws/{app}
+"""Открывает N одновременных клиентов, разбирает всё, что они получают,
+и печатает по каждому частоту кадров, задержку от захвата кадра на
+сервере до разбора на клиенте (p50/p95/p99) и долю пропущенных кадров:
+
+    GESTURE_TEST_MODE=1 python web_main.py      # сервер без камеры
+    python loadtest.py --clients 1,10,50 --duration 20 --protocol binary \\
+        --video annotated --output results/load.json
+
+Несколько значений --clients - ступени нагрузки по очереди: видно, на
+каком числе клиентов задержка начинает расти.
+
+Пропуски считаются по дыркам в frame_id (кадры, которые хаб отдал, а
+клиент не получил: переполнение его очереди или заказанный ?fps=; в
+протоколе delta - ещё и кадры, где рука не сдвинулась).
+Задержка считается по часам сервера и клиента - на одной машине или с
+синхронизированными часами. Генератор сам тратит процессор: если его
+cpu близко к 100%, цифры упираются в него, а не в сервер.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+
+from backend.core.metrics import PERCENTILES
+from backend.protocol import (HEADER, MSG_DELTA, MSG_FRAME, MSG_KEYFRAME,
+                              MSG_LANDMARKS)
+
+
+def parse_list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="WebSocket load test")
+    parser.add_argument('--url', default="ws://localhost:8000",
+                        help="адрес сервера")
+    parser.add_argument('--app', default="coordinates",
+                        help="тип приложения в /ws/{app}")
+    parser.add_argument('--clients', default="10",
+                        help="число клиентов; через запятую - ступени нагрузки")
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help="секунд на ступень (после разгона)")
+    parser.add_argument('--warmup', type=float, default=2.0,
+                        help="секунд разгона: кадры не учитываются")
+    parser.add_argument('--ramp', type=float, default=1.0,
+                        help="за сколько секунд подключить всех клиентов")
+    parser.add_argument('--protocol', default="json",
+                        choices=("json", "binary", "delta"),
+                        help="протокол клиентов")
+    parser.add_argument('--fields', default="",
+                        help="подписка протокола delta, например "
+                             "points=4,8&coords=xy&features=pinch")
+    parser.add_argument('--video', default="annotated",
+                        choices=("off", "raw", "annotated"),
+                        help="видео в потоке")
+    parser.add_argument('--video-fps', type=float, default=0,
+                        help="частота видео (0 - каждый кадр)")
+    parser.add_argument('--fps', type=float, default=0,
+                        help="частота кадров клиента (0 - как у камеры)")
+    parser.add_argument('--camera', type=int, default=None,
+                        help="камера (?camera=N)")
+    parser.add_argument('--decode-jpeg', action='store_true',
+                        help="декодировать JPEG, как браузер (дорого)")
+    parser.add_argument('--output', default=None,
+                        help="куда записать JSON с результатами")
+    return parser.parse_args()
+
+
+def client_url(args):
+    params = {"protocol": args.protocol, "video": args.video}
+    if args.video_fps:
+        params["video_fps"] = args.video_fps
+    if args.fps:
+        params["fps"] = args.fps
+    if args.camera is not None:
+        params["camera"] = args.camera
+    query = "&".join(f"{key}={value}" for key, value in params.items())
+    if args.protocol == "delta" and args.fields:
+        query += "&" + args.fields
+    return f"{args.url.rstrip('/')}/ws/{args.app}?{query}"
+
+
+def percentiles_ms(values):
+    if not values:
+        return {}
+    ms = np.asarray(values) * 1000.0
+    stats = {'mean_ms': float(ms.mean())}
+    for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+        stats[f'p{p}_ms'] = float(value)
+    stats['max_ms'] = float(ms.max())
+    return stats
+
+
+class LoadClient:
+    """Один клиент: читает сообщения и копит замеры после start_time"""
+
+    def __init__(self, index, url, decode_jpeg=False):
+        self.index = index
+        self.url = url
+        self.decode_jpeg = decode_jpeg
+        self.start_time = None  # до этого момента только читаем
+        self.latencies = []
+        self.frames = 0
+        self.video_frames = 0
+        self.bytes = 0
+        self.first_id = None
+        self.last_id = None
+        self.error = None
+        self.schema = None  # протокол delta
+        self.values = None
+
+    def _count(self, frame_id, timestamp):
+        """Кадр landmarks: задержка и номер для подсчёта пропусков"""
+        now = time.time()
+        if self.start_time is None or now < self.start_time:
+            return
+        self.frames += 1
+        self.latencies.append(now - timestamp)
+        if self.first_id is None:
+            self.first_id = frame_id
+        self.last_id = frame_id
+
+    def _decode_jpeg(self, jpeg):
+        if self.decode_jpeg:
+            import cv2
+            cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8),
+                         cv2.IMREAD_COLOR)
+
+    def handle(self, message):
+        if isinstance(message, str):
+            data = json.loads(message)
+            if data.get("type") == "schema":
+                self.schema = data
+            if data.get("type") is not None:
+                return  # stats и прочие служебные сообщения
+            self.bytes += len(message)
+            for hand in data["hands"]:
+                np.array([(lm["x"], lm["y"], lm["z"])
+                          for lm in hand["landmarks"]], dtype=np.float32)
+            frame = data.get("frame")
+            if frame:
+                self.video_frames += 1
+                self._decode_jpeg(base64.b64decode(frame.partition(",")[2]))
+            self._count(data["frame_id"], data["timestamp"])
+            return
+
+        self.bytes += len(message)
+        kind, hands, _, frame_id, timestamp = HEADER.unpack_from(message)
+        if kind == MSG_LANDMARKS:
+            np.frombuffer(message, dtype='<f4', count=hands * 21 * 3,
+                          offset=HEADER.size).reshape(hands, 21, 3)
+            self._count(frame_id, timestamp)
+        elif kind in (MSG_KEYFRAME, MSG_DELTA) and self.schema is not None:
+            count = hands * self.schema["values"]
+            if kind == MSG_KEYFRAME:
+                self.values = np.frombuffer(message, dtype='<i2', count=count,
+                                            offset=HEADER.size).astype(np.int32)
+            elif self.values is not None and len(self.values) == count:
+                self.values += np.frombuffer(message, dtype=np.int8,
+                                             count=count, offset=HEADER.size)
+            else:
+                return  # разности без ключевого кадра
+            (self.values / self.schema["scale"]).reshape(hands, -1)
+            self._count(frame_id, timestamp)
+        elif kind == MSG_FRAME:
+            self.video_frames += 1
+            self._decode_jpeg(message[HEADER.size:])
+
+    async def run(self, stop):
+        try:
+            async with websockets.connect(self.url, max_size=None) as websocket:
+                while not stop.is_set():
+                    try:
+                        message = await asyncio.wait_for(websocket.recv(), 1.0)
+                    except asyncio.TimeoutError:
+                        continue
+                    self.handle(message)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def result(self, duration):
+        expected = (self.last_id - self.first_id + 1
+                    if self.first_id is not None else 0)
+        return {
+            'client': self.index,
+            'fps': self.frames / duration,
+            'video_fps': self.video_frames / duration,
+            'mbit_s': self.bytes * 8 / duration / 1e6,
+            'drop_rate': 1 - self.frames / expected if expected else None,
+            'latency': percentiles_ms(self.latencies),
+            'error': self.error,
+        }
+
+
+def fetch_metrics(url):
+    """Метрики сервера (/metrics) в конце ступени, None - недоступны"""
+    http_url = url.replace("ws://", "http://", 1).replace("wss://", "https://", 1)
+    try:
+        with urllib.request.urlopen(f"{http_url.rstrip('/')}/metrics",
+                                    timeout=5) as response:
+            return json.load(response)
+    except Exception:
+        return None
+
+
+async def run_step(args, count):
+    url = client_url(args)
+    clients = [LoadClient(index, url, args.decode_jpeg) for index in range(count)]
+    stop = asyncio.Event()
+    tasks = []
+    for client in clients:
+        tasks.append(asyncio.create_task(client.run(stop)))
+        if count > 1:
+            await asyncio.sleep(args.ramp / count)
+
+    await asyncio.sleep(args.warmup)
+    started = time.time()
+    cpu_started = time.process_time()
+    for client in clients:
+        client.start_time = started
+    await asyncio.sleep(args.duration)
+    duration = time.time() - started
+    cpu = (time.process_time() - cpu_started) / duration
+    # Метрики - пока клиенты ещё подключены
+    server = await asyncio.get_running_loop().run_in_executor(
+        None, fetch_metrics, args.url)
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    results = [client.result(duration) for client in clients]
+    latencies = [value for client in clients for value in client.latencies]
+    drops = [r['drop_rate'] for r in results if r['drop_rate'] is not None]
+    return {
+        'clients': count,
+        'duration_s': duration,
+        'fps_mean': float(np.mean([r['fps'] for r in results])),
+        'fps_min': float(min(r['fps'] for r in results)),
+        'drop_rate_mean': float(np.mean(drops)) if drops else None,
+        'latency': percentiles_ms(latencies),
+        'errors': sum(1 for r in results if r['error']),
+        'loadgen_cpu': cpu,
+        'per_client': results,
+        'server': server,
+    }
+
+
+def print_step(step):
+    latency = step['latency']
+    drop = step['drop_rate_mean']
+    print(f"{step['clients']:>5} clients: "
+          f"fps {step['fps_mean']:6.1f} (min {step['fps_min']:5.1f})  "
+          f"latency p50 {latency.get('p50_ms', 0):7.1f} "
+          f"p95 {latency.get('p95_ms', 0):7.1f} "
+          f"p99 {latency.get('p99_ms', 0):7.1f} ms  "
+          f"drops {(drop or 0) * 100:5.1f}%  "
+          f"errors {step['errors']}  loadgen cpu {step['loadgen_cpu'] * 100:.0f}%")
+    for result in step['per_client']:
+        if result['error']:
+            print(f"      client {result['client']}: {result['error']}")
+
+
+async def main():
+    args = parse_args()
+    print(f"Load test: {client_url(args)}")
+    steps = []
+    for count in parse_list(args.clients, int):
+        step = await run_step(args, count)
+        print_step(step)
+        steps.append(step)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'url': client_url(args), 'steps': steps}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
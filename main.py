@@ -1,37 +1,156 @@
 # main.py
-import mediapipe as mp
-from backend.apps.coordinates import CoordinatesApp
-from backend.apps.cursor_monitoring import CursorMonitoringApp
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import importlib
+import threading
+
+from backend.core.landmarker import DEFAULT_MODEL, ENGINES
+from backend.core.recording import LandmarkRecorder, ReplaySource
+from backend.core.sources import create_source
+
+# Приложения импортируются только при запуске: (название, модуль, класс).
+# Hands каждое строит само, со своим MAX_NUM_HANDS
+APPS = {
+    '1': ("Coordinates", "backend.apps.coordinates", "CoordinatesApp"),
+    '2': ("Cursor Control", "backend.apps.cursor_monitoring",
+          "CursorMonitoringApp"),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gesture Control System")
+    parser.add_argument('--source', default='0',
+                        help="камера (0, camera:1), video:файл, images:папка "
+                             "или synthetic")
+    parser.add_argument('--width', type=int, default=0,
+                        help="ширина кадра захвата")
+    parser.add_argument('--height', type=int, default=0,
+                        help="высота кадра захвата")
+    parser.add_argument('--capture-fps', type=float, default=0,
+                        help="частота кадров камеры (для файлов - темп чтения)")
+    parser.add_argument('--fourcc', default=None,
+                        help="формат камеры, например MJPG")
+    parser.add_argument('--buffer-size', type=int, default=0,
+                        help="размер буфера кадров драйвера")
+    parser.add_argument('--loop', action='store_true',
+                        help="повторять видео и картинки по кругу")
+    parser.add_argument('--infer-size', type=int, default=0,
+                        help="размер входа MediaPipe по большей стороне "
+                             "(0 - полный кадр)")
+    parser.add_argument('--roi', action='store_true',
+                        help="инференс на области вокруг руки")
+    parser.add_argument('--engine', default=ENGINES[0], choices=ENGINES,
+                        help="движок детекции: mp.solutions.hands или "
+                             "Tasks HandLandmarker (live_stream - асинхронно)")
+    parser.add_argument('--task-model', default=DEFAULT_MODEL,
+                        help="модель HandLandmarker для --engine video/live_stream")
+    parser.add_argument('--metrics', action='store_true',
+                        help="показывать метрики поверх кадра (клавиша m)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="записывать landmarks в файл")
+    parser.add_argument('--record-video', metavar='PATH',
+                        help="записывать видео рядом с landmarks")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="воспроизвести запись вместо камеры")
+    parser.add_argument('--replay-video', metavar='PATH',
+                        help="видео к воспроизводимой записи")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="скорость воспроизведения (0 - максимальная)")
+    parser.add_argument('--app', choices=sorted(APPS),
+                        help="запустить приложение сразу, без меню")
+    parser.add_argument('--headless', action='store_true',
+                        help="без окна (фоновый сервис, нужен --app): "
+                             "остановка по Ctrl+C/SIGTERM")
+    parser.add_argument('--preview-port', type=int, default=0,
+                        help="MJPEG превью без окна на этом порту "
+                             "(рисуется, только когда кто-то смотрит)")
+    parser.add_argument('--preview-host', default="127.0.0.1",
+                        help="адрес превью (0.0.0.0 - доступно по сети)")
+    parser.add_argument('--preview-fps', type=float, default=2.0,
+                        help="частота кадров превью")
+    args = parser.parse_args()
+    if args.headless and not args.app:
+        parser.error("--headless требует --app")
+    return args
+
+
+def create_app_options(args):
+    """Источник кадров, настройки детектора и запись для очередного запуска"""
+    options = {'overlay': args.metrics,
+               'detector_options': {'infer_size': args.infer_size,
+                                    'roi': args.roi, 'engine': args.engine,
+                                    'task_model': args.task_model}}
+    if args.replay:
+        options['frame_input'] = ReplaySource(
+            args.replay, args.replay_video, speed=args.replay_speed)
+    else:
+        options['source'] = create_source(
+            args.source, width=args.width, height=args.height,
+            fps=args.capture_fps, fourcc=args.fourcc,
+            buffer_size=args.buffer_size, loop=args.loop)
+    if args.record:
+        options['recorder'] = LandmarkRecorder(args.record, args.record_video)
+    return options
+
+
+def load_app(module_name, class_name):
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def preload_apps():
+    """Тяжёлые импорты (mediapipe, приложения) - в фоне, пока открыто меню"""
+    from backend.core.hands import preload
+    preload()
+    for _, module_name, _ in APPS.values():
+        importlib.import_module(module_name)
+
+
+def run_headless(args):
+    """Одно приложение без окна и меню, пока не придёт сигнал"""
+    app_name, module_name, class_name = APPS[args.app]
+    print(f"Starting {app_name} (headless)...")
+    preview = None
+    if args.preview_port:
+        from backend.core.preview import PreviewServer
+        preview = PreviewServer(args.preview_port, args.preview_host,
+                                fps=args.preview_fps).start()
+    try:
+        app = load_app(module_name, class_name)(**create_app_options(args))
+        app.run_headless(preview=preview)
+    finally:
+        if preview is not None:
+            preview.close()
+    print(f"{app_name} stopped.")
 
 
 def main():
-    # Инициализация MediaPipe
-    mp_hands = mp.solutions.hands
-    mp_drawing = mp.solutions.drawing_utils
-    mp_drawing_styles = mp.solutions.drawing_styles  # Добавляем стили
-
-    hands = mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=1,  # Для курсора достаточно одной руки
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.7
-    )
-
-    # Список доступных приложений
-    apps = {
-        '1': ("Coordinates", CoordinatesApp),
-        '2': ("Cursor Control", CursorMonitoringApp)
-    }
+    args = parse_args()
+    if args.headless:
+        run_headless(args)
+        return
+    if args.app:
+        app_name, module_name, class_name = APPS[args.app]
+        load_app(module_name, class_name)(**create_app_options(args)).run()
+        return
+
+    threading.Thread(target=preload_apps, name="preload", daemon=True).start()
+    menu_shown = False
 
     while True:
         print("\n" + "=" * 50)
         print("GESTURE CONTROL SYSTEM")
         print("=" * 50)
 
-        for key, (name, _) in apps.items():
+        for key, (name, _, _) in APPS.items():
             print(f"{key}. {name}")
         print("0. Exit")
         print("=" * 50)
+        if not menu_shown:
+            menu_shown = True
+            print(f"Меню готово за {time.perf_counter() - STARTED:.2f} с")
 
         choice = input("Select application: ").strip()
 
@@ -39,14 +158,14 @@ def main():
             print("Goodbye!")
             break
 
-        if choice in apps:
-            app_name, app_class = apps[choice]
+        if choice in APPS:
+            app_name, module_name, class_name = APPS[choice]
             print(f"\nStarting {app_name}...")
 
             try:
                 # Создаём и запускаем приложение
-                # Передаём всё необходимое
-                app = app_class(hands, mp_hands, mp_drawing)
+                app_class = load_app(module_name, class_name)
+                app = app_class(**create_app_options(args))
                 app.run()
 
                 print(f"\n{app_name} finished.")
@@ -57,10 +176,6 @@ def main():
         else:
             print("Invalid choice. Try again.")
 
-    # Освобождаем ресурсы MediaPipe
-    hands.close()
-    print("Ресурсы освобождены")
-
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()